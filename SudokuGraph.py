@@ -1,8 +1,113 @@
+import functools
+import importlib.util
 import random
-import pulp
+import re
+import threading
+import time
+from array import array
+from collections.abc import Mapping
+
+from budget import TIMED_OUT, Budget, BudgetExceeded
+from dancing_links import DancingLinks
+from propagation import ALL_TECHNIQUES, Propagator
+from topology import get_topology
+
+
+# Cell symbols for the single-character puzzle format: index = color
+SYMBOLS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+SEPARATORS = re.compile(r"[,;\s]+")
+
+# Structural ILP model per dimension: (problem, variables by (v, r, c), lock)
+_ILP_MODELS = {}
+# Optional back-ends (pulp, sat/pysat) are imported by the solve_ methods
+# that use them, so importing this module only loads the standard library
+# solve_sat only reports progress with the bundled CDCL solver: pysat runs
+# in C and its counters are read once it stops (see sat.solve_cnf)
+_SAT_REPORTS_PROGRESS = importlib.util.find_spec("pysat") is None
+
+
+def solver(method=None, *, cancellable=True, reports_progress=True):
+    """Marks a solve_ method as a solver. Adds the optional arguments
+    stats=SolverStats() (filled with search counters, see instrumentation.py)
+    and time_limit / max_nodes / cancel (see budget.py; an exhausted budget
+    leaves the board unchanged and returns TIMED_OUT or CANCELLED) and, when
+    the graph has a solution_cache, looks the current board up (up to
+    symmetry) before searching and stores the solutions the method finds.
+
+    @solver(cancellable=False) marks a method whose search can't be stopped
+    once it starts (a cancel token is only checked before it), and
+    reports_progress=False one that never calls stats.node, so the stats
+    callback never fires. Window reads both attributes to disable Cancel and
+    the progress display."""
+    if method is None:
+        return functools.partial(solver, cancellable=cancellable, reports_progress=reports_progress)
+
+    @functools.wraps(method)
+    def wrapper(self, *args, stats=None, time_limit=None, max_nodes=None, cancel=None, **kwargs):
+        budget = None
+        if time_limit is not None or max_nodes is not None or cancel is not None:
+            budget = Budget(time_limit, max_nodes, cancel)
+        if stats is None:
+            return _call_budgeted(self, method, args, kwargs, None, budget)
+        stats.solver = method.__name__
+        start = time.perf_counter()
+        try:
+            stats.result = stats.run(_call_budgeted, self, method, args, kwargs, stats, budget)
+        finally:
+            stats.elapsed = time.perf_counter() - start
+        return stats.result
+    wrapper.cancellable = cancellable
+    wrapper.reports_progress = reports_progress
+    return wrapper
+
+
+def _call_budgeted(graph, method, args, kwargs, stats, budget):
+    if budget is None:
+        return _call_cached(graph, method, args, kwargs, stats, None)
+    puzzle = graph.get_colors()
+    try:
+        budget.check()
+        return _call_cached(graph, method, args, kwargs, stats, budget)
+    except BudgetExceeded as stop:
+        # Put back the board as it was before the search started
+        size = graph.size
+        for index, color in enumerate(graph.get_colors()):
+            if color != puzzle[index]:
+                graph.set_color(index // size, index % size, puzzle[index])
+        return stop.result
+
+
+def _call_cached(graph, method, args, kwargs, stats, budget):
+    cache = graph.solution_cache
+    if cache is None:
+        return method(graph, *args, stats=stats, budget=budget, **kwargs)
+
+    puzzle = graph.get_colors()
+    solution = cache.lookup(puzzle)
+    if solution is not None:
+        size = graph.size
+        for index, color in enumerate(solution):
+            if puzzle[index] == 0:
+                graph.set_color(index // size, index % size, color)
+        if stats is not None:
+            stats.cache_hit = True
+        return True
+
+    start = time.perf_counter()
+    result = method(graph, *args, stats=stats, budget=budget, **kwargs)
+    if result is True:
+        solve_time = time.perf_counter() - start
+        solution = graph.get_colors()
+        # Only complete solutions that kept every pre-filled cell are reusable
+        if all(solution) and graph.is_valid_coloring() and \
+                all(given in (0, color) for given, color in zip(puzzle, solution)):
+            cache.store(puzzle, solution, solve_time)
+    return result
 
 
 class Vertex:
+    __slots__ = ("row", "col", "block", "color", "locked", "neighbors")
+
     def __init__(self, row, col, block, color=0, locked=False):
         self.row = row
         self.col = col
@@ -15,34 +120,220 @@ class Vertex:
         return f"V({self.row},{self.col}) C:{self.color}"
 
 
+class VertexView:
+    """Read-only vertex-like view over one cell of a compact SudokuGraph.
+    Color and lock state live in the graph's flat buffers; change them with
+    set_color so the unit masks and the conflict index stay in step."""
+    __slots__ = ("_graph", "index", "row", "col", "block", "neighbors")
+
+    def __init__(self, graph, row, col):
+        self._graph = graph
+        self.index = row * graph.size + col
+        self.row = row
+        self.col = col
+        self.block = graph.cell_blocks[self.index]
+        self.neighbors = graph.topology.neighbor_sets[self.index]
+
+    @property
+    def color(self):
+        return self._graph.colors[self.index]
+
+    @property
+    def locked(self):
+        return bool(self._graph.locks[self.index])
+
+    def __repr__(self):
+        return f"V({self.row},{self.col}) C:{self.color}"
+
+
+class _VertexMap(Mapping):
+    """Read-only (row, col) -> VertexView mapping, so compact graphs keep the
+    vertices API. The views are built on first use and then reused."""
+
+    def __init__(self, graph):
+        self._graph = graph
+        self._items = None  # ((row, col), view) per cell id
+
+    def _get_items(self):
+        if self._items is None:
+            graph = self._graph
+            self._items = tuple(((index // graph.size, index % graph.size),
+                                 VertexView(graph, index // graph.size, index % graph.size))
+                                for index in range(graph.size ** 2))
+        return self._items
+
+    def __getitem__(self, key):
+        row, col = key
+        size = self._graph.size
+        if not (0 <= row < size and 0 <= col < size):
+            raise KeyError(key)
+        return self._get_items()[row * size + col][1]
+
+    def __iter__(self):
+        size = self._graph.size
+        for index in range(size * size):
+            yield (index // size, index % size)
+
+    def __len__(self):
+        return self._graph.size * self._graph.size
+
+    def values(self):
+        return [view for _, view in self._get_items()]
+
+    def items(self):
+        return self._get_items()
+
+
 class SudokuGraph:
-    def __init__(self, dimension=3):
+    def __init__(self, dimension=3, use_bitmasks=True, compact=False, solution_cache=None):
         if dimension < 2:
             raise ValueError("Block dimension must be at least 2.")
         self.dimension = dimension
         self.size = dimension ** 2  # Total rows and columns
+        # Compact graphs keep colors/locks in flat buffers indexed by cell id
+        # (row * size + col) and hand out VertexView objects instead of Vertex
+        self.compact = compact
         self.vertices = {}
+        # Optional canonical.SolutionCache consulted by every solve_ method
+        self.solution_cache = solution_cache
+        # When False, validity checks walk the neighbor sets instead of the unit masks
+        self.use_bitmasks = use_bitmasks
+        self.full_mask = ((1 << self.size) - 1) << 1  # bits 1..size, one per color
         self._build_graph()
+        self._reset_constraint_state()
+        self._exact_cover = None  # built on first use by solve_dancing_links
+        self.nodes_visited = 0  # colors tried by the last DSATUR search
+        self._propagator = None  # built on first use by propagate
+        self.propagation_resolved = 0  # cells filled by the last propagation pass
+        self.ilp_model_size = (0, 0)  # (free variables, constraints) of the last ILP solve
+        self.ilp_timings = {}  # seconds spent building, bounding, solving and extracting
+        self.local_search_history = []  # (seconds, conflicts) of the last solve_local_search
 
     def _get_block_number(self, row, col):
         return (row // self.dimension) * self.dimension + (col // self.dimension)
 
     def _build_graph(self):
-        # Create all vertices
-        for row in range(self.size):
-            for col in range(self.size):
-                block = self._get_block_number(row, col)
-                self.vertices[(row, col)] = Vertex(row, col, block)
-
-        # Add edges: neighbors in same row, col or block
-        for (r1, c1), v1 in self.vertices.items():
-            for (r2, c2), v2 in self.vertices.items():
-                if (r1, c1) != (r2, c2):
-                    same_row = r1 == r2
-                    same_col = c1 == c2
-                    same_block = v1.block == v2.block
-                    if same_row or same_col or same_block:
-                        v1.neighbors.add((r2, c2))
+        # Everything but colors and locks comes from the topology shared by all graphs of this dimension
+        topology = self.topology = get_topology(self.dimension)
+        self.cell_blocks = topology.cell_blocks
+        self.row_units = topology.row_units
+        self.col_units = topology.col_units
+        self.block_units = topology.block_units
+        cells = topology.cells
+
+        if self.compact:
+            self.colors = array("H", bytes(2 * cells))
+            self.locks = bytearray(cells)
+            self.vertices = _VertexMap(self)
+            return
+
+        for index in range(cells):
+            row, col = divmod(index, self.size)
+            vertex = Vertex(row, col, self.cell_blocks[index])
+            vertex.neighbors = topology.neighbor_sets[index]
+            self.vertices[(row, col)] = vertex
+
+    # Read through the topology rather than copied, so a graph holds no
+    # memoryview and pickles (the topology pickles as a registry reference)
+    @property
+    def adjacency_offsets(self):
+        return self.topology.adjacency_offsets
+
+    @property
+    def adjacency(self):
+        return self.topology.adjacency
+
+    def neighbor_ids(self, index):
+        """Cell ids adjacent to cell id index (same row, column or block)."""
+        return self.topology.neighbor_ids(index)
+
+    def _reset_constraint_state(self):
+        # Bit c of a unit mask is set while color c is present in that unit
+        self.row_masks = [0] * self.size
+        self.col_masks = [0] * self.size
+        self.block_masks = [0] * self.size
+        # Color counts per unit keep the masks exact when a unit holds duplicates
+        self.row_counts = [[0] * (self.size + 1) for _ in range(self.size)]
+        self.col_counts = [[0] * (self.size + 1) for _ in range(self.size)]
+        self.block_counts = [[0] * (self.size + 1) for _ in range(self.size)]
+        # Conflict index: duplicates counts the (unit, color) pairs held by more
+        # than one cell. set_color only records the cells it changed; the set of
+        # conflicting cells is brought up to date when read (see conflicts)
+        self.duplicates = 0
+        self._conflicts = set()
+        self._conflict_changes = set()  # cells that entered or left _conflicts since the last pop
+        self._dirty_cells = {}  # cell -> its color when the index was last brought up to date
+
+    def _add_to_units(self, row, col, block, color):
+        bit = 1 << color
+        row_counts, col_counts, block_counts = self.row_counts[row], self.col_counts[col], self.block_counts[block]
+        row_counts[color] += 1
+        col_counts[color] += 1
+        block_counts[color] += 1
+        if (self.row_masks[row] | self.col_masks[col] | self.block_masks[block]) & bit:
+            # The color was already in one of the units: count the new duplicates
+            self.duplicates += (row_counts[color] == 2) + (col_counts[color] == 2) + (block_counts[color] == 2)
+        self.row_masks[row] |= bit
+        self.col_masks[col] |= bit
+        self.block_masks[block] |= bit
+
+    def _remove_from_units(self, row, col, block, color):
+        bit = 1 << color
+        row_counts, col_counts, block_counts = self.row_counts[row], self.col_counts[col], self.block_counts[block]
+        row_counts[color] -= 1
+        if row_counts[color] == 0:
+            self.row_masks[row] &= ~bit
+        col_counts[color] -= 1
+        if col_counts[color] == 0:
+            self.col_masks[col] &= ~bit
+        block_counts[color] -= 1
+        if block_counts[color] == 0:
+            self.block_masks[block] &= ~bit
+        if (self.row_masks[row] | self.col_masks[col] | self.block_masks[block]) & bit:
+            self.duplicates -= (row_counts[color] == 1) + (col_counts[color] == 1) + (block_counts[color] == 1)
+
+    def _color_at(self, index):
+        if self.compact:
+            return self.colors[index]
+        return self.vertices[divmod(index, self.size)].color
+
+    @property
+    def conflicts(self):
+        """Ids of the cells that share their color with a neighbor. Only the
+        cells set since the last read and the holders of their old and new
+        colors in their units are re-checked, so after a single edit this
+        costs O(degree)."""
+        if self._dirty_cells:
+            size = self.size
+            color_at = self._color_at
+            cells = set(self._dirty_cells)
+            for cell, old_color in self._dirty_cells.items():
+                colors = {old_color, color_at(cell)} - {0}
+                row, col = divmod(cell, size)
+                for unit in (self.row_units[row], self.col_units[col], self.block_units[self.cell_blocks[cell]]):
+                    cells.update(other for other in unit if color_at(other) in colors)
+            self._dirty_cells = {}
+
+            for cell in cells:
+                color = color_at(cell)
+                row, col = divmod(cell, size)
+                conflicting = color != 0 and (self.row_counts[row][color] > 1
+                                              or self.col_counts[col][color] > 1
+                                              or self.block_counts[self.cell_blocks[cell]][color] > 1)
+                if conflicting != (cell in self._conflicts):
+                    if conflicting:
+                        self._conflicts.add(cell)
+                    else:
+                        self._conflicts.discard(cell)
+                    self._conflict_changes.add(cell)
+        return self._conflicts
+
+    def pop_conflict_changes(self):
+        """Ids of the cells whose conflict state changed since the last call."""
+        self.conflicts  # bring the index up to date
+        changes = self._conflict_changes
+        self._conflict_changes = set()
+        return changes
 
     def get_vertex(self, row, col):
         return self.vertices.get((row, col))
@@ -50,8 +341,61 @@ class SudokuGraph:
     def set_color(self, row, col, color, locked=False):
         if not (0 <= color <= self.size):
             raise ValueError(f"Color must be between 0 and {self.size}")
-        self.vertices[(row, col)].color = color
-        self.vertices[(row, col)].locked = locked
+        if self.compact:
+            index = row * self.size + col
+            old_color = self.colors[index]
+            if old_color != color:
+                block = self.cell_blocks[index]
+                if old_color != 0:
+                    self._remove_from_units(row, col, block, old_color)
+                if color != 0:
+                    self._add_to_units(row, col, block, color)
+                self.colors[index] = color
+                self._dirty_cells.setdefault(index, old_color)
+            self.locks[index] = 1 if locked else 0
+            return
+
+        vertex = self.vertices[(row, col)]
+        old_color = vertex.color
+        if old_color != color:
+            if old_color != 0:
+                self._remove_from_units(row, col, vertex.block, old_color)
+            if color != 0:
+                self._add_to_units(row, col, vertex.block, color)
+            vertex.color = color
+            self._dirty_cells.setdefault(row * self.size + col, old_color)
+        vertex.locked = locked
+
+    def get_candidates_mask(self, row, col):
+        """Bitmask (bit c for color c) of the colors no neighbor of (row, col) uses.
+        Only meaningful for an empty cell, since its own color is part of the masks."""
+        block = self._get_block_number(row, col)
+        return self.full_mask & ~(self.row_masks[row] | self.col_masks[col] | self.block_masks[block])
+
+    def get_candidates(self, row, col):
+        mask = self.get_candidates_mask(row, col)
+        return [color for color in range(1, self.size + 1) if mask >> color & 1]
+
+    def is_move_valid(self, row, col, color):
+        """True if no neighbor of (row, col) already uses color."""
+        if self.compact:
+            index = row * self.size + col
+            current, block = self.colors[index], self.cell_blocks[index]
+        else:
+            vertex = self.vertices[(row, col)]
+            current, block = vertex.color, vertex.block
+        if not self.use_bitmasks:
+            return not any(self.get_vertex(r, c).color == color for r, c in self.vertices[(row, col)].neighbors)
+        own = 1 if current == color else 0
+        return (self.row_counts[row][color] == own
+                and self.col_counts[col][color] == own
+                and self.block_counts[block][color] == own)
+
+    def _saturation(self, vertex):
+        """Number of distinct colors among the neighbors of an uncolored vertex."""
+        if not self.use_bitmasks:
+            return len({self.get_vertex(r, c).color for r, c in vertex.neighbors if self.get_vertex(r, c).color != 0})
+        return (self.row_masks[vertex.row] | self.col_masks[vertex.col] | self.block_masks[vertex.block]).bit_count()
 
     def is_cell_valid(self, row, col):
         vertex = self.get_vertex(row, col)
@@ -61,6 +405,13 @@ class SudokuGraph:
         if vertex.color == 0:
             return True  # Empty cells are considered valid
 
+        if self.use_bitmasks:
+            # The vertex itself is the only holder of its color in each of its units
+            color = vertex.color
+            return (self.row_counts[vertex.row][color] == 1
+                    and self.col_counts[vertex.col][color] == 1
+                    and self.block_counts[vertex.block][color] == 1)
+
         for n_row, n_col in vertex.neighbors:
             neighbor = self.get_vertex(n_row, n_col)
             if neighbor.color == vertex.color:
@@ -69,10 +420,7 @@ class SudokuGraph:
         return True  # No conflicts
     
     def is_valid_coloring(self):
-        for (row, col), vertex in self.vertices.items():
-            if not self.is_vertex_valid(vertex):
-                return False
-        return True
+        return self.duplicates == 0
     
     def get_solver_options(self):
         """Returns a list of (display_name, method_name) tuples."""
@@ -84,28 +432,140 @@ class SudokuGraph:
                 solvers.append((display, name))
         return solvers
 
-    def solve_brute_force(self):
-        # Find the next empty cell
+    def _get_propagator(self):
+        if self._propagator is None:
+            self._propagator = Propagator(self)
+        return self._propagator
+
+    def propagate(self, techniques=ALL_TECHNIQUES):
+        """Applies constraint propagation to the current colors and fills every cell it forces.
+        Returns the candidate bitmask of each cell id, or None if the board is contradictory
+        (the board is left untouched in that case). The number of cells filled is kept
+        in self.propagation_resolved."""
+        self.propagation_resolved = 0
+        candidates = []
         for (row, col), vertex in self.vertices.items():
-            if vertex.color == 0:
-                for num in range(1, self.size + 1):
-                    self.set_color(row, col, num)
-                    if self.is_vertex_valid(vertex):
-                        if self.solve_brute_force():
-                            return True
-                    self.set_color(row, col, 0)  # Backtrack
-                return False  # No valid number found
-        return True  # All cells filled
-
-    def solve_dsatur_backtracking(self):
+            if vertex.color != 0:
+                candidates.append(1 << vertex.color)
+            else:
+                candidates.append(self.get_candidates_mask(row, col))
+
+        if not self._get_propagator().run(candidates, techniques):
+            return None
+
+        for (row, col), vertex in self.vertices.items():
+            mask = candidates[row * self.size + col]
+            if vertex.color == 0 and not mask & (mask - 1):
+                self.set_color(row, col, mask.bit_length() - 1)
+                self.propagation_resolved += 1
+        return candidates
+
+    def _locked_candidates(self):
+        """Candidate bitmask of each cell id when only the locked cells (the
+        givens, as the exact solvers see them) are on the board."""
+        size = self.size
+        row_masks, col_masks, block_masks = [0] * size, [0] * size, [0] * size
+        colors = [v.color if v.locked else 0 for v in self.vertices.values()]
+        for cell, color in enumerate(colors):
+            if color:
+                row_masks[cell // size] |= 1 << color
+                col_masks[cell % size] |= 1 << color
+                block_masks[self.cell_blocks[cell]] |= 1 << color
+        return [1 << color if color else
+                self.full_mask & ~(row_masks[cell // size] | col_masks[cell % size] | block_masks[self.cell_blocks[cell]])
+                for cell, color in enumerate(colors)]
+
+    def _propagation_pass(self, stats):
+        candidates = self.propagate()
+        if stats is not None:
+            stats.propagated = self.propagation_resolved
+            stats.details["techniques"] = dict(self._get_propagator().counts)
+        return candidates
+
+    @solver(cancellable=False, reports_progress=False)
+    def solve_propagation_only(self, stats=None, budget=None):
+        """Solves using propagation alone; False if it stalls before filling the board."""
+        candidates = self._propagation_pass(stats)
+        return candidates is not None and all(not mask & (mask - 1) for mask in candidates)
+
+    @solver
+    def solve_brute_force(self, propagate=False, stats=None, budget=None):
+        if not self.is_valid_coloring():
+            return False  # Givens already in conflict: no search can fix them
+        if propagate and self._propagation_pass(stats) is None:
+            return False
+        return self._brute_force(stats, budget)
+
+    def _brute_force(self, stats=None, budget=None, depth=0):
+        if stats is not None:
+            select_start = time.perf_counter()
+        # Find the next empty cell
+        empty = self._first_empty()
+        if empty is None:
+            return True  # All cells filled
+        (row, col), vertex = empty
+        if stats is not None:
+            stats.select_time += time.perf_counter() - select_start
+        for num in range(1, self.size + 1):
+            self.set_color(row, col, num)
+            if budget is not None:
+                budget.charge()
+            if stats is None:
+                valid = self.is_vertex_valid(vertex)
+            else:
+                stats.node(depth + 1)
+                stats.validity_checks += 1
+                check_start = time.perf_counter()
+                valid = self.is_vertex_valid(vertex)
+                stats.validate_time += time.perf_counter() - check_start
+            if valid:
+                if self._brute_force(stats, budget, depth + 1):
+                    return True
+            self.set_color(row, col, 0)  # Backtrack
+        if stats is not None:
+            stats.backtracks += 1
+        return False  # No valid number found
+
+    def _first_empty(self):
+        """((row, col), vertex) of the first empty cell in row-major order, or None."""
+        if self.compact:
+            try:
+                return self.vertices.items()[self.colors.index(0)]
+            except ValueError:
+                return None
+        for item in self.vertices.items():
+            if item[1].color == 0:
+                return item
+        return None
+
+    @solver
+    def solve_dsatur_backtracking(self, propagate=False, stats=None, budget=None):
+        self.nodes_visited = 0
+        if not self.is_valid_coloring():
+            return False  # Givens already in conflict: no search can fix them
+        if propagate and self._propagation_pass(stats) is None:
+            return False
+        return self._dsatur_backtracking(stats, budget)
+
+    def _uncolored_vertices(self):
+        if self.compact:
+            # Read the flat buffer instead of one VertexView property per cell
+            return [view for color, (_, view) in zip(self.colors, self.vertices.items()) if not color]
+        return [v for v in self.vertices.values() if v.color == 0]
+
+    def _dsatur_backtracking(self, stats=None, budget=None, depth=0):
         
         # --- Parte 1: Encontrar o próximo vértice para colorir usando a lógica DSATUR ---
+        if stats is not None:
+            select_start = time.perf_counter()
         
         # Encontra todos os vértices não coloridos
-        uncolored_vertices = [v for v in self.vertices.values() if v.color == 0]
+        uncolored_vertices = self._uncolored_vertices()
 
         # Caso base da recursão: se não há vértices para colorir, o puzzle está resolvido!
         if not uncolored_vertices:
+            if stats is not None:
+                stats.select_time += time.perf_counter() - select_start
             return True
 
         # Lógica de seleção DSATUR para escolher o vértice mais restrito
@@ -115,8 +575,7 @@ class SudokuGraph:
 
         for vertex in uncolored_vertices:
             # Calcula o grau de saturação
-            neighbor_colors = {self.get_vertex(r,c).color for r,c in vertex.neighbors if self.get_vertex(r,c).color != 0}
-            current_saturation = len(neighbor_colors)
+            current_saturation = self._saturation(vertex)
             current_degree = len(vertex.neighbors)
             
             # Aplica critérios de seleção (DSAT, Grau)
@@ -132,7 +591,8 @@ class SudokuGraph:
         # Se todos tiverem a mesma saturação e grau, apenas pega o primeiro
         if best_vertex_to_color is None:
             best_vertex_to_color = uncolored_vertices[0]
-
+        if stats is not None:
+            stats.select_time += time.perf_counter() - select_start
 
         # --- Parte 2: Tentar colorir o vértice escolhido com backtracking ---
         
@@ -140,115 +600,532 @@ class SudokuGraph:
         for color in range(1, self.size + 1):
             
             # Verifica se a cor é válida para a posição atual
-            is_valid_move = True
-            for r, c in best_vertex_to_color.neighbors:
-                if self.get_vertex(r, c).color == color:
-                    is_valid_move = False
-                    break
-            
-            if is_valid_move:
+            if stats is None:
+                valid = self.is_move_valid(best_vertex_to_color.row, best_vertex_to_color.col, color)
+            else:
+                stats.validity_checks += 1
+                check_start = time.perf_counter()
+                valid = self.is_move_valid(best_vertex_to_color.row, best_vertex_to_color.col, color)
+                stats.validate_time += time.perf_counter() - check_start
+
+            if valid:
                 # Se a cor é válida, aplica-a e chama a recursão
                 self.set_color(best_vertex_to_color.row, best_vertex_to_color.col, color)
+                self.nodes_visited += 1
+                if stats is not None:
+                    stats.node(depth + 1)
+                if budget is not None:
+                    budget.charge()
                 
                 # Se a chamada recursiva encontrar uma solução, propaga o sucesso
-                if self.solve_dsatur_backtracking():
+                if self._dsatur_backtracking(stats, budget, depth + 1):
                     return True
                 
                 # Se não, desfaz a jogada (BACKTRACK) e tenta a próxima cor
                 self.set_color(best_vertex_to_color.row, best_vertex_to_color.col, 0)
         
         # Se nenhuma cor funcionou para este vértice, retorna False para a chamada anterior
+        if stats is not None:
+            stats.backtracks += 1
         return False
     
-    def solve_integer_programming(self):
+    def _get_neighbor_lists(self):
+        return self.topology.neighbors
+
+    @solver
+    def solve_dsatur_incremental(self, propagate=False, stats=None, budget=None):
+        """
+        DSATUR iterativo e incremental. A máscara de cores proibidas e a saturação
+        de cada vértice são atualizadas a cada atribuição; os vértices não coloridos
+        ficam em buckets por saturação e cada atribuição registra no trail os
+        vizinhos alterados, que são restaurados no backtrack.
+        """
+        if not self.is_valid_coloring():
+            return False  # Givens already in conflict: no search can fix them
+        if propagate and self._propagation_pass(stats) is None:
+            return False
+        size = self.size
+        cells = size * size
+        full_mask = self.full_mask
+        neighbors = self._get_neighbor_lists()
+
+        colors = [0] * cells
+        for (row, col), vertex in self.vertices.items():
+            colors[row * size + col] = vertex.color
+        empty_cells = [i for i in range(cells) if colors[i] == 0]
+
+        forbidden = [0] * cells  # colors used by the neighbors of each uncolored cell
+        saturation = [0] * cells
+        buckets = [set() for _ in range(size + 1)]
+        for i in empty_cells:
+            row, col = divmod(i, size)
+            mask = self.row_masks[row] | self.col_masks[col] | self.block_masks[self.cell_blocks[i]]
+            forbidden[i] = mask
+            saturation[i] = mask.bit_count()
+            buckets[saturation[i]].add(i)
+
+        uncolored = len(empty_cells)
+        trail = []  # neighbors whose saturation went up, in assignment order
+        stack = []  # [cell, candidates not tried yet, trail length before its assignment]
+        nodes = 0
+
+        while uncolored:
+            # Seleção DSATUR: vértice não colorido com maior saturação
+            if stats is not None:
+                select_start = time.perf_counter()
+            level = size
+            while not buckets[level]:
+                level -= 1
+            cell = next(iter(buckets[level]))
+            if stats is not None:
+                stats.select_time += time.perf_counter() - select_start
+            buckets[level].discard(cell)
+            uncolored -= 1
+            stack.append([cell, full_mask & ~forbidden[cell], len(trail)])
+
+            while stack:
+                frame = stack[-1]
+                cell, candidates, mark = frame
+
+                if colors[cell]:
+                    # Desfaz a cor anterior deste vértice (BACKTRACK)
+                    bit = 1 << colors[cell]
+                    while len(trail) > mark:
+                        n = trail.pop()
+                        level = saturation[n]
+                        buckets[level].discard(n)
+                        forbidden[n] &= ~bit
+                        saturation[n] = level - 1
+                        buckets[level - 1].add(n)
+                    colors[cell] = 0
+
+                if not candidates:
+                    stack.pop()
+                    buckets[saturation[cell]].add(cell)
+                    uncolored += 1
+                    if stats is not None:
+                        stats.backtracks += 1
+                    continue
+
+                bit = candidates & -candidates
+                frame[1] = candidates ^ bit
+                colors[cell] = bit.bit_length() - 1
+                nodes += 1
+                if stats is not None:
+                    stats.node(len(stack))
+                if budget is not None:
+                    budget.charge()
+                for n in neighbors[cell]:
+                    if colors[n] == 0 and not forbidden[n] & bit:
+                        level = saturation[n]
+                        buckets[level].discard(n)
+                        forbidden[n] |= bit
+                        saturation[n] = level + 1
+                        buckets[level + 1].add(n)
+                        trail.append(n)
+                break
+            else:
+                self.nodes_visited = nodes
+                return False
+
+        self.nodes_visited = nodes
+        for i in empty_cells:
+            self.set_color(i // size, i % size, colors[i])
+        return True
+
+    def _get_exact_cover(self):
+        """Exact cover matrix with the same constraints as solve_integer_programming:
+        one color per cell, and each color once per row, column and block.
+        Row (r, c, v) of the matrix has id (r * size + c) * size + (v - 1)."""
+        if self._exact_cover is None:
+            size = self.size
+            cells = size * size
+            rows = []
+            for row in range(size):
+                for col in range(size):
+                    block = self._get_block_number(row, col)
+                    for v in range(size):
+                        rows.append((row * size + col,
+                                     cells + row * size + v,
+                                     2 * cells + col * size + v,
+                                     3 * cells + block * size + v))
+            self._exact_cover = DancingLinks(4 * cells, rows)
+        return self._exact_cover
+
+    @solver
+    def solve_dancing_links(self, stats=None, budget=None):
+        """
+        Resolve o Sudoku como um problema de cobertura exata (Algorithm X de Knuth
+        com dancing links). As células bloqueadas são fixadas antes da busca, como
+        no modelo de solve_integer_programming.
+        """
+        dlx = self._get_exact_cover()
+        try:
+            for (row, col), vertex in self.vertices.items():
+                if vertex.locked and vertex.color != 0:
+                    if not dlx.select((row * self.size + col) * self.size + vertex.color - 1):
+                        return False  # Givens conflict with each other
+            solutions = dlx.search(limit=1, stats=stats, budget=budget)
+        finally:
+            dlx.restore()
+
+        if not solutions:
+            return False
+        for row_id in solutions[0]:
+            cell, color = divmod(row_id, self.size)
+            self.set_color(cell // self.size, cell % self.size, color + 1)
+        return True
+
+    @solver(reports_progress=_SAT_REPORTS_PROGRESS)
+    def solve_sat(self, propagate=False, stats=None, budget=None):
+        """
+        Resolve o Sudoku codificado em CNF (ver sat.py), com as mesmas restrições
+        do modelo PLI. As células bloqueadas (e, com propagate=True, as resolvidas
+        pela propagação) entram como cláusulas unitárias. Usa o pysat quando está
+        instalado e, senão, o resolvedor CDCL próprio, sem processo externo.
+        """
+        from sat import encode, solve_cnf
+
+        candidates = None
+        if propagate:
+            candidates = self._propagation_pass(stats)
+            if candidates is None:
+                return False
+        cnf = encode(self, candidates)
+        if cnf is None:
+            return False  # Alguma célula ou unidade ficou sem candidatos
+        model = solve_cnf(cnf, budget, stats)
+        if model is None:
+            return False
+
+        size = self.size
+        for (row, col), vertex in self.vertices.items():
+            if not vertex.locked:
+                first = (row * size + col) * size
+                for color in range(1, size + 1):
+                    if model[first + color]:
+                        self.set_color(row, col, color)
+                        break
+        return True
+
+    @solver
+    def solve_local_search(self, propagate=True, max_restarts=10, seed=None, stats=None, budget=None):
+        """
+        Busca local por recozimento simulado (ver local_search.py): cada bloco é uma
+        permutação das cores que faltam às células bloqueadas e os movimentos trocam
+        duas células livres de um bloco. Heurística para tabuleiros grandes: pode
+        encontrar a solução, mas retorna False sem provar que ela não existe. Use
+        time_limit para limitar a busca; o número de conflitos ao longo do tempo
+        fica em self.local_search_history.
+        """
+        from local_search import Annealer
+
+        self.local_search_history = []
+        if propagate:
+            candidates = self._propagation_pass(stats)
+            if candidates is None:
+                return False
+        else:
+            candidates = self._locked_candidates()
+        if any(mask == 0 for mask in candidates):
+            return False
+
+        annealer = Annealer(self.topology, candidates, random.Random(seed))
+        try:
+            colors = annealer.run(max_restarts, budget, stats)
+        finally:
+            self.local_search_history = annealer.history
+            if stats is not None:
+                stats.details["restarts"] = annealer.restarts
+                stats.details["conflict_history"] = annealer.history
+        if colors is None:
+            return False
+        for (row, col), vertex in self.vertices.items():
+            if not vertex.locked:
+                self.set_color(row, col, colors[row * self.size + col])
+        return True
+
+    @solver(reports_progress=False)
+    def solve_portfolio(self, solvers=None, selector=None, stats=None, budget=None):
+        """
+        Portfólio de solvers (ver portfolio.py). Sem seletor, roda os solvers (padrão:
+        todos os completos) em paralelo, um processo cada, e fica com a primeira
+        resposta, encerrando os outros. Com selector (um portfolio.SolverSelector ou o
+        caminho de um seletor salvo), escolhe pelas características do tabuleiro o
+        solver previsto como mais rápido e roda só ele, neste processo.
+        """
+        from portfolio import get_selector, portfolio_solvers, race
+
+        solvers = list(solvers or portfolio_solvers(self))
+        if selector is not None:
+            if isinstance(selector, str):
+                selector = get_selector(selector)
+            method_name = selector.select(self, solvers)
+            if stats is not None:
+                stats.details["selected"] = method_name
+            # The undecorated method: budget and stats are already in place
+            return getattr(type(self), method_name).__wrapped__(self, stats=stats, budget=budget)
+
+        winner, status, colors, results = race(self, solvers, budget)
+        if stats is not None:
+            stats.details["winner"] = winner
+            stats.details["race"] = results
+        if status != "solved":
+            return False
+        for (row, col), vertex in self.vertices.items():
+            if not vertex.locked:
+                self.set_color(row, col, colors[row * self.size + col])
+        return True
+
+    def _get_ilp_model(self):
+        """Structural ILP model for this dimension, built once and shared by every graph."""
+        import pulp
+
+        model = _ILP_MODELS.get(self.dimension)
+        if model is None:
+            size = self.size
+            # 1. Criação do Problema
+            prob = pulp.LpProblem("Sudoku_Solver_ILP", pulp.LpMinimize)
+
+            # 2. Definição da Função Objetivo (trivial)
+            prob += pulp.lpSum(0)
+
+            # 3. Definição das Variáveis
+            choices = {(v, r, c): pulp.LpVariable(f"Choice_{v}_{r}_{c}", cat='Binary')
+                       for v in range(1, size + 1) for r in range(size) for c in range(size)}
+
+            # 4. Definição das Restrições
+            # a) Cada célula tem um número
+            for r in range(size):
+                for c in range(size):
+                    prob += pulp.lpSum([choices[(v, r, c)] for v in range(1, size + 1)]) == 1
+
+            # b), c), d) Cada linha, coluna e bloco tem cada número
+            for unit in self.row_units + self.col_units + self.block_units:
+                for v in range(1, size + 1):
+                    prob += pulp.lpSum([choices[(v, cell // size, cell % size)] for cell in unit]) == 1
+
+            # As células fixas de cada tabuleiro entram como limites das variáveis
+            model = _ILP_MODELS.setdefault(self.dimension, (prob, choices, threading.Lock()))
+        return model
+
+    @solver(cancellable=False, reports_progress=False)
+    def solve_integer_programming(self, propagate=False, stats=None, budget=None):
         """
         Resolve o Sudoku modelando-o como um problema de Programação Linear Inteira (PLI)
         e usando a biblioteca PuLP para encontrar a solução.
-        (Versão Corrigida para preservar os números bloqueados)
+        O modelo estrutural é construído uma vez por dimensão; a cada chamada só os
+        limites das variáveis mudam. As células bloqueadas (e, com propagate=True,
+        as resolvidas pela propagação) têm suas variáveis fixadas, assim como os
+        candidatos eliminados, e o pré-processamento do CBC as remove do problema.
+        Os tempos de cada etapa ficam em self.ilp_timings.
         """
-        
-        # 1. Criação do Problema
-        prob = pulp.LpProblem("Sudoku_Solver_ILP", pulp.LpMinimize)
+        start = time.perf_counter()
+        built = self.dimension not in _ILP_MODELS
+        prob, choices, lock = self._get_ilp_model()
+        build_time = time.perf_counter() - start if built else 0.0
 
-        # 2. Definição da Função Objetivo (trivial)
-        prob += pulp.lpSum(0)
+        if propagate:
+            candidates = self._propagation_pass(stats)
+            if candidates is None:
+                return False
+        else:
+            candidates = [1 << v.color if v.locked and v.color != 0 else self.full_mask
+                          for v in self.vertices.values()]
 
-        # 3. Definição das Variáveis
-        choices = pulp.LpVariable.dicts("Choice", (range(1, self.size + 1), range(self.size), range(self.size)), cat='Binary')
+        with lock:
+            solved = self._solve_ilp(prob, choices, candidates, build_time, budget)
+        if stats is not None:
+            stats.details.update(self.ilp_timings)
+            stats.details["ilp_variables"] = self.ilp_model_size[0]
+        return solved
 
-        # 4. Definição das Restrições (iguais a antes)
-        # a) Cada célula tem um número
-        for r in range(self.size):
-            for c in range(self.size):
-                prob += pulp.lpSum([choices[v][r][c] for v in range(1, self.size + 1)]) == 1
-        
-        # b) Cada linha tem cada número
-        for v in range(1, self.size + 1):
-            for r in range(self.size):
-                prob += pulp.lpSum([choices[v][r][c] for c in range(self.size)]) == 1
-        
-        # c) Cada coluna tem cada número
-        for v in range(1, self.size + 1):
-            for c in range(self.size):
-                prob += pulp.lpSum([choices[v][r][c] for r in range(self.size)]) == 1
-
-        # d) Cada bloco tem cada número
-        for v in range(1, self.size + 1):
-            for br in range(self.dimension):
-                for bc in range(self.dimension):
-                    prob += pulp.lpSum([choices[v][r][c] 
-                                        for r in range(br * self.dimension, (br + 1) * self.dimension) 
-                                        for c in range(bc * self.dimension, (bc + 1) * self.dimension)]) == 1
-
-        # e) Restrições dos números iniciais
-        for (r, c), vertex in self.vertices.items():
-            if vertex.locked and vertex.color != 0:
-                prob += choices[vertex.color][r][c] == 1
-        
-        # 5. Resolução do Problema
+    def _solve_ilp(self, prob, choices, candidates, build_time, budget=None):
+        import pulp
+
+        size = self.size
+        # Fixa as variáveis das células resolvidas e dos candidatos eliminados
+        start = time.perf_counter()
+        free_cells = []
+        free_variables = 0
+        for cell, mask in enumerate(candidates):
+            r, c = divmod(cell, size)
+            is_fixed = not mask & (mask - 1)
+            if not is_fixed:
+                free_cells.append(cell)
+            for v in range(1, size + 1):
+                variable = choices[(v, r, c)]
+                if mask >> v & 1:
+                    variable.lowBound = 1 if is_fixed else 0
+                    variable.upBound = 1
+                    free_variables += not is_fixed
+                else:
+                    variable.lowBound = 0
+                    variable.upBound = 0
+        self.ilp_model_size = (free_variables, len(prob.constraints))
+        bounds_time = time.perf_counter() - start
+        self.ilp_timings = {"build": build_time, "bounds": bounds_time, "solve": 0.0, "extract": 0.0}
+        if not free_cells:
+            # Tabuleiro todo fixado: só é solução se nenhuma unidade repete uma cor
+            for unit in self.row_units + self.col_units + self.block_units:
+                seen = 0
+                for cell in unit:
+                    if seen & candidates[cell]:
+                        return False
+                    seen |= candidates[cell]
+            return True
+
+        # 5. Resolução do Problema (o orçamento restante vira timeLimit/maxNodes do CBC)
+        time_limit = max_nodes = None
+        if budget is not None:
+            budget.check()
+            time_limit = budget.remaining()
+            if budget.max_nodes is not None:
+                max_nodes = max(0, budget.max_nodes - budget.nodes)
+        start = time.perf_counter()
         try:
-            prob.solve(pulp.PULP_CBC_CMD(msg=False))
+            prob.solve(pulp.PULP_CBC_CMD(msg=False, timeLimit=time_limit, maxNodes=max_nodes))
         except pulp.PulpSolverError:
             print("Erro: PuLP não encontrou um resolvedor. Verifique a instalação.")
             return False
+        finally:
+            self.ilp_timings["solve"] = time.perf_counter() - start
 
-        # 6. Atualização do Tabuleiro com a Solução (LÓGICA CORRIGIDA)
-        if pulp.LpStatus[prob.status] == 'Optimal':
-            for r in range(self.size):
-                for c in range(self.size):
-                    # Apenas atualiza a cor se a célula NÃO estiver bloqueada
-                    if not self.get_vertex(r, c).locked:
-                        for v in range(1, self.size + 1):
-                            if pulp.value(choices[v][r][c]) == 1:
-                                # Chama set_color sem o argumento locked, que será False por padrão
-                                self.set_color(r, c, v)
-                                break # Passa para a próxima célula
-            return True
-        else:
+        # 6. Atualização do Tabuleiro com a Solução
+        if pulp.LpStatus[prob.status] != 'Optimal':
+            if budget is not None and pulp.LpStatus[prob.status] == 'Not Solved':
+                raise BudgetExceeded(TIMED_OUT)  # o CBC parou no limite de tempo ou de nós
             return False
+        start = time.perf_counter()
+        for cell in free_cells:
+            r, c = divmod(cell, size)
+            for v in range(1, size + 1):
+                if choices[(v, r, c)].varValue > 0.5:
+                    # Chama set_color sem o argumento locked, que será False por padrão
+                    self.set_color(r, c, v)
+                    break
+        self.ilp_timings["extract"] = time.perf_counter() - start
+        return True
+
+    def count_solutions(self, limit=2, method="dancing_links"):
+        """
+        Conta as soluções do tabuleiro atual (toda célula preenchida conta como
+        dada), parando ao chegar em limit; count_solutions() == 1 indica solução
+        única. O tabuleiro não é alterado. method="dancing_links" reaproveita a
+        matriz de cobertura exata do grafo; method="integer_programming" resolve o
+        modelo PLI e, a cada solução, acrescenta um corte no-good que a exclui.
+        """
+        if not self.is_valid_coloring():
+            return 0  # As dadas já se contradizem
+        if method == "integer_programming":
+            return self._count_ilp_solutions(limit)
+        if method != "dancing_links":
+            raise ValueError(f"Método de contagem desconhecido: {method}")
+
+        dlx = self._get_exact_cover()
+        try:
+            for (row, col), vertex in self.vertices.items():
+                if vertex.color != 0:
+                    if not dlx.select((row * self.size + col) * self.size + vertex.color - 1):
+                        return 0
+            return len(dlx.search(limit=limit))
+        finally:
+            dlx.restore()
+
+    def has_unique_solution(self):
+        return self.count_solutions(limit=2) == 1
+
+    def _count_ilp_solutions(self, limit):
+        import pulp
 
+        size = self.size
+        puzzle = self.get_colors()
+        free_cells = [i for i, color in enumerate(puzzle) if color == 0]
+        if not free_cells:
+            return 1
+        candidates = [1 << color if color else self.full_mask for color in puzzle]
+        prob, choices, lock = self._get_ilp_model()
 
+        count = 0
+        cuts = []
+        with lock:
+            try:
+                while count < limit and self._solve_ilp(prob, choices, candidates, 0.0):
+                    count += 1
+                    solution = self.get_colors()
+                    for cell in free_cells:
+                        self.set_color(cell // size, cell % size, 0)
+                    # Corte no-good: ao menos uma célula livre precisa mudar de cor
+                    name = f"no_good_{len(cuts)}"
+                    prob += pulp.lpSum(choices[(solution[cell], cell // size, cell % size)]
+                                       for cell in free_cells) <= len(free_cells) - 1, name
+                    cuts.append(name)
+            finally:
+                # O modelo é compartilhado: remove os cortes antes de devolvê-lo
+                for name in cuts:
+                    del prob.constraints[name]
+        return count
 
     def print_graph(self):
         for key, vertex in self.vertices.items():
             print(f"{key}: color={vertex.color}, neighbors={len(vertex.neighbors)}")
 
     def clear_board(self):
-        for vertex in self.vertices.values():
-            vertex.color = 0
-            vertex.locked = False
+        if self.compact:
+            cells = self.size * self.size
+            self.colors = array("H", bytes(2 * cells))
+            self.locks = bytearray(cells)
+        else:
+            for vertex in self.vertices.values():
+                vertex.color = 0
+                vertex.locked = False
+        self._reset_constraint_state()
+
+    def get_colors(self):
+        """Colors of all cells in row-major order (cell id order), 0 for empty cells."""
+        if self.compact:
+            return self.colors.tolist()
+        return [vertex.color for vertex in self.vertices.values()]
+
+    def symbol_for(self, color):
+        """Single-character symbol of a color (1-9, then A-Z), '0' for empty cells."""
+        return SYMBOLS[color] if color else "0"
+
+    def color_for(self, symbol):
+        """Color of a symbol written by symbol_for, 0 for '0'/'.', None if unknown."""
+        if symbol in ("0", "."):
+            return 0
+        color = SYMBOLS.find(symbol.upper())
+        return color if color > 0 else None
+
+    def to_string(self):
+        """Inverse of load_from_string: one symbol per cell in row-major order, or
+        comma-separated numbers when the board has more colors than symbols."""
+        colors = self.get_colors()
+        if self.size < len(SYMBOLS):
+            return "".join(self.symbol_for(color) for color in colors)
+        return ",".join(map(str, colors))
 
     def load_from_string(self, puzzle_string):
-        if len(puzzle_string) != self.size ** 2:
-            raise ValueError(f"A string do puzzle deve ter {self.size**2} caracteres.")
-        
+        """Loads the givens of a puzzle, as one symbol per cell (1-9 then A-Z, '0' or '.'
+        for empty cells) or as numbers separated by commas, semicolons or whitespace."""
+        puzzle_string = puzzle_string.strip()
+        if SEPARATORS.search(puzzle_string):
+            tokens = SEPARATORS.split(puzzle_string)
+            if len(tokens) != self.size ** 2:
+                raise ValueError(f"O puzzle deve ter {self.size**2} números.")
+            values = [int(token) if token.isdigit() else 0 for token in tokens]
+        else:
+            if len(puzzle_string) != self.size ** 2:
+                raise ValueError(f"A string do puzzle deve ter {self.size**2} caracteres.")
+            values = [self.color_for(char) or 0 for char in puzzle_string]
+
         self.clear_board()
-        
-        for i, char in enumerate(puzzle_string):
-            if '1' <= char <= '9':
+
+        for i, value in enumerate(values):
+            if value:
                 row = i // self.size
                 col = i % self.size
-                value = int(char)
-                self.set_color(row, col, value, locked=True)        
+                self.set_color(row, col, value, locked=True)
 
 
@@ -1,7 +1,16 @@
+import queue
+import threading
 import time
 import tkinter as tk
 from tkinter import ttk
-from puzzles import PUZZLES, get_puzzle
+from budget import CANCELLED, TIMED_OUT, CancelToken
+from instrumentation import SolverStats
+from generator import PuzzlePool
+from puzzles import PUZZLES
+
+POLL_INTERVAL = 50  # ms entre leituras da fila do solver
+PROGRESS_INTERVAL = 0.1  # s mínimos entre dois instantâneos de progresso
+GENERATOR_WORKERS = 2  # processos do gerador: poucos puzzles a repor, não um por núcleo
 
 class Window:
     def __init__(self, sudoku_graph):
@@ -11,7 +20,15 @@ class Window:
         self.root = tk.Tk()
         self.root.title("Sudoku Viewer")
         self.entries = {}
+        self.entry_cells = {}  # Entry -> (row, col)
         self.edit = False
+        self._shown = {}  # (row, col) -> (texto, bloqueada, válida) desenhado em cada Entry
+        self._solver_thread = None
+        self._solver_queue = queue.Queue()
+        self._cancel_token = None
+        self._solving_name = None
+        # Puzzles novos são gerados em segundo plano; "Novo Jogo" só retira do buffer
+        self.puzzle_pool = PuzzlePool(self.dimension, workers=GENERATOR_WORKERS)
 
         self._build_interface()
         self._on_new_game()  
@@ -32,7 +49,8 @@ class Window:
         self.difficulty_var.set("Facil")
         difficulty_combo.pack(fill='x', pady=(0, 10))
         
-        ttk.Button(side_panel, text="Novo Jogo", command=self._on_new_game).pack(fill='x', pady=5)
+        self.new_game_button = ttk.Button(side_panel, text="Novo Jogo", command=self._on_new_game)
+        self.new_game_button.pack(fill='x', pady=5)
         
         ttk.Separator(side_panel, orient='horizontal').pack(fill='x', pady=10)
 
@@ -48,10 +66,14 @@ class Window:
             self.solver_var.set(solver_display_names[-1]) 
         solver_combo.pack(fill='x', pady=(0, 10))
 
-        ttk.Button(side_panel, text="Solve", command=self._on_solve).pack(fill='x', pady=5)
+        self.solve_button = ttk.Button(side_panel, text="Solve", command=self._on_solve)
+        self.solve_button.pack(fill='x', pady=5)
+        self.cancel_button = ttk.Button(side_panel, text="Cancel", command=self._on_cancel, state='disabled')
+        self.cancel_button.pack(fill='x', pady=5)
         self.edit_button = ttk.Button(side_panel, text="Edit", command=self._on_toggle_edit)
         self.edit_button.pack(fill='x', pady=5)
-        ttk.Button(side_panel, text="Clear", command=self._on_clear).pack(fill='x', pady=5)
+        self.clear_button = ttk.Button(side_panel, text="Clear", command=self._on_clear)
+        self.clear_button.pack(fill='x', pady=5)
 
         self.status_label = ttk.Label(side_panel, text="", wraplength=180, anchor="center", justify="center")
         self.status_label.pack(fill='x', pady=10)
@@ -62,7 +84,6 @@ class Window:
                 entry = tk.Entry(parent, width=2, font=('Arial', 18), justify='center')
                 entry.grid(row=row, column=col, padx=1, pady=1, ipadx=5, ipady=5)
                 
-                entry.bind("<FocusIn>", self._on_focus)
                 entry.bind("<Key>", lambda e, ent=entry: self._on_keypress(e, ent))
                 
                 padx, pady = (1, 1), (1, 1)
@@ -71,12 +92,10 @@ class Window:
                 entry.grid_configure(padx=padx, pady=pady)
                 
                 self.entries[(row, col)] = entry
-
-    def _on_focus(self, event):
-        event.widget._typed = False
+                self.entry_cells[entry] = (row, col)
 
     def _on_keypress(self, event, entry):
-        if entry['state'] == 'disabled':
+        if entry['state'] == 'disabled' or self._solver_thread is not None:
             return "break"
 
         if event.keysym == 'BackSpace':
@@ -84,20 +103,19 @@ class Window:
             self._update_graph_from_entry(entry)
             return "break"
         
-        if not event.char.isdigit() or event.char == '0':
+        # Um símbolo por célula: 1-9 e, em tabuleiros maiores, letras (A = 10, ...)
+        color = self.graph.color_for(event.char) if event.char else None
+        if not color or color > self.size:
             return "break"
 
-        if not getattr(entry, '_typed', False):
-            entry.delete(0, tk.END)
-            entry._typed = True
-
-        entry.insert(tk.END, event.char)
+        entry.delete(0, tk.END)
+        entry.insert(tk.END, self.graph.symbol_for(color))
         self._update_graph_from_entry(entry)
         return "break"
 
     def _on_new_game(self):
         difficulty = self.difficulty_var.get().lower()
-        puzzle_string = get_puzzle(difficulty)
+        puzzle_string = self.puzzle_pool.get(difficulty)
         self.graph.load_from_string(puzzle_string)
         self._update_grid_from_graph()
         self.status_label.config(text=f"Novo jogo {difficulty.capitalize()} carregado.")
@@ -110,18 +128,93 @@ class Window:
         if not callable(solver_func):
             self.status_label.config(text=f"Erro: Solver '{method_name}' não encontrado.")
             return
+        if self._solver_thread is not None:
+            return
+
+        # O solver roda numa thread; o tabuleiro fica bloqueado para edição até ele
+        # terminar e a thread só se comunica com a interface pela fila. Cancelar e o
+        # progresso só ficam ativos nos solvers que os atendem (ver solver em SudokuGraph)
+        cancellable = getattr(solver_func, 'cancellable', True)
+        reports_progress = getattr(solver_func, 'reports_progress', True)
+        self._cancel_token = CancelToken() if cancellable else None
+        self._solving_name = display_name
+        self._set_solving(True, cancellable)
+        note = "" if reports_progress else " (sem progresso)" if cancellable else " (sem progresso nem cancelamento)"
+        self.status_label.config(text=f"'{display_name}'\nresolvendo...{note}")
+        self._solver_thread = threading.Thread(target=self._run_solver,
+                                               args=(solver_func, display_name, reports_progress), daemon=True)
+        self._solver_thread.start()
+        self.root.after(POLL_INTERVAL, self._poll_solver)
+
+    def _run_solver(self, solver_func, display_name, reports_progress):
+        last_post = time.perf_counter()
+
+        def progress(stats):
+            nonlocal last_post
+            now = time.perf_counter()
+            if now - last_post >= PROGRESS_INTERVAL:
+                last_post = now
+                self._solver_queue.put(("progress", self.graph.get_colors(), stats.nodes))
 
+        stats = SolverStats(callback=progress, callback_interval=500) if reports_progress else SolverStats()
         start_time = time.time()
-        solved = solver_func()
-        elapsed = time.time() - start_time
+        try:
+            result = solver_func(stats=stats, cancel=self._cancel_token)
+        except Exception as error:  # a interface deve sobreviver a qualquer falha do solver
+            self._solver_queue.put(("error", display_name, error))
+            return
+        self._solver_queue.put(("done", display_name, result, time.time() - start_time, stats))
+
+    def _poll_solver(self):
+        colors = None
+        nodes = 0
+        finished = None
+        while True:
+            try:
+                message = self._solver_queue.get_nowait()
+            except queue.Empty:
+                break
+            if message[0] == "progress":
+                _, colors, nodes = message  # só o instantâneo mais recente interessa
+            else:
+                finished = message
 
-        if solved:
-            self.status_label.config(text=f"'{display_name}'\nresolvido em {elapsed:.4f} sec.")
+        if finished is None:
+            if colors is not None:
+                self._update_grid_from_colors(colors)
+                self.status_label.config(text=f"'{self._solving_name}'\nresolvendo... {nodes} nós")
+            self.root.after(POLL_INTERVAL, self._poll_solver)
+            return
+
+        self._solver_thread.join()
+        self._solver_thread = None
+        self._set_solving(False)
+        if finished[0] == "error":
+            _, display_name, error = finished
+            self.status_label.config(text=f"'{display_name}' falhou com erro:\n{error}")
         else:
-            self.status_label.config(text=f"'{display_name}' falhou.\nTempo: {elapsed:.4f} sec.")
-        
+            _, display_name, solved, elapsed, stats = finished
+            if solved:
+                self.status_label.config(text=f"'{display_name}'\nresolvido em {elapsed:.4f} sec.\n{stats.summary()}")
+            elif solved is CANCELLED:
+                self.status_label.config(text=f"'{display_name}' cancelado.\nTempo: {elapsed:.4f} sec.")
+            elif solved is TIMED_OUT:
+                self.status_label.config(text=f"'{display_name}': tempo esgotado.\nTempo: {elapsed:.4f} sec.")
+            else:
+                self.status_label.config(text=f"'{display_name}' falhou.\nTempo: {elapsed:.4f} sec.\n{stats.summary()}")
         self._update_grid_from_graph()
 
+    def _on_cancel(self):
+        if self._cancel_token is not None:
+            self._cancel_token.cancel()
+            self.status_label.config(text="Cancelando...")
+
+    def _set_solving(self, solving, cancellable=True):
+        state = 'disabled' if solving else 'normal'
+        for button in (self.solve_button, self.new_game_button, self.clear_button, self.edit_button):
+            button.config(state=state)
+        self.cancel_button.config(state='normal' if solving and cancellable else 'disabled')
+
     def _on_clear(self):
         for (row, col), vertex in self.graph.vertices.items():
             if not vertex.locked:
@@ -130,46 +223,67 @@ class Window:
         self.status_label.config(text="Células do usuário limpas.")
 
     def _on_toggle_edit(self):
+        if self.edit:
+            # Save: o puzzle digitado só é aceito se tiver exatamente uma solução
+            count = self.graph.count_solutions(limit=2)
+            if count != 1:
+                problem = "não tem solução" if count == 0 else "tem mais de uma solução"
+                self.status_label.config(text=f"O puzzle {problem}.\nContinue editando.")
+                return
+            for (row, col), vertex in self.graph.vertices.items():
+                if vertex.color != 0:
+                    self.graph.set_color(row, col, vertex.color, locked=True)
+            self._update_grid_from_graph()
+            self.status_label.config(text="Puzzle salvo: solução única.")
         self.edit = not self.edit
         self.edit_button.config(text="Save" if self.edit else "Edit")
 
     def _update_graph_from_entry(self, entry):
-        for (row, col), e in self.entries.items():
-            if e == entry:
-                text = entry.get().strip()
-                val = int(text) if text.isdigit() else 0
-                
-                self.graph.set_color(row, col, val)
-                
-                if val != 0 and not self.graph.is_cell_valid(row, col):
-                    entry.config(fg="red")
-                else:
-                    entry.config(fg="blue")
-                break
+        row, col = self.entry_cells[entry]
+        text = entry.get().strip()
+        val = (self.graph.color_for(text) or 0) if len(text) == 1 else 0
+        self.graph.set_color(row, col, val)
 
-    def _update_grid_from_graph(self):
-        for (row, col), entry in self.entries.items():
-            vertex = self.graph.get_vertex(row, col)
+        # A edição pode criar ou desfazer conflitos com os vizinhos: só essas células são redesenhadas
+        changed = self.graph.pop_conflict_changes()
+        changed.add(row * self.size + col)
+        conflicts = self.graph.conflicts
+        for index in changed:
+            r, c = divmod(index, self.size)
+            vertex = self.graph.get_vertex(r, c)
+            self._draw_cell(r, c, vertex.color, vertex.locked, index not in conflicts)
 
-            entry.config(state='normal')
+    def _update_grid_from_graph(self):
+        self.graph.pop_conflict_changes()  # o redesenho abaixo já considera todos os conflitos
+        self._update_grid_from_colors(self.graph.get_colors(), self.graph.conflicts)
 
-            entry.delete(0, tk.END)
-            if vertex.color != 0:
-                entry.insert(0, str(vertex.color))
+    def _update_grid_from_colors(self, colors, conflicts=()):
+        """Redesenha só as Entry cujo texto, bloqueio ou validade mudou."""
+        size = self.size
+        for row, col in self.entries:
+            index = row * size + col
+            self._draw_cell(row, col, colors[index], self.graph.get_vertex(row, col).locked,
+                            index not in conflicts)
+        self.root.update_idletasks()
 
-            if vertex.locked:
-                entry.config(fg='black', state='disabled', disabledbackground="#D3D3D3", disabledforeground='black')
-            else:
-                if vertex.color == 0:
-                    entry.config(fg='blue')
-                else:
-                    if self.graph.is_cell_valid(row, col):
-                        entry.config(fg='blue')
-                    else:
-                        entry.config(fg='red')
+    def _draw_cell(self, row, col, color, locked, valid):
+        state = (self.graph.symbol_for(color) if color else "", locked, valid or locked)
+        if self._shown.get((row, col)) == state:
+            return
+        self._shown[(row, col)] = state
 
-        self.root.update_idletasks()
+        entry = self.entries[(row, col)]
+        entry.config(state='normal')
+        entry.delete(0, tk.END)
+        entry.insert(0, state[0])
+        if locked:
+            entry.config(fg='black', state='disabled', disabledbackground="#D3D3D3", disabledforeground='black')
+        else:
+            entry.config(fg='blue' if state[2] else 'red')
 
     def run(self):
         """Inicia o loop principal da aplicação tkinter."""
-        self.root.mainloop()
\ No newline at end of file
+        try:
+            self.root.mainloop()
+        finally:
+            self.puzzle_pool.close()
\ No newline at end of file
@@ -0,0 +1,116 @@
+"""Solves many puzzles at once, spread over a pool of worker processes.
+
+Each worker builds its SudokuGraph once (in the pool initializer) and reuses
+it for every board it receives, so the only per-board cost is loading the
+puzzle and running the solver.
+"""
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+
+from budget import TIMED_OUT
+from SudokuGraph import SudokuGraph
+
+# index: position in the input; solution: solved board string, or None
+BatchResult = namedtuple("BatchResult", ["index", "puzzle", "solution", "solved", "elapsed", "error"])
+
+TIMEOUT_ERROR = "timeout"  # error of a board that ran out of its time limit
+
+_worker_graph = None
+
+
+def check_solver(solver_name, dimension=3):
+    """Raises ValueError unless solver_name is one of the graph's solve_ methods."""
+    names = [name for _, name in SudokuGraph(dimension).get_solver_options()]
+    if solver_name not in names:
+        raise ValueError(f"Solver desconhecido '{solver_name}'. Opções: {', '.join(names)}")
+
+
+def solve_one(graph, index, puzzle, solver_name, time_limit=None):
+    try:
+        graph.load_from_string(puzzle)
+    except ValueError as error:
+        return BatchResult(index, puzzle, None, False, 0.0, str(error))
+    start = time.perf_counter()
+    try:
+        result = getattr(graph, solver_name)(time_limit=time_limit)
+    except Exception as error:  # a solver bug or a missing back-end only fails this board
+        return BatchResult(index, puzzle, None, False, time.perf_counter() - start, f"{type(error).__name__}: {error}")
+    elapsed = time.perf_counter() - start
+    solved = result is True
+    solution = graph.to_string() if solved else None
+    return BatchResult(index, puzzle, solution, solved, elapsed, TIMEOUT_ERROR if result is TIMED_OUT else None)
+
+
+def _init_worker(dimension):
+    global _worker_graph
+    _worker_graph = SudokuGraph(dimension)
+
+
+def _solve_chunk(chunk, solver_name, time_limit):
+    return [solve_one(_worker_graph, index, puzzle, solver_name, time_limit) for index, puzzle in chunk]
+
+
+def _chunks(puzzles, chunksize):
+    numbered = enumerate(puzzles)
+    while True:
+        chunk = list(islice(numbered, chunksize))
+        if not chunk:
+            return
+        yield chunk
+
+
+def solve_batch(puzzles, solver_name="solve_dancing_links", dimension=3, workers=None,
+                chunksize=64, ordered=True, max_pending=None, time_limit=None):
+    """Yields a BatchResult for every puzzle string of the iterable puzzles.
+
+    Puzzles are read lazily and sent to the workers in chunks of chunksize;
+    at most max_pending chunks (default 2 per worker) are in flight or waiting
+    to be yielded, so the input may be arbitrarily long. With ordered=False
+    results come back as soon as their chunk finishes. workers=1 solves in
+    the calling process. time_limit (seconds) bounds each board; boards that
+    run out of it come back unsolved with error TIMEOUT_ERROR.
+    """
+    check_solver(solver_name, dimension)
+    chunks = _chunks(puzzles, chunksize)
+
+    if workers == 1:
+        graph = SudokuGraph(dimension)
+        for chunk in chunks:
+            for index, puzzle in chunk:
+                yield solve_one(graph, index, puzzle, solver_name, time_limit)
+        return
+
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or 2 * workers
+    executor = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(dimension,))
+    try:
+        pending = {}  # future -> chunk sequence number
+        finished_chunks = {}  # results waiting for an earlier chunk (ordered mode)
+        submitted = next_to_yield = 0
+        exhausted = False
+        while True:
+            while not exhausted and len(pending) + len(finished_chunks) < max_pending:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    exhausted = True
+                    break
+                pending[executor.submit(_solve_chunk, chunk, solver_name, time_limit)] = submitted
+                submitted += 1
+            if not pending:
+                break
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                sequence = pending.pop(future)
+                if ordered:
+                    finished_chunks[sequence] = future.result()
+                else:
+                    yield from future.result()
+            while next_to_yield in finished_chunks:
+                yield from finished_chunks.pop(next_to_yield)
+                next_to_yield += 1
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,302 @@
+"""Benchmark harness for the SudokuGraph solvers.
+
+Each (solver, board) pair is first run once in a child process, killed after
+the solver's time limit, so a slow solver can't stall the suite. Pairs that
+finish in time are then measured in-process: warm-up runs, a repetition
+count calibrated to the duration of one solve, garbage collection disabled
+while timing, and median / IQR / bootstrap confidence interval of the
+samples. Results can be written as JSON or CSV and compared to a saved
+baseline to flag regressions.
+
+    python benchmark.py --json results.json --baseline baseline.json
+"""
+import argparse
+import csv
+import gc
+import json
+import math
+import multiprocessing
+import platform
+import random
+import sys
+import time
+
+from budget import TIMED_OUT
+from SudokuGraph import SudokuGraph
+
+FIELDS = ["solver", "board", "difficulty", "empty_cells", "status", "repeats", "median", "q1", "q3",
+          "iqr", "mean", "stdev", "min", "ci_low", "ci_high", "outliers"]
+
+
+class BenchmarkConfig:
+    def __init__(self, warmup=2, target_time=0.5, min_repeats=5, max_repeats=200, timeout=10.0,
+                 timeouts=None, bootstrap=2000, confidence=0.95, seed=0, isolate=True):
+        self.warmup = warmup  # untimed runs before measuring
+        self.target_time = target_time  # seconds of measurement per (solver, board)
+        self.min_repeats = min_repeats
+        self.max_repeats = max_repeats
+        self.timeout = timeout  # default time limit (seconds) of one solve
+        self.timeouts = timeouts or {}  # per-solver time limits
+        self.bootstrap = bootstrap  # resamples for the confidence interval of the median
+        self.confidence = confidence
+        self.seed = seed
+        self.isolate = isolate  # check the time limit in a child process first
+
+    def timeout_for(self, method_name):
+        return self.timeouts.get(method_name, self.timeout)
+
+
+def _solve_in_child(dimension, puzzle, method_name, connection):
+    graph = SudokuGraph(dimension)
+    graph.load_from_string(puzzle)
+    start = time.perf_counter()
+    result = getattr(graph, method_name)()
+    elapsed = time.perf_counter() - start
+    connection.send((result is True and graph.is_valid_coloring(), elapsed))
+
+
+def solve_with_time_limit(dimension, puzzle, method_name, time_limit):
+    """Runs one solve in a child process, killed after time_limit seconds.
+    Returns (status, elapsed) with status "ok", "failed", "timeout" or "error"
+    (the child raised or died without answering)."""
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.Process(target=_solve_in_child, args=(dimension, puzzle, method_name, sender))
+    start = time.perf_counter()
+    process.start()
+    sender.close()  # only the child holds the sending end, so its exit reads as EOF
+    try:
+        if receiver.poll(time_limit):
+            try:
+                solved, elapsed = receiver.recv()
+            except EOFError:
+                process.join()
+                return "error", time.perf_counter() - start
+            process.join()
+            if process.exitcode != 0:
+                return "error", elapsed
+            return ("ok" if solved else "failed"), elapsed
+        process.terminate()
+        process.join()
+        return "timeout", time_limit
+    finally:
+        receiver.close()
+
+
+def quantile(sorted_values, q):
+    """Linear-interpolated quantile of an already sorted list."""
+    position = (len(sorted_values) - 1) * q
+    low = math.floor(position)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (position - low)
+
+
+def bootstrap_median_ci(samples, resamples, confidence, rng):
+    """Percentile bootstrap confidence interval of the median."""
+    n = len(samples)
+    medians = sorted(quantile(sorted(rng.choices(samples, k=n)), 0.5) for _ in range(resamples))
+    alpha = (1 - confidence) / 2
+    return quantile(medians, alpha), quantile(medians, 1 - alpha)
+
+
+def summarize(samples, config, rng):
+    ordered = sorted(samples)
+    q1, median, q3 = (quantile(ordered, q) for q in (0.25, 0.5, 0.75))
+    iqr = q3 - q1
+    mean = sum(ordered) / len(ordered)
+    stdev = math.sqrt(sum((x - mean) ** 2 for x in ordered) / (len(ordered) - 1)) if len(ordered) > 1 else 0.0
+    ci_low, ci_high = bootstrap_median_ci(ordered, config.bootstrap, config.confidence, rng)
+    # Tukey fences
+    outliers = sum(1 for x in ordered if x < q1 - 1.5 * iqr or x > q3 + 1.5 * iqr)
+    return {"median": median, "q1": q1, "q3": q3, "iqr": iqr, "mean": mean, "stdev": stdev,
+            "min": ordered[0], "ci_low": ci_low, "ci_high": ci_high, "outliers": outliers}
+
+
+def measure(graph, board, method_name, config, rng, first_time=None):
+    """Times method_name on board, each solve bounded by the solver's time
+    limit; returns (status, samples)."""
+    solve = getattr(graph, method_name)
+    time_limit = config.timeout_for(method_name)
+
+    def run_once():
+        graph.load_from_string(board)
+        start = time.perf_counter()
+        result = solve(time_limit=time_limit)
+        elapsed = time.perf_counter() - start
+        status = "ok" if result is True else "timeout" if result is TIMED_OUT else "failed"
+        return status, elapsed
+
+    for _ in range(config.warmup):
+        status, elapsed = run_once()
+        if status != "ok":
+            return status, []
+        first_time = elapsed  # warm timings calibrate better than the child's cold run
+
+    estimate = max(first_time or 1e-6, 1e-6)
+    repeats = int(min(config.max_repeats, max(config.min_repeats, math.ceil(config.target_time / estimate))))
+
+    samples = []
+    gc.collect()
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeats):
+            status, elapsed = run_once()
+            if status != "ok":
+                return status, samples
+            samples.append(elapsed)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return "ok", samples
+
+
+def run_suite(boards, method_names=None, config=None, dimension=3, progress=None):
+    """Benchmarks every solver on every board. boards is a list of
+    (board name, difficulty, puzzle string). Returns a list of result dicts."""
+    config = config or BenchmarkConfig()
+    graph = SudokuGraph(dimension)
+    method_names = method_names or [name for _, name in graph.get_solver_options()]
+    rng = random.Random(config.seed)
+    results = []
+
+    for method_name in method_names:
+        for board_name, difficulty, board in boards:
+            record = {"solver": method_name, "board": board_name, "difficulty": difficulty,
+                      "empty_cells": board.count("0"), "puzzle": board, "repeats": 0}
+            first_time = None
+            status = "ok"
+            if config.isolate:
+                status, first_time = solve_with_time_limit(dimension, board, method_name,
+                                                           config.timeout_for(method_name))
+            if status == "ok":
+                status, samples = measure(graph, board, method_name, config, rng, first_time)
+                if samples:
+                    record.update(summarize(samples, config, rng))
+                    record["repeats"] = len(samples)
+            record["status"] = status
+            results.append(record)
+            if progress:
+                progress(record)
+    return results
+
+
+def write_json(results, path):
+    document = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "results": results,
+    }
+    with open(path, "w") as file:
+        json.dump(document, file, indent=2)
+
+
+def write_csv(results, path):
+    with open(path, "w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def load_results(path):
+    with open(path) as file:
+        return json.load(file)["results"]
+
+
+def compare_to_baseline(results, baseline, threshold=0.05):
+    """Matches results with a baseline by (solver, board). A change counts as a
+    regression or improvement only when the confidence intervals of the medians
+    don't overlap and the medians differ by more than threshold (relative).
+    Returns a list of (solver, board, baseline median, median, change, verdict)."""
+    previous = {(r["solver"], r["board"]): r for r in baseline}
+    rows = []
+    for record in results:
+        base = previous.get((record["solver"], record["board"]))
+        if base is None or record["status"] != "ok" or base["status"] != "ok":
+            if base is not None and base["status"] != record["status"]:
+                rows.append((record["solver"], record["board"], base.get("median"), record.get("median"),
+                             None, f"{base['status']} -> {record['status']}"))
+            continue
+        change = record["median"] / base["median"] - 1
+        verdict = "unchanged"
+        if record["ci_low"] > base["ci_high"] and change > threshold:
+            verdict = "regression"
+        elif record["ci_high"] < base["ci_low"] and -change > threshold:
+            verdict = "improvement"
+        rows.append((record["solver"], record["board"], base["median"], record["median"], change, verdict))
+    return rows
+
+
+def print_summary(results, out=sys.stdout):
+    """Board x solver table of medians with their confidence intervals."""
+    solvers = list(dict.fromkeys(r["solver"] for r in results))
+    boards = list(dict.fromkeys((r["board"], r["empty_cells"]) for r in results))
+    by_key = {(r["solver"], r["board"]): r for r in results}
+    print("\t".join(["Board", "Empty Cells"] + solvers), file=out)
+    for board, empty_cells in boards:
+        row = [board, str(empty_cells)]
+        for solver in solvers:
+            record = by_key.get((solver, board))
+            if record is None:
+                row.append("-")
+            elif record["status"] != "ok":
+                row.append(record["status"])
+            else:
+                row.append(f"{record['median']:.6f} [{record['ci_low']:.6f}, {record['ci_high']:.6f}]")
+        print("\t".join(row), file=out)
+
+
+def print_comparison(rows, out=sys.stdout):
+    print("\t".join(["Solver", "Board", "Baseline", "Current", "Change", "Verdict"]), file=out)
+    for solver, board, base, current, change, verdict in rows:
+        base_text = f"{base:.6f}" if base is not None else "-"
+        current_text = f"{current:.6f}" if current is not None else "-"
+        change_text = f"{change:+.1%}" if change is not None else "-"
+        print("\t".join([solver, board, base_text, current_text, change_text, verdict]), file=out)
+
+
+def default_boards():
+    from puzzles import PUZZLES
+    return [(f"{difficulty}_{i + 1}", difficulty, board)
+            for difficulty, boards in PUZZLES.items() for i, board in enumerate(boards)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark dos solvers do SudokuGraph.")
+    parser.add_argument("--solvers", nargs="*", help="métodos solve_ (padrão: todos)")
+    parser.add_argument("--difficulties", nargs="*", help="dificuldades de puzzles.PUZZLES (padrão: todas)")
+    parser.add_argument("--timeout", type=float, default=10.0, help="limite de tempo por solve, em segundos")
+    parser.add_argument("--target-time", type=float, default=0.5, help="segundos medidos por solver e tabuleiro")
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--json", help="grava os resultados em JSON")
+    parser.add_argument("--csv", help="grava os resultados em CSV")
+    parser.add_argument("--baseline", help="JSON de uma execução anterior para comparar")
+    parser.add_argument("--threshold", type=float, default=0.05, help="variação relativa mínima da mediana")
+    args = parser.parse_args(argv)
+
+    boards = default_boards()
+    if args.difficulties:
+        boards = [board for board in boards if board[1] in args.difficulties]
+    config = BenchmarkConfig(warmup=args.warmup, target_time=args.target_time, timeout=args.timeout)
+
+    def progress(record):
+        median = f"{record['median']:.6f}s" if "median" in record else "-"
+        print(f"{record['solver']}\t{record['board']}\t{record['status']}\t{median}", file=sys.stderr)
+
+    results = run_suite(boards, args.solvers, config, progress=progress)
+    print_summary(results)
+    if args.json:
+        write_json(results, args.json)
+    if args.csv:
+        write_csv(results, args.csv)
+    if args.baseline:
+        rows = compare_to_baseline(results, load_results(args.baseline), args.threshold)
+        print()
+        print_comparison(rows)
+        if any(row[5] == "regression" for row in rows):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""Time / node budgets and cancellation for the solve_ methods.
+
+Every solve_ method accepts time_limit (seconds), max_nodes and cancel (a
+CancelToken). The search charges the budget once per node and, every
+check_interval nodes, looks at the clock and the token. When the budget
+runs out the board is put back as it was and the solver returns TIMED_OUT
+(or CANCELLED). Both are falsy, so `if solved:` keeps working, but they
+can be told apart from a plain False with `result is TIMED_OUT`.
+"""
+import threading
+import time
+
+
+class Interrupted:
+    """Result of a solve that stopped before finishing."""
+    __slots__ = ("reason",)
+
+    def __init__(self, reason):
+        self.reason = reason
+
+    def __bool__(self):
+        return False
+
+    def __repr__(self):
+        return self.reason.upper().replace(" ", "_")
+
+
+TIMED_OUT = Interrupted("timed out")  # time limit or node budget exhausted
+CANCELLED = Interrupted("cancelled")
+
+
+class BudgetExceeded(Exception):
+    """Raised inside the search to unwind it; the solver decorator turns it into a result."""
+
+    def __init__(self, result):
+        super().__init__(result.reason)
+        self.result = result
+
+
+class CancelToken:
+    """Thread-safe flag another thread sets to stop a running solve."""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    def reset(self):
+        self._event.clear()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+
+class Budget:
+    def __init__(self, time_limit=None, max_nodes=None, cancel=None, check_interval=256):
+        self.deadline = None if time_limit is None else time.perf_counter() + time_limit
+        self.max_nodes = max_nodes
+        self.cancel = cancel
+        self.check_interval = check_interval
+        self.nodes = 0
+        self._next_check = check_interval
+
+    def charge(self):
+        """Counts one search node; raises BudgetExceeded when the budget is spent."""
+        self.nodes += 1
+        if self.max_nodes is not None and self.nodes > self.max_nodes:
+            raise BudgetExceeded(TIMED_OUT)
+        if self.nodes >= self._next_check:
+            self._next_check = self.nodes + self.check_interval
+            self.check()
+
+    def check(self):
+        if self.cancel is not None and self.cancel.cancelled:
+            raise BudgetExceeded(CANCELLED)
+        if self.deadline is not None and time.perf_counter() >= self.deadline:
+            raise BudgetExceeded(TIMED_OUT)
+
+    def remaining(self):
+        """Seconds left before the deadline, or None without a time limit."""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.perf_counter())
@@ -0,0 +1,310 @@
+"""Canonical forms of Sudoku grids under the Sudoku symmetry group, and a
+solution cache that uses them to answer symmetric variants.
+
+Grids are flat lists of colors in row-major order (0 = empty). Two puzzles
+that differ only by digit relabelling, transposition, band/stack permutations
+or row/column permutations within a band/stack get the same canonical form,
+so a solution found for one of them can be mapped onto the other.
+"""
+import itertools
+import math
+import threading
+from collections import OrderedDict
+
+# Grids with fewer givens than this share of the cells only get exact lookups:
+# their lines tie too often for a cheap canonical form and they solve fast anyway
+MIN_SYMMETRY_GIVENS = 0.2
+MAX_TIES = 64  # tied arrangements canonical_form tries before giving up
+# Puzzles solved faster than this (seconds) are cheaper to solve again than
+# to answer by symmetry (invariant, canonical form and mapping: ~0.3 ms at 9x9)
+MIN_SYMMETRY_SOLVE_TIME = 0.0005
+
+
+def _transpose(grid, size):
+    return [grid[col * size + row] for row in range(size) for col in range(size)]
+
+
+class Transform:
+    """A symmetry of the grid: canonical[i][j] = labels[source[rows[i]][cols[j]]],
+    where source is the grid, transposed first when transposed is True."""
+    __slots__ = ("transposed", "rows", "cols", "labels")
+
+    def __init__(self, transposed, rows, cols, labels):
+        self.transposed = transposed
+        self.rows = rows
+        self.cols = cols
+        self.labels = labels  # labels[color] -> canonical color, labels[0] == 0
+
+    def apply(self, grid):
+        size = len(self.rows)
+        source = _transpose(grid, size) if self.transposed else grid
+        labels = self.labels
+        return [labels[source[row * size + col]] for row in self.rows for col in self.cols]
+
+    def invert(self, grid):
+        size = len(self.rows)
+        inverse = [0] * (size + 1)
+        for color, label in enumerate(self.labels):
+            inverse[label] = color
+        source = [0] * (size * size)
+        for i, row in enumerate(self.rows):
+            for j, col in enumerate(self.cols):
+                source[row * size + col] = inverse[grid[i * size + j]]
+        return _transpose(source, size) if self.transposed else source
+
+
+def random_transform(dimension, rng):
+    """A uniformly chosen element of the symmetry group, for producing equivalent puzzles."""
+    size = dimension * dimension
+
+    def line_order():
+        bands = rng.sample(range(dimension), dimension)
+        return [band * dimension + offset for band in bands
+                for offset in rng.sample(range(dimension), dimension)]
+
+    labels = [0] + rng.sample(range(1, size + 1), size)
+    return Transform(rng.random() < 0.5, line_order(), line_order(), labels)
+
+
+def _line_weights(grid, size, dimension):
+    """Weights of the rows and of the columns of grid that every symmetry
+    preserves: a line's clue count and the sorted (crossing line count, block
+    count, color count) of each of its clues."""
+    rows, cols, blocks, colors = [0] * size, [0] * size, [0] * size, [0] * (size + 1)
+    clues = []
+    for index, color in enumerate(grid):
+        if color:
+            row, col = divmod(index, size)
+            block = (row // dimension) * dimension + col // dimension
+            rows[row] += 1
+            cols[col] += 1
+            blocks[block] += 1
+            colors[color] += 1
+            clues.append((row, col, block, color))
+    row_clues, col_clues = [[] for _ in range(size)], [[] for _ in range(size)]
+    for row, col, block, color in clues:
+        row_clues[row].append((cols[col], blocks[block], colors[color]))
+        col_clues[col].append((rows[row], blocks[block], colors[color]))
+    return ([(rows[row], sorted(row_clues[row])) for row in range(size)],
+            [(cols[col], sorted(col_clues[col])) for col in range(size)])
+
+
+def _line_orders(weights, dimension):
+    """(profile, count, orders) of one axis: bands are sorted by the sorted
+    weights of their lines, and lines by weight inside each band. orders()
+    yields the count line orders that only differ in how tied bands or lines
+    are arranged; profile is the same for every grid symmetric to this one."""
+    band_weights = [sorted(weights[band * dimension:(band + 1) * dimension]) for band in range(dimension)]
+    weight_of = band_weights.__getitem__
+    band_groups = [list(group) for _, group in itertools.groupby(sorted(range(dimension), key=weight_of),
+                                                                    key=weight_of)]
+    inside = []  # per band, every order of its lines sorted by weight
+    for band in range(dimension):
+        lines = sorted(range(band * dimension, (band + 1) * dimension), key=weights.__getitem__)
+        ties = [list(group) for _, group in itertools.groupby(lines, key=weights.__getitem__)]
+        if len(ties) == dimension:
+            inside.append([lines])
+        else:
+            inside.append([[line for part in parts for line in part]
+                           for parts in itertools.product(*(itertools.permutations(tie) for tie in ties))])
+    count = 1
+    for group in band_groups:
+        count *= math.factorial(len(group))
+    for orders in inside:
+        count *= len(orders)
+    profile = [band_weights[band] for group in band_groups for band in group]
+
+    def orders():
+        for groups in itertools.product(*(itertools.permutations(group) for group in band_groups)):
+            band_order = [band for group in groups for band in group]
+            for parts in itertools.product(*(inside[band] for band in band_order)):
+                yield [line for part in parts for line in part]
+
+    return profile, count, orders
+
+
+def canonical_form(grid, dimension, max_ties=MAX_TIES):
+    """Returns (key, transform): key is the same tuple for every grid symmetric
+    to grid, and transform.apply(grid) == key. None when more than max_ties
+    arrangements tie, as in complete or very regular grids.
+
+    Bands, stacks and their lines are sorted by weights that every symmetry
+    preserves (see _line_weights), in the orientation with the smaller weights.
+    Only lines with equal weights are tried in every order, usually one or two
+    arrangements; each is relabelled by order of first appearance and key is
+    the smallest result.
+    """
+    size = dimension * dimension
+    row_weights, col_weights = _line_weights(grid, size, dimension)
+    axes = [(0, _line_orders(row_weights, dimension), _line_orders(col_weights, dimension))]
+    axes.append((1, axes[0][2], axes[0][1]))  # transposed: columns become rows
+    best_profile = min((rows[0], cols[0]) for _, rows, cols in axes)
+    axes = [axis for axis in axes if (axis[1][0], axis[2][0]) == best_profile]
+    if sum(rows[1] * cols[1] for _, rows, cols in axes) > max_ties:
+        return None
+
+    best = None
+    for transposed, (_, _, row_orders), (_, _, col_orders) in axes:
+        source = _transpose(grid, size) if transposed else grid
+        col_orders = list(col_orders())
+        for rows in row_orders():
+            for cols in col_orders:
+                labels = [0] * (size + 1)
+                label = 1
+                values = []
+                for row in rows:
+                    base = row * size
+                    for col in cols:
+                        color = source[base + col]
+                        if color and not labels[color]:
+                            labels[color] = label
+                            label += 1
+                        values.append(labels[color])
+                values = tuple(values)
+                if best is None or values < best[0]:
+                    best = values, transposed, rows, cols, labels, label
+
+    key, transposed, rows, cols, labels, label = best
+    # Colors absent from the grid take the remaining labels in order
+    for color in range(1, size + 1):
+        if not labels[color]:
+            labels[color] = label
+            label += 1
+    return key, Transform(bool(transposed), rows, cols, labels)
+
+
+def invariant(grid, dimension):
+    """Fingerprint of grid that every symmetry preserves, in O(cells): sorted
+    color counts, clue counts of the rows of each band and of the columns of
+    each stack, and the (row, column, block) clue counts of every given, taking
+    the smaller of the two orientations. Grids with the same canonical form
+    always have the same invariant."""
+    size = dimension * dimension
+    rows, cols, blocks, colors = [0] * size, [0] * size, [0] * size, [0] * (size + 1)
+    givens = []
+    for index, color in enumerate(grid):
+        if color:
+            row, col = divmod(index, size)
+            block = (row // dimension) * dimension + col // dimension
+            rows[row] += 1
+            cols[col] += 1
+            blocks[block] += 1
+            colors[color] += 1
+            givens.append((row, col, block))
+
+    def lines(counts):
+        return tuple(sorted(tuple(sorted(counts[band * dimension:(band + 1) * dimension]))
+                            for band in range(dimension)))
+
+    upright = (lines(rows), lines(cols), tuple(sorted((rows[r], cols[c], blocks[b]) for r, c, b in givens)))
+    transposed = (lines(cols), lines(rows), tuple(sorted((cols[c], rows[r], blocks[b]) for r, c, b in givens)))
+    return (tuple(sorted(colors[1:])),) + min(upright, transposed)
+
+
+class SolutionCache:
+    """Bounded LRU of solutions, keyed by the grid itself, that also answers
+    symmetric variants of the cached puzzles.
+
+    store canonicalizes each puzzle once (about 0.15 ms at 9x9, see
+    canonical_form), and a lookup that isn't an exact repeat only
+    canonicalizes the query when its invariant matches a cached puzzle's;
+    any other grid is a miss after an O(cells) pass. symmetry=False (the
+    default above 9x9) keeps only the exact lookup, as do grids with fewer
+    than MIN_SYMMETRY_GIVENS givens, grids canonical_form gives up on and
+    puzzles stored with a solve_time below MIN_SYMMETRY_SOLVE_TIME.
+    Lookups and stores take a lock, so a cache may be shared by every
+    SudokuGraph of the same dimension, across threads.
+    """
+
+    def __init__(self, dimension=3, maxsize=4096, symmetry=None):
+        self.dimension = dimension
+        self.maxsize = maxsize
+        self.symmetry = dimension <= 3 if symmetry is None else symmetry
+        self._lock = threading.Lock()
+        self._exact = OrderedDict()  # grid -> (solution, invariant, canonical key)
+        self._invariants = {}  # invariant -> number of cached grids with it
+        self._canonical = {}  # canonical key -> (cached grid, its transform)
+        self.hits = 0  # exact repeats
+        self.symmetry_hits = 0  # symmetric variants of a cached puzzle
+        self.misses = 0
+        self.evictions = 0
+
+    def _invariant(self, grid):
+        if not self.symmetry or sum(1 for color in grid if color) < MIN_SYMMETRY_GIVENS * len(grid):
+            return None
+        return invariant(grid, self.dimension)
+
+    def lookup(self, grid):
+        """Solution (list of colors) for grid, or None if no equivalent puzzle is cached."""
+        grid = tuple(grid)
+        with self._lock:
+            entry = self._exact.get(grid)
+            if entry is not None:
+                self._exact.move_to_end(grid)
+                self.hits += 1
+                return list(entry[0])
+
+        signature = self._invariant(grid)
+        if signature is not None and signature in self._invariants:
+            canonical = canonical_form(grid, self.dimension)
+            if canonical is not None:
+                key, transform = canonical
+                with self._lock:
+                    match = self._canonical.get(key)
+                    if match is not None:
+                        cached, cached_transform = match
+                        self._exact.move_to_end(cached)
+                        self.symmetry_hits += 1
+                        solution = transform.invert(cached_transform.apply(self._exact[cached][0]))
+                        self._remember(grid, solution, signature, None)
+                        return solution
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def store(self, grid, solution, solve_time=None):
+        """Caches solution for grid; solve_time (seconds it took to find) below
+        MIN_SYMMETRY_SOLVE_TIME keeps it out of the symmetric lookups."""
+        grid = tuple(grid)
+        signature = None
+        if solve_time is None or solve_time >= MIN_SYMMETRY_SOLVE_TIME:
+            signature = self._invariant(grid)
+        canonical = None if signature is None else canonical_form(grid, self.dimension)
+        with self._lock:
+            self._remember(grid, solution, signature, canonical)
+
+    def _remember(self, grid, solution, signature, canonical):
+        if grid in self._exact:
+            self._exact.move_to_end(grid)
+            return
+        key = None
+        if canonical is not None and canonical[0] not in self._canonical:
+            key = canonical[0]
+            self._canonical[key] = (grid, canonical[1])
+            self._invariants[signature] = self._invariants.get(signature, 0) + 1
+        self._exact[grid] = (tuple(solution), signature, key)
+        if len(self._exact) > self.maxsize:
+            _, (_, evicted_signature, evicted_key) = self._exact.popitem(last=False)
+            if evicted_key is not None:
+                del self._canonical[evicted_key]
+                self._invariants[evicted_signature] -= 1
+                if not self._invariants[evicted_signature]:
+                    del self._invariants[evicted_signature]
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._exact.clear()
+            self._invariants.clear()
+            self._canonical.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "symmetry_hits": self.symmetry_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._exact),
+            }
@@ -0,0 +1,232 @@
+import time
+
+
+class DancingLinks:
+    """Knuth's Algorithm X over a sparse 0/1 matrix stored as dancing links.
+
+    The links live in flat lists (one entry per node) instead of node objects,
+    which keeps cover/uncover to plain list indexing. Node 0 is the root,
+    nodes 1..n_columns are the column headers and the remaining nodes belong
+    to the rows, in the order they were given.
+
+    The structure is meant to be built once and reused: select() fixes rows
+    (e.g. the givens of a puzzle), search() explores the rest and restore()
+    puts the matrix back the way it was built. Covering only rewrites U, D, S
+    and the L / R links of the headers, so restore() copies those back from a
+    snapshot taken after building instead of uncovering every selected row,
+    and search() leaves its last partial solution covered for restore() to
+    clear rather than uncovering it level by level.
+    The hot loops inline cover / uncover: at 9x9 a method call per column
+    costs as much as the link updates themselves.
+    """
+
+    def __init__(self, n_columns, rows):
+        self.n_columns = n_columns
+        headers = range(n_columns + 1)
+        self.L = [i - 1 for i in headers]
+        self.R = [i + 1 for i in headers]
+        self.L[0] = n_columns
+        self.R[n_columns] = 0
+        self.U = list(headers)
+        self.D = list(headers)
+        self.C = list(headers)
+        self.S = [0] * (n_columns + 1)  # number of rows in each column
+        self.ROW = [-1] * (n_columns + 1)
+        self.row_heads = []
+        self._dirty = False  # covered by select() or search() since the last restore()
+
+        L, R, U, D, C, S, ROW = self.L, self.R, self.U, self.D, self.C, self.S, self.ROW
+        for row_id, columns in enumerate(rows):
+            first = len(C)
+            self.row_heads.append(first)
+            for offset, column in enumerate(columns):
+                node = first + offset
+                header = column + 1
+                # Append the node at the bottom of its column
+                U.append(U[header])
+                D.append(header)
+                D[U[header]] = node
+                U[header] = node
+                C.append(header)
+                ROW.append(row_id)
+                S[header] += 1
+                L.append(node - 1 if offset else first + len(columns) - 1)
+                R.append(node + 1 if offset < len(columns) - 1 else first)
+        self._pristine = (L[:n_columns + 1], R[:n_columns + 1], U[:], D[:], S[:])
+
+    def _cover(self, c):
+        L, R, U, D, C, S = self.L, self.R, self.U, self.D, self.C, self.S
+        L[R[c]] = L[c]
+        R[L[c]] = R[c]
+        i = D[c]
+        while i != c:
+            j = R[i]
+            while j != i:
+                U[D[j]] = U[j]
+                D[U[j]] = D[j]
+                S[C[j]] -= 1
+                j = R[j]
+            i = D[i]
+
+    def _uncover(self, c):
+        L, R, U, D, C, S = self.L, self.R, self.U, self.D, self.C, self.S
+        i = U[c]
+        while i != c:
+            j = L[i]
+            while j != i:
+                S[C[j]] += 1
+                U[D[j]] = j
+                D[U[j]] = j
+                j = L[j]
+            i = U[i]
+        L[R[c]] = c
+        R[L[c]] = c
+
+    def select(self, row_id):
+        """Forces row_id into the solution. Returns False, without changing
+        anything, if one of its columns is already covered by a selected row."""
+        L, R, U, D, C, S = self.L, self.R, self.U, self.D, self.C, self.S
+        head = self.row_heads[row_id]
+        node = head
+        while True:
+            column = C[node]
+            if R[L[column]] != column:
+                return False
+            node = R[node]
+            if node == head:
+                break
+        node = head
+        while True:
+            c = C[node]  # cover(c), inlined
+            L[R[c]] = L[c]
+            R[L[c]] = R[c]
+            i = D[c]
+            while i != c:
+                j = R[i]
+                while j != i:
+                    U[D[j]] = U[j]
+                    D[U[j]] = D[j]
+                    S[C[j]] -= 1
+                    j = R[j]
+                i = D[i]
+            node = R[node]
+            if node == head:
+                break
+        self._dirty = True
+        return True
+
+    def restore(self):
+        """Undoes every select() and search() call since the last restore()."""
+        if self._dirty:
+            self._dirty = False
+            headers = self.n_columns + 1
+            L, R, U, D, S = self._pristine
+            self.L[:headers] = L
+            self.R[:headers] = R
+            self.U[:] = U
+            self.D[:] = D
+            self.S[:] = S
+
+    def search(self, limit=1, stats=None, budget=None):
+        """Returns up to limit solutions, each a list of row ids (selected rows
+        excluded). Iterative, so the depth is not bound by the recursion limit.
+        stats (an instrumentation.SolverStats) counts rows tried and backtracks;
+        budget (a budget.Budget) is charged once per row tried and may stop the
+        search by raising. Either way call restore() before the next select()
+        or search(): the rows of the last partial solution stay covered."""
+        L, R, U, D, C, S, ROW = self.L, self.R, self.U, self.D, self.C, self.S, self.ROW
+        uncover = self._uncover
+        solutions = []
+        stack = []  # chosen node per level
+        advance = True
+        self._dirty = True
+
+        while True:
+            if advance:
+                if R[0] == 0:
+                    solutions.append([ROW[node] for node in stack])
+                    if len(solutions) >= limit:
+                        break
+                    advance = False
+                    continue
+                # Column with the fewest remaining rows (Knuth's S heuristic)
+                if stats is not None:
+                    select_start = time.perf_counter()
+                best = R[0]
+                best_size = S[best]
+                c = R[best]
+                while c and best_size > 1:
+                    size = S[c]
+                    if size < best_size:
+                        best, best_size = c, size
+                    c = R[c]
+                c = best
+                if stats is not None:
+                    stats.select_time += time.perf_counter() - select_start
+                # cover(c), inlined
+                L[R[c]] = L[c]
+                R[L[c]] = R[c]
+                i = D[c]
+                while i != c:
+                    j = R[i]
+                    while j != i:
+                        U[D[j]] = U[j]
+                        D[U[j]] = D[j]
+                        S[C[j]] -= 1
+                        j = R[j]
+                    i = D[i]
+                r = D[c]
+            else:
+                if not stack:
+                    break
+                r = stack.pop()
+                j = L[r]
+                while j != r:
+                    # uncover(C[j]), inlined
+                    col = C[j]
+                    i = U[col]
+                    while i != col:
+                        k = L[i]
+                        while k != i:
+                            S[C[k]] += 1
+                            U[D[k]] = k
+                            D[U[k]] = k
+                            k = L[k]
+                        i = U[i]
+                    L[R[col]] = col
+                    R[L[col]] = col
+                    j = L[j]
+                c = C[r]
+                r = D[r]
+
+            if r == c:
+                # Column exhausted: backtrack
+                uncover(c)
+                advance = False
+                if stats is not None:
+                    stats.backtracks += 1
+                continue
+
+            stack.append(r)
+            if stats is not None:
+                stats.node(len(stack))
+            j = R[r]
+            while j != r:
+                # cover(C[j]), inlined
+                col = C[j]
+                L[R[col]] = L[col]
+                R[L[col]] = R[col]
+                i = D[col]
+                while i != col:
+                    k = R[i]
+                    while k != i:
+                        U[D[k]] = U[k]
+                        D[U[k]] = D[k]
+                        S[C[k]] -= 1
+                        k = R[k]
+                    i = D[i]
+                j = R[j]
+            advance = True
+            if budget is not None:
+                budget.charge()
+        return solutions
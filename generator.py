@@ -0,0 +1,279 @@
+"""Puzzle generator with difficulty grading, and a buffered pool of fresh puzzles.
+
+A puzzle is made from a random complete grid by removing clues in random
+order, keeping each removal only while the puzzle stays unique and no harder
+than the requested difficulty. Difficulty is the smallest set of propagation
+techniques that solves the puzzle ("facil" needs only naked singles, ...,
+"muito dificil" needs pointing / box-line reduction); puzzles that need
+search are "expert". A puzzle solved by propagation alone is necessarily
+unique, so count_solutions only runs for the expert tier.
+
+    python generator.py expert --count 1000 -o expert.txt --workers 8
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import batch
+from batch import _init_worker
+from canonical import random_transform
+from propagation import HIDDEN_PAIRS, HIDDEN_SINGLES, NAKED_PAIRS, NAKED_SINGLES, POINTING
+from puzzles import CLUE_FRACTIONS, PUZZLES, generate_givens
+from SudokuGraph import SYMBOLS, SudokuGraph
+
+# Techniques allowed in each difficulty, easiest first; "expert" needs search
+TECHNIQUE_TIERS = [
+    ("facil", (NAKED_SINGLES,)),
+    ("medio", (NAKED_SINGLES, HIDDEN_SINGLES)),
+    ("dificil", (NAKED_SINGLES, HIDDEN_SINGLES, NAKED_PAIRS, HIDDEN_PAIRS)),
+    ("muito dificil", (NAKED_SINGLES, HIDDEN_SINGLES, NAKED_PAIRS, HIDDEN_PAIRS, POINTING)),
+]
+DIFFICULTIES = [name for name, _ in TECHNIQUE_TIERS] + ["expert"]
+# Seconds PuzzlePool waits after a failed job or a dead worker, so that
+# failures that keep happening don't turn the fill thread into a busy loop
+RETRY_DELAY = 1.0
+
+
+def _load(graph, grid):
+    graph.clear_board()
+    size = graph.size
+    for index, color in enumerate(grid):
+        if color:
+            graph.set_color(index // size, index % size, color, locked=True)
+
+
+def _to_string(grid, size):
+    if size < len(SYMBOLS):
+        return "".join(SYMBOLS[color] for color in grid)
+    return ",".join(map(str, grid))
+
+
+def random_full_grid(graph, rng):
+    """A random complete grid, as a list of colors. The diagonal blocks don't
+    constrain each other, so they get random permutations and the exact cover
+    solver completes the rest; a random symmetry then shuffles the result."""
+    dimension, size = graph.dimension, graph.size
+    graph.clear_board()
+    for block in range(dimension):
+        for k, color in enumerate(rng.sample(range(1, size + 1), size)):
+            graph.set_color(block * dimension + k // dimension, block * dimension + k % dimension, color, locked=True)
+    graph.solve_dancing_links()
+    return random_transform(dimension, rng).apply(graph.get_colors())
+
+
+def grade(graph, grid=None):
+    """Difficulty of grid (default: the current board of graph), or None when
+    it doesn't have exactly one solution."""
+    if grid is not None:
+        _load(graph, grid)
+    if not graph.is_valid_coloring():
+        return None
+    start = [1 << vertex.color if vertex.color else graph.get_candidates_mask(row, col)
+             for (row, col), vertex in graph.vertices.items()]
+    propagator = graph._get_propagator()
+    for difficulty, techniques in TECHNIQUE_TIERS:
+        candidates = list(start)
+        if not propagator.run(candidates, techniques):
+            return None
+        if all(not mask & (mask - 1) for mask in candidates):
+            return difficulty
+    return "expert" if graph.count_solutions(limit=2) == 1 else None
+
+
+def generate_puzzle(difficulty, graph=None, rng=None, max_attempts=20):
+    """A puzzle string of the given difficulty, or None if max_attempts grids
+    didn't produce one. Clues are removed down to the difficulty's share in
+    puzzles.CLUE_FRACTIONS (harder ones keep removing until no clue can go)."""
+    graph = graph or SudokuGraph()
+    rng = rng or random.Random()
+    target = DIFFICULTIES.index(difficulty)
+    cells = graph.size * graph.size
+    min_clues = round(CLUE_FRACTIONS[difficulty] * cells)
+
+    for _ in range(max_attempts):
+        solution = random_full_grid(graph, rng)
+        grid = list(solution)
+        clues = cells
+        current = 0
+        for cell in rng.sample(range(cells), cells):
+            if clues <= min_clues and current == target:
+                break
+            grid[cell] = 0
+            level = grade(graph, grid)
+            if level is None or DIFFICULTIES.index(level) > target:
+                grid[cell] = solution[cell]  # would lose uniqueness or get too hard
+                continue
+            clues -= 1
+            current = DIFFICULTIES.index(level)
+        if current == target:
+            return _to_string(grid, graph.size)
+    return None
+
+
+def _generate_job(difficulty, seed):
+    # The pools start their workers with batch._init_worker, which builds the graph
+    return generate_puzzle(difficulty, batch._worker_graph, random.Random(seed))
+
+
+def generate_corpus(difficulty, count, dimension=3, workers=None, seed=None):
+    """Yields count puzzles of one difficulty, generated in parallel (e.g. for benchmark corpora)."""
+    rng = random.Random(seed)
+    if workers == 1:
+        graph = SudokuGraph(dimension)
+        produced = 0
+        while produced < count:
+            puzzle = generate_puzzle(difficulty, graph, rng)
+            if puzzle is not None:
+                produced += 1
+                yield puzzle
+        return
+
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(dimension,)) as executor:
+        produced = 0
+        while produced < count:
+            seeds = [rng.getrandbits(64) for _ in range(count - produced)]
+            for puzzle in executor.map(_generate_job, [difficulty] * len(seeds), seeds):
+                if puzzle is not None:
+                    produced += 1
+                    yield puzzle
+
+
+class PuzzlePool:
+    """Keeps up to capacity generated puzzles per difficulty, refilled in the
+    background by a pool of worker processes, so get() never waits for the
+    generator. While a buffer is empty get() falls back to the fixed puzzles
+    of puzzles.PUZZLES (or generate_givens for other dimensions). A job that
+    raises is counted in errors and skipped; a pool whose worker died is
+    replaced (counted in restarts)."""
+
+    def __init__(self, dimension=3, capacity=5, workers=None, seed=None):
+        self.dimension = dimension
+        self.capacity = capacity
+        self.workers = workers or os.cpu_count() or 1
+        self.buffers = {difficulty: deque() for difficulty in DIFFICULTIES}
+        self.generated = 0
+        self.fallbacks = 0
+        self.errors = 0  # generation jobs that raised (see last_error)
+        self.restarts = 0  # worker pools rebuilt after a worker died
+        self.last_error = None
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread = threading.Thread(target=self._fill, daemon=True)
+        self._thread.start()
+
+    def get(self, difficulty):
+        with self._lock:
+            buffer = self.buffers[difficulty]
+            puzzle = buffer.popleft() if buffer else None
+        self._wake.set()
+        if puzzle is not None:
+            return puzzle
+        self.fallbacks += 1
+        if self.dimension == 3:
+            return self._rng.choice(PUZZLES[difficulty])
+        size = self.dimension * self.dimension
+        return generate_givens(self.dimension, round(CLUE_FRACTIONS[difficulty] * size * size))
+
+    def sizes(self):
+        with self._lock:
+            return {difficulty: len(buffer) for difficulty, buffer in self.buffers.items()}
+
+    def close(self):
+        self._closed = True
+        self._wake.set()
+        self._thread.join()
+
+    def _fill(self):
+        executor = self._start_executor()
+        pending = {}  # future -> difficulty
+        try:
+            while not self._closed:
+                # One job per missing puzzle, at most two jobs per worker in flight
+                with self._lock:
+                    missing = {difficulty: self.capacity - len(buffer) for difficulty, buffer in self.buffers.items()}
+                for difficulty in pending.values():
+                    missing[difficulty] -= 1
+                broken = False
+                for difficulty in DIFFICULTIES:
+                    while not broken and missing[difficulty] > 0 and len(pending) < 2 * self.workers:
+                        try:
+                            future = executor.submit(_generate_job, difficulty, self._rng.getrandbits(64))
+                        except BrokenProcessPool as error:
+                            self._record_error(error)
+                            broken = True
+                            break
+                        pending[future] = difficulty
+                        missing[difficulty] -= 1
+
+                if not pending and not broken:
+                    self._wake.wait()
+                    self._wake.clear()
+                    continue
+                done, _ = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+                failed = False
+                for future in done:
+                    difficulty = pending.pop(future)
+                    try:
+                        puzzle = future.result()
+                    except BrokenProcessPool as error:  # a worker died; every pending job is lost
+                        self._record_error(error)
+                        broken = True
+                        continue
+                    except Exception as error:  # one failed job: the next ones may still succeed
+                        self._record_error(error)
+                        failed = True
+                        continue
+                    if puzzle is not None:
+                        with self._lock:
+                            self.buffers[difficulty].append(puzzle)
+                        self.generated += 1
+
+                if broken:
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    pending.clear()
+                    self.restarts += 1
+                if broken or failed:
+                    self._wake.wait(RETRY_DELAY)
+                    self._wake.clear()
+                if broken and not self._closed:
+                    executor = self._start_executor()
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _start_executor(self):
+        return ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=(self.dimension,))
+
+    def _record_error(self, error):
+        self.errors += 1
+        self.last_error = error
+        print(f"PuzzlePool: falha ao gerar puzzle: {type(error).__name__}: {error}", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera puzzles com solução única de uma dificuldade.")
+    parser.add_argument("difficulty", choices=DIFFICULTIES)
+    parser.add_argument("--count", type=int, default=10)
+    parser.add_argument("-o", "--output", default="-", help="arquivo de saída, um puzzle por linha (padrão: stdout)")
+    parser.add_argument("--dimension", type=int, default=3)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args(argv)
+
+    out = sys.stdout if args.output == "-" else open(args.output, "w")
+    try:
+        for puzzle in generate_corpus(args.difficulty, args.count, args.dimension, args.workers, args.seed):
+            print(puzzle, file=out)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import io
+
+
+class SolverStats:
+    """Search counters filled in by a solve_ method called with stats=SolverStats().
+
+    Solvers only touch the object when one is passed, so leaving stats out
+    costs nothing beyond a None check per search node. callback(stats), if
+    given, is called every callback_interval nodes (e.g. to show progress).
+    With profile=True the whole call also runs under cProfile and the result
+    is kept in profile_stats (a pstats.Stats).
+    """
+
+    def __init__(self, callback=None, callback_interval=1000, profile=False):
+        self.solver = None  # name of the solve_ method that filled the stats
+        self.result = None
+        self.nodes = 0  # colors (or exact cover rows) tried
+        self.backtracks = 0
+        self.max_depth = 0
+        self.validity_checks = 0
+        self.select_time = 0.0  # seconds choosing the next cell / column
+        self.validate_time = 0.0  # seconds checking moves
+        self.elapsed = 0.0
+        self.propagated = 0  # cells filled by the propagation pre-pass
+        self.cache_hit = False
+        self.details = {}  # solver-specific figures (ILP stages, propagation techniques...)
+        self.callback = callback
+        self.callback_interval = callback_interval
+        self.profile = profile
+        self.profile_stats = None
+        self._next_callback = callback_interval
+
+    def node(self, depth):
+        self.nodes += 1
+        if depth > self.max_depth:
+            self.max_depth = depth
+        if self.callback is not None and self.nodes >= self._next_callback:
+            self._next_callback = self.nodes + self.callback_interval
+            self.callback(self)
+
+    def run(self, function, *args, **kwargs):
+        """Calls function, under cProfile when profiling is on."""
+        if not self.profile:
+            return function(*args, **kwargs)
+        import cProfile  # imported here: pstats alone takes tens of ms to import
+        import pstats
+
+        profiler = cProfile.Profile()
+        try:
+            return profiler.runcall(function, *args, **kwargs)
+        finally:
+            self.profile_stats = pstats.Stats(profiler, stream=io.StringIO())
+
+    def profile_report(self, limit=15, sort="cumulative"):
+        if self.profile_stats is None:
+            return ""
+        stream = io.StringIO()
+        self.profile_stats.stream = stream
+        self.profile_stats.sort_stats(sort).print_stats(limit)
+        return stream.getvalue()
+
+    def as_dict(self):
+        return {
+            "solver": self.solver,
+            "result": self.result,
+            "nodes": self.nodes,
+            "backtracks": self.backtracks,
+            "max_depth": self.max_depth,
+            "validity_checks": self.validity_checks,
+            "select_time": self.select_time,
+            "validate_time": self.validate_time,
+            "elapsed": self.elapsed,
+            "propagated": self.propagated,
+            "cache_hit": self.cache_hit,
+            **self.details,
+        }
+
+    def summary(self):
+        if self.cache_hit:
+            return "resposta do cache"
+        return (f"nós: {self.nodes}, backtracks: {self.backtracks}, prof. máx.: {self.max_depth}, "
+                f"propagadas: {self.propagated}")
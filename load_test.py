@@ -0,0 +1,113 @@
+"""Load test of service.py: concurrent clients send puzzles over TCP, each
+keeping up to --window requests outstanding, and the run reports
+throughput and p50/p99 latency (seen by the clients and by the service).
+
+    python load_test.py --requests 5000 --connections 16
+    python load_test.py --host 127.0.0.1 --port 8765 --input puzzles.txt
+
+Without --port a service is started in-process on a free port.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import sys
+import time
+
+from benchmark import quantile
+from puzzle_stream import read_puzzles
+from puzzles import PUZZLES
+from service import OVERLOADED_ERROR, SolverService
+
+
+async def _client(host, port, requests, window, latencies, service_latencies, errors):
+    reader, writer = await asyncio.open_connection(host, port, limit=2 ** 20)
+    slots = asyncio.Semaphore(window)
+    sent = {}
+
+    async def send():
+        for request_id, puzzle in requests:
+            await slots.acquire()
+            sent[request_id] = time.perf_counter()
+            writer.write((json.dumps({"id": request_id, "puzzle": puzzle}) + "\n").encode())
+            await writer.drain()
+
+    sender = asyncio.create_task(send())
+    for _ in range(len(requests)):
+        line = await reader.readline()
+        if not line:
+            break
+        response = json.loads(line)
+        latencies.append(time.perf_counter() - sent.pop(response["id"]))
+        service_latencies.append(response["latency"])
+        if response["error"]:
+            errors[response["error"]] = errors.get(response["error"], 0) + 1
+        slots.release()
+    await sender
+    writer.close()
+    await writer.wait_closed()
+
+
+async def run_load(puzzles, requests, connections, window, host, port):
+    """Sends requests puzzles (cycling through puzzles) over connections connections.
+    Returns (elapsed, latencies, service_latencies, errors)."""
+    numbered = list(zip(range(requests), itertools.cycle(puzzles)))
+    shares = [numbered[i::connections] for i in range(connections)]
+    latencies, service_latencies, errors = [], [], {}
+    start = time.perf_counter()
+    await asyncio.gather(*(_client(host, port, share, window, latencies, service_latencies, errors)
+                           for share in shares if share))
+    return time.perf_counter() - start, latencies, service_latencies, errors
+
+
+def report(elapsed, latencies, service_latencies, errors, out=sys.stdout):
+    latencies.sort()
+    service_latencies.sort()
+    print(f"requisições: {len(latencies)} em {elapsed:.2f}s, {len(latencies) / elapsed:.0f}/s", file=out)
+    for name, values in (("cliente", latencies), ("serviço", service_latencies)):
+        if values:
+            print(f"latência ({name}): p50 {quantile(values, 0.5) * 1000:.2f}ms, "
+                  f"p99 {quantile(values, 0.99) * 1000:.2f}ms, máx. {values[-1] * 1000:.2f}ms", file=out)
+    if errors:
+        print("erros: " + ", ".join(f"{error}: {count}" for error, count in sorted(errors.items())), file=out)
+
+
+async def _main(args):
+    puzzles = list(read_puzzles(args.input)) if args.input else [p for boards in PUZZLES.values() for p in boards]
+    if args.port is not None:
+        results = await run_load(puzzles, args.requests, args.connections, args.window, args.host, args.port)
+        report(*results)
+        return
+
+    service = SolverService(args.solver, workers=args.workers, max_batch=args.max_batch,
+                            max_delay=args.max_delay, max_pending=args.max_pending)
+    async with service:
+        server = await service.serve_tcp(args.host, 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            results = await run_load(puzzles, args.requests, args.connections, args.window, args.host, port)
+    report(*results)
+    print(service.summary())
+    if results[3].get(OVERLOADED_ERROR):
+        print("(aumente --max-pending ou reduza --connections/--window para evitar recusas)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Teste de carga do service.py.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, help="porta de um serviço já em execução")
+    parser.add_argument("--input", help="arquivo de puzzles (padrão: puzzles.PUZZLES)")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--connections", type=int, default=8)
+    parser.add_argument("--window", type=int, default=32, help="requisições pendentes por conexão")
+    parser.add_argument("--solver", default="solve_dancing_links")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--max-batch", type=int, default=32)
+    parser.add_argument("--max-delay", type=float, default=0.002)
+    parser.add_argument("--max-pending", type=int, default=1024)
+    args = parser.parse_args(argv)
+    asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    main()
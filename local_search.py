@@ -0,0 +1,202 @@
+"""Simulated annealing over block-wise permutations, for boards too large for
+the exact solvers.
+
+Every block is kept a permutation of 1..size: its free cells hold exactly
+the colors its fixed cells are missing, each one of the cell's candidates
+(a random perfect matching), so blocks never conflict and the cost is the
+number of duplicate colors in rows and columns. A move takes a free cell,
+preferring one in conflict, and swaps it with the cell of its block where
+the swap costs least (see _pick_move). The delta of a swap only depends
+on the two rows and two columns involved, read from per-line color counts,
+so a move costs O(size).
+
+The temperature starts at the standard deviation of the move deltas and is
+multiplied by COOLING after each chain of moves (one per free cell). A run
+that goes STALL_CHAINS chains without improving its best cost restarts from
+a new random fill. The search is incomplete: it finds solutions but can't
+prove there are none.
+"""
+import math
+import random
+import time
+
+COOLING = 0.99
+STALL_CHAINS = 200
+SAMPLE_MOVES = 200  # random moves used to pick the initial temperature
+FOCUS_DRAWS = 10  # tries at picking a conflicting cell as the first of a swap
+RANDOM_PARTNER = 0.1  # share of moves that swap with any cell of the block
+
+
+class Annealer:
+    """Works on a candidate bitmask per cell id (bit c = color c possible);
+    cells with a single candidate are fixed."""
+
+    def __init__(self, topology, candidates, rng=None):
+        self.size = size = topology.size
+        self.rng = rng or random.Random()
+        self.fixed = [not mask & (mask - 1) for mask in candidates]
+        self.history = []  # (seconds, conflicts) whenever the best cost of a run improves
+        self.restarts = 0
+        self.moves = 0
+
+        # The colors of the fixed cells are no option for their neighbors
+        self.consistent = True
+        candidates = list(candidates)
+        for cell, fixed in enumerate(self.fixed):
+            if fixed:
+                for neighbor in topology.neighbors[cell]:
+                    if candidates[neighbor] == candidates[cell] and self.fixed[neighbor]:
+                        self.consistent = False  # two fixed neighbors share a color
+                    candidates[neighbor] &= ~candidates[cell]
+        self.candidates = candidates
+        self.options = [[color for color in range(1, size + 1) if mask >> color & 1] for mask in candidates]
+        if not all(self.options):
+            self.consistent = False
+
+        self.blocks = [[cell for cell in unit if not self.fixed[cell]] for unit in topology.block_units]
+        self.movable = [free for free in self.blocks if len(free) > 1]
+        self.free_cells = [cell for free in self.movable for cell in free]
+        self.block_free = {cell: free for free in self.movable for cell in free}
+
+    def _fill(self):
+        """Random fill of every block in which each free cell holds one of its
+        candidates (a random perfect matching of free cells to missing colors),
+        or None when some block has no such fill."""
+        size, rng, candidates = self.size, self.rng, self.candidates
+        colors = [mask.bit_length() - 1 if fixed else 0 for mask, fixed in zip(candidates, self.fixed)]
+        for free in self.blocks:
+            owner = {}  # color -> free cell holding it
+            for cell in rng.sample(free, len(free)):
+                if not self._augment(cell, owner, set(), rng):
+                    return None
+            for color, cell in owner.items():
+                colors[cell] = color
+
+        self.colors = colors
+        self.row_counts = [[0] * (size + 1) for _ in range(size)]
+        self.col_counts = [[0] * (size + 1) for _ in range(size)]
+        for cell, color in enumerate(colors):
+            self.row_counts[cell // size][color] += 1
+            self.col_counts[cell % size][color] += 1
+        return sum(count - 1 for line in self.row_counts + self.col_counts for count in line if count > 1)
+
+    def _augment(self, cell, owner, visited, rng):
+        """Kuhn's augmenting path step: gives cell a color, moving other cells if needed."""
+        options = self.options[cell]
+        for color in rng.sample(options, len(options)):
+            if color in visited:
+                continue
+            visited.add(color)
+            if color not in owner or self._augment(owner[color], owner, visited, rng):
+                owner[color] = cell
+                return True
+        return False
+
+    def _delta(self, a, b):
+        size, colors = self.size, self.colors
+        va, vb = colors[a], colors[b]
+        ra, ca = divmod(a, size)
+        rb, cb = divmod(b, size)
+        delta = 0
+        if ra != rb:
+            row_a, row_b = self.row_counts[ra], self.row_counts[rb]
+            delta += (row_a[vb] > 0) - (row_a[va] > 1) + (row_b[va] > 0) - (row_b[vb] > 1)
+        if ca != cb:
+            col_a, col_b = self.col_counts[ca], self.col_counts[cb]
+            delta += (col_a[vb] > 0) - (col_a[va] > 1) + (col_b[va] > 0) - (col_b[vb] > 1)
+        return delta
+
+    def _swap(self, a, b):
+        size, colors = self.size, self.colors
+        va, vb = colors[a], colors[b]
+        row_a, row_b = self.row_counts[a // size], self.row_counts[b // size]
+        col_a, col_b = self.col_counts[a % size], self.col_counts[b % size]
+        row_a[va] -= 1
+        row_a[vb] += 1
+        row_b[vb] -= 1
+        row_b[va] += 1
+        col_a[va] -= 1
+        col_a[vb] += 1
+        col_b[vb] -= 1
+        col_b[va] += 1
+        colors[a], colors[b] = vb, va
+
+    def _pick_move(self):
+        """A free cell (in conflict, when one turns up in a few draws) and the
+        cell of its block to swap it with: usually the cheapest swap that keeps
+        both cells within their candidates, sometimes any cell of the block
+        (candidate-keeping swaps alone can't reach every permutation). O(size)."""
+        rng, size, colors, candidates = self.rng, self.size, self.colors, self.candidates
+        row_counts, col_counts = self.row_counts, self.col_counts
+        free_cells = self.free_cells
+        for _ in range(FOCUS_DRAWS):
+            a = rng.choice(free_cells)
+            va = colors[a]
+            if row_counts[a // size][va] > 1 or col_counts[a % size][va] > 1:
+                break
+        block = self.block_free[a]
+        if rng.random() < RANDOM_PARTNER:
+            return a, rng.choice(block)
+
+        bit_a = 1 << va
+        best, partner = None, a
+        for b in block:
+            if b != a and candidates[b] & bit_a and candidates[a] >> colors[b] & 1:
+                delta = self._delta(a, b) + rng.random()  # random tie-break
+                if best is None or delta < best:
+                    best, partner = delta, b
+        return a, partner
+
+    def _initial_temperature(self):
+        deltas = [self._delta(*self._pick_move()) for _ in range(SAMPLE_MOVES)]
+        mean = sum(deltas) / len(deltas)
+        return max(math.sqrt(sum((d - mean) ** 2 for d in deltas) / len(deltas)), 0.1)
+
+    def run(self, max_restarts=10, budget=None, stats=None):
+        """Colors of a solution (a list indexed by cell id), or None when
+        max_restarts runs ended with conflicts left."""
+        if not self.consistent:
+            return None
+        start = time.perf_counter()
+        cost = self._fill()
+        if cost is None or not self.movable or cost == 0:
+            return self.colors if cost == 0 else None
+
+        rng_random, exp = self.rng.random, math.exp
+        chain = len(self.free_cells)
+        while True:
+            temperature = self._initial_temperature()
+            best = cost
+            self.history.append((time.perf_counter() - start, cost))
+            stalled = 0
+            while stalled < STALL_CHAINS:
+                for _ in range(chain):
+                    if budget is not None:
+                        budget.charge()
+                    if stats is not None:
+                        stats.node(0)
+                    self.moves += 1
+                    a, b = self._pick_move()
+                    if a == b:
+                        continue
+                    delta = self._delta(a, b)
+                    if delta <= 0 or rng_random() < exp(-delta / temperature):
+                        self._swap(a, b)
+                        cost += delta
+                        if cost == 0:
+                            self.history.append((time.perf_counter() - start, 0))
+                            return self.colors
+                temperature *= COOLING
+                if cost < best:
+                    best = cost
+                    stalled = 0
+                    self.history.append((time.perf_counter() - start, cost))
+                else:
+                    stalled += 1
+
+            if self.restarts >= max_restarts:
+                return None
+            self.restarts += 1
+            if stats is not None:
+                stats.backtracks += 1
+            cost = self._fill()
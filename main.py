@@ -1,6 +1,11 @@
+import sys
+
 from SudokuGraph import SudokuGraph
 from Window import Window
 
-graph = SudokuGraph(dimension=3)
-window = Window(graph)
-window.run()
\ No newline at end of file
+if __name__ == "__main__":
+    # Dimensão do bloco opcional: python main.py 4 abre um tabuleiro 16x16
+    dimension = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    graph = SudokuGraph(dimension=dimension)
+    window = Window(graph)
+    window.run()
\ No newline at end of file
@@ -0,0 +1,263 @@
+"""Algorithm portfolio: race several solvers, or pick one from board features.
+
+race() runs each solver on a copy of the board in its own process and keeps
+the first decisive answer: a solution, or False from a complete solver (a
+proof that the board has none). The other processes are terminated. An
+incomplete solver (INCOMPLETE_SOLVERS) returning False proves nothing, so
+the race keeps waiting for the others.
+
+SolverSelector picks a single solver without racing. Its features are cheap
+to compute: share of givens, and the candidate distribution left after
+singles propagation (open cells, mean / max candidates, bivalue cells), all
+scaled to the board size; the full propagation would cost more than most
+9x9 solves. It is trained from benchmark.py results (their "puzzle"
+field) and predicts by cost-sensitive nearest neighbors: the solver with the
+lowest mean log time over the K boards with the closest features. Timeouts
+and failures count as TIMEOUT_PENALTY times the slowest time of the
+training set (the PAR10 convention).
+
+    python benchmark.py --json results.json
+    python portfolio.py results.json -o selector.json
+"""
+import argparse
+import json
+import math
+import multiprocessing
+import sys
+import time
+from multiprocessing.connection import wait
+
+from propagation import HIDDEN_SINGLES, NAKED_SINGLES
+
+META_SOLVERS = frozenset({"solve_portfolio"})  # never raced nor selected
+INCOMPLETE_SOLVERS = frozenset({"solve_propagation_only", "solve_local_search"})  # their False proves nothing
+K = 5
+TIMEOUT_PENALTY = 10
+CANCEL_POLL = 0.05  # seconds between checks of a cancel token while racing
+
+FEATURE_TECHNIQUES = (NAKED_SINGLES, HIDDEN_SINGLES)
+FEATURES = ["givens", "open", "mean_candidates", "max_candidates", "bivalue"]
+
+_SELECTORS = {}  # path -> SolverSelector loaded from it
+
+
+def portfolio_solvers(graph):
+    """Method names of the solvers a portfolio chooses from (every complete solve_ method)."""
+    return [name for _, name in graph.get_solver_options()
+            if name not in META_SOLVERS and name not in INCOMPLETE_SOLVERS]
+
+
+def _race_worker(dimension, colors, locked, method_name, time_limit, connection):
+    from SudokuGraph import SudokuGraph
+
+    start = time.perf_counter()
+    try:
+        graph = SudokuGraph(dimension)
+        size = graph.size
+        for cell, color in enumerate(colors):
+            if color:
+                graph.set_color(cell // size, cell % size, color, locked[cell])
+        result = getattr(graph, method_name)(time_limit=time_limit)
+        if result is True:
+            outcome = "solved", graph.get_colors()
+        elif result is False:
+            outcome = "unsolvable", None
+        else:
+            outcome = repr(result).lower(), None  # timed_out / cancelled
+    except Exception as error:  # e.g. a missing optional back-end
+        outcome = f"error: {error}", None
+    connection.send(outcome + (time.perf_counter() - start,))
+
+
+def race(graph, method_names, budget=None):
+    """Races method_names on the board of graph. Returns (winner, status,
+    colors, results): status is "solved" (colors is the solution), "unsolvable"
+    or None when no solver decided; results maps each solver that finished to
+    (status, seconds). Raises BudgetExceeded when the budget runs out first."""
+    colors = graph.get_colors()
+    locked = [vertex.locked for vertex in graph.vertices.values()]
+    time_limit = None if budget is None else budget.remaining()
+    running = {}
+    try:
+        for method_name in method_names:
+            receiver, sender = multiprocessing.Pipe(duplex=False)
+            # daemon: a parent that exits takes the remaining racers with it
+            process = multiprocessing.Process(
+                target=_race_worker, daemon=True,
+                args=(graph.dimension, colors, locked, method_name, time_limit, sender))
+            process.start()
+            sender.close()
+            running[receiver] = (method_name, process)
+
+        results = {}
+        while running:
+            timeout = None
+            if budget is not None:
+                timeout = budget.remaining()
+                if budget.cancel is not None:
+                    timeout = CANCEL_POLL if timeout is None else min(timeout, CANCEL_POLL)
+            ready = wait(list(running), timeout)
+            for receiver in ready:
+                method_name, process = running.pop(receiver)
+                try:
+                    status, solution, elapsed = receiver.recv()
+                except EOFError:  # the process died without answering
+                    status, solution, elapsed = "error: process died", None, 0.0
+                receiver.close()
+                process.join()
+                results[method_name] = (status, elapsed)
+                if status == "solved" or (status == "unsolvable" and method_name not in INCOMPLETE_SOLVERS):
+                    return method_name, status, solution, results
+                if budget is not None:
+                    budget.charge()
+            if budget is not None:
+                budget.check()
+        return None, None, None, results
+    finally:
+        for receiver, (_, process) in running.items():
+            process.terminate()
+        for receiver, (_, process) in running.items():
+            process.join()
+            receiver.close()
+
+
+def board_features(graph):
+    """Feature vector (see FEATURES) of the current board, without changing it."""
+    size = graph.size
+    cells = size * size
+    candidates = [1 << vertex.color if vertex.color else graph.get_candidates_mask(row, col)
+                  for (row, col), vertex in graph.vertices.items()]
+    givens = sum(1 for mask in candidates if not mask & (mask - 1)) / cells
+    if not graph._get_propagator().run(candidates, FEATURE_TECHNIQUES):
+        return [givens, 0.0, 0.0, 0.0, 0.0]  # contradictory: every solver stops at once
+    counts = [bin(mask).count("1") for mask in candidates]
+    open_counts = [count for count in counts if count > 1]
+    if not open_counts:
+        return [givens, 0.0, 0.0, 0.0, 0.0]
+    return [givens,
+            len(open_counts) / cells,
+            sum(open_counts) / len(open_counts) / size,
+            max(open_counts) / size,
+            sum(1 for count in open_counts if count == 2) / len(open_counts)]
+
+
+class SolverSelector:
+    def __init__(self, examples, scales, k=K):
+        self.examples = examples  # (features, {solver: seconds}) per training board
+        self.scales = scales  # standard deviation of each feature over the training boards
+        self.k = k
+
+    @classmethod
+    def train(cls, results, dimension=3, k=K):
+        """Selector built from benchmark.py result records. Records without a
+        puzzle (older result files) and meta / incomplete solvers are skipped."""
+        from SudokuGraph import SudokuGraph
+
+        times = {}
+        for record in results:
+            if "puzzle" not in record or record["solver"] in META_SOLVERS | INCOMPLETE_SOLVERS:
+                continue
+            seconds = record.get("median") if record["status"] == "ok" else None
+            times.setdefault(record["puzzle"], {})[record["solver"]] = seconds
+        if not times:
+            raise ValueError("Nenhum resultado com o campo 'puzzle' para treinar o seletor.")
+
+        slowest = max((s for board in times.values() for s in board.values() if s is not None), default=1.0)
+        graph = SudokuGraph(dimension)
+        examples = []
+        for puzzle, board in times.items():
+            graph.load_from_string(puzzle)
+            penalized = {solver: TIMEOUT_PENALTY * slowest if seconds is None else seconds
+                         for solver, seconds in board.items()}
+            examples.append((board_features(graph), penalized))
+
+        columns = list(zip(*(features for features, _ in examples)))
+        scales = []
+        for column in columns:
+            mean = sum(column) / len(column)
+            scales.append(math.sqrt(sum((x - mean) ** 2 for x in column) / len(column)) or 1.0)
+        return cls(examples, scales, k)
+
+    def _distance(self, a, b):
+        return sum(((x - y) / scale) ** 2 for x, y, scale in zip(a, b, self.scales))
+
+    def rank(self, features, method_names=None):
+        """Solvers (restricted to method_names) sorted by predicted time, as
+        (solver, mean log seconds over the nearest boards)."""
+        nearest = sorted(self.examples, key=lambda example: self._distance(features, example[0]))[:self.k]
+        totals = {}
+        for _, board in nearest:
+            for solver, seconds in board.items():
+                if method_names is None or solver in method_names:
+                    totals.setdefault(solver, []).append(math.log(max(seconds, 1e-6)))
+        # Solvers missing from some neighbors count as timeouts there
+        worst = max((max(logs) for logs in totals.values()), default=0.0)
+        scores = {solver: (sum(logs) + worst * (len(nearest) - len(logs))) / len(nearest)
+                  for solver, logs in totals.items()}
+        return sorted(scores.items(), key=lambda item: item[1])
+
+    def select(self, graph, method_names=None):
+        """Method name of the solver predicted fastest on the current board of graph."""
+        ranking = self.rank(board_features(graph), method_names)
+        if not ranking:
+            raise ValueError("O seletor não conhece nenhum dos solvers pedidos.")
+        return ranking[0][0]
+
+    def save(self, path):
+        document = {"features": FEATURES, "k": self.k, "scales": self.scales,
+                    "examples": [{"features": features, "times": board} for features, board in self.examples]}
+        with open(path, "w") as file:
+            json.dump(document, file, indent=2)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as file:
+            document = json.load(file)
+        examples = [(example["features"], example["times"]) for example in document["examples"]]
+        return cls(examples, document["scales"], document["k"])
+
+
+def get_selector(path):
+    """The SolverSelector saved at path, loaded once per process."""
+    selector = _SELECTORS.get(path)
+    if selector is None:
+        selector = _SELECTORS[path] = SolverSelector.load(path)
+    return selector
+
+
+def leave_one_out(selector):
+    """(hits, total seconds of the picks, total seconds of the best picks) when
+    each training board is predicted by the other boards."""
+    hits, picked_time, best_time = 0, 0.0, 0.0
+    for index, (features, board) in enumerate(selector.examples):
+        others = SolverSelector(selector.examples[:index] + selector.examples[index + 1:],
+                                selector.scales, selector.k)
+        pick = others.rank(features, board)[0][0]
+        best = min(board, key=board.get)
+        hits += pick == best
+        picked_time += board[pick]
+        best_time += board[best]
+    return hits, picked_time, best_time
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Treina o seletor de solvers com resultados do benchmark.py.")
+    parser.add_argument("results", nargs="+", help="arquivos JSON gravados por benchmark.py --json")
+    parser.add_argument("-o", "--output", default="selector.json")
+    parser.add_argument("--dimension", type=int, default=3)
+    parser.add_argument("-k", type=int, default=K, help="tabuleiros vizinhos consultados")
+    args = parser.parse_args(argv)
+
+    from benchmark import load_results
+
+    results = [record for path in args.results for record in load_results(path)]
+    selector = SolverSelector.train(results, args.dimension, args.k)
+    selector.save(args.output)
+    hits, picked_time, best_time = leave_one_out(selector)
+    total = len(selector.examples)
+    print(f"{total} tabuleiros; validação leave-one-out: {hits}/{total} escolhas ótimas, "
+          f"{picked_time:.4f}s escolhido vs {best_time:.4f}s ótimo", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+NAKED_SINGLES = "naked_singles"
+HIDDEN_SINGLES = "hidden_singles"
+NAKED_PAIRS = "naked_pairs"
+HIDDEN_PAIRS = "hidden_pairs"
+POINTING = "pointing"  # pointing pairs/triples and box-line reduction
+
+SINGLES = (NAKED_SINGLES, HIDDEN_SINGLES)
+ALL_TECHNIQUES = (NAKED_SINGLES, HIDDEN_SINGLES, NAKED_PAIRS, HIDDEN_PAIRS, POINTING)
+
+
+class Contradiction(Exception):
+    """Raised internally when a cell or a unit runs out of candidates."""
+
+
+class Propagator:
+    """Constraint propagation over candidate bitmasks (bit c set = color c still possible).
+
+    Works on a list of masks indexed by cell id, in place, using the unit and
+    neighbor structure of a SudokuGraph. Techniques are applied cheapest first
+    and the loop restarts from the singles whenever a technique changes anything.
+    """
+
+    def __init__(self, graph):
+        self.size = graph.size
+        self.full_mask = graph.full_mask
+        self.rows = graph.row_units
+        self.cols = graph.col_units
+        self.blocks = graph.block_units
+        self.units = self.rows + self.cols + self.blocks
+        self.neighbors = graph._get_neighbor_lists()
+        self.cell_rows = [i // self.size for i in range(self.size * self.size)]
+        self.cell_cols = [i % self.size for i in range(self.size * self.size)]
+        self.cell_blocks = list(graph.cell_blocks)
+        self.counts = {}  # progress made by each technique in the last run
+
+    def run(self, candidates, techniques=ALL_TECHNIQUES):
+        """Propagates until nothing changes. Returns False if the candidates are contradictory."""
+        self.counts = dict.fromkeys(techniques, 0)
+        steps = [(name, getattr(self, "_" + name)) for name in ALL_TECHNIQUES
+                 if name in techniques and name != NAKED_SINGLES]
+        propagated = [False] * len(candidates)
+        try:
+            while True:
+                self._naked_singles(candidates, propagated)
+                for name, step in steps:
+                    changes = step(candidates)
+                    if changes:
+                        self.counts[name] += changes
+                        break
+                else:
+                    return True
+        except Contradiction:
+            return False
+
+    def _naked_singles(self, candidates, propagated):
+        # Removes the color of every single-candidate cell from its neighbors
+        neighbors = self.neighbors
+        pending = [i for i, mask in enumerate(candidates) if not propagated[i] and not mask & (mask - 1)]
+        while pending:
+            cell = pending.pop()
+            mask = candidates[cell]
+            if mask == 0:
+                raise Contradiction
+            if propagated[cell]:
+                continue
+            propagated[cell] = True
+            for n in neighbors[cell]:
+                other = candidates[n]
+                if other & mask:
+                    other &= ~mask
+                    candidates[n] = other
+                    if other == 0:
+                        raise Contradiction
+                    if not other & (other - 1):
+                        pending.append(n)
+                        if NAKED_SINGLES in self.counts:
+                            self.counts[NAKED_SINGLES] += 1
+
+    def _hidden_singles(self, candidates):
+        changes = 0
+        for unit in self.units:
+            seen = twice = 0
+            for cell in unit:
+                mask = candidates[cell]
+                twice |= seen & mask
+                seen |= mask
+            if seen != self.full_mask:
+                raise Contradiction  # some color has no place left in this unit
+            singles = seen & ~twice
+            if not singles:
+                continue
+            for cell in unit:
+                mask = candidates[cell] & singles
+                if mask:
+                    if mask & (mask - 1):
+                        raise Contradiction  # two colors can only go in the same cell
+                    if candidates[cell] != mask:
+                        candidates[cell] = mask
+                        changes += 1
+        return changes
+
+    def _naked_pairs(self, candidates):
+        changes = 0
+        for unit in self.units:
+            pairs = {}
+            for cell in unit:
+                mask = candidates[cell]
+                if mask.bit_count() == 2:
+                    pairs.setdefault(mask, []).append(cell)
+            for mask, cells in pairs.items():
+                if len(cells) < 2:
+                    continue
+                if len(cells) > 2:
+                    raise Contradiction
+                for cell in unit:
+                    if cell not in cells and candidates[cell] & mask:
+                        candidates[cell] &= ~mask
+                        if candidates[cell] == 0:
+                            raise Contradiction
+                        changes += 1
+        return changes
+
+    def _hidden_pairs(self, candidates):
+        changes = 0
+        for unit in self.units:
+            # where[c]: bitmask of the positions (within the unit) that still allow color c
+            where = [0] * (self.size + 1)
+            for position, cell in enumerate(unit):
+                mask = candidates[cell]
+                while mask:
+                    bit = mask & -mask
+                    where[bit.bit_length() - 1] |= 1 << position
+                    mask ^= bit
+            twos = [c for c in range(1, self.size + 1) if where[c].bit_count() == 2]
+            for i, first in enumerate(twos):
+                for second in twos[i + 1:]:
+                    if where[first] != where[second]:
+                        continue
+                    pair = (1 << first) | (1 << second)
+                    positions = where[first]
+                    while positions:
+                        bit = positions & -positions
+                        cell = unit[bit.bit_length() - 1]
+                        if candidates[cell] & ~pair:
+                            candidates[cell] &= pair
+                            changes += 1
+                        positions ^= bit
+        return changes
+
+    def _pointing(self, candidates):
+        changes = 0
+        # Pointing: a color confined to one line inside a block leaves the rest of that line.
+        # Box-line reduction: a color confined to one block inside a line leaves the rest of that block.
+        for block in self.blocks:
+            changes += self._confine(candidates, block, self.cell_rows, self.rows)
+            changes += self._confine(candidates, block, self.cell_cols, self.cols)
+        for line in self.rows + self.cols:
+            changes += self._confine(candidates, line, self.cell_blocks, self.blocks)
+        return changes
+
+    def _confine(self, candidates, unit, cell_groups, groups):
+        changes = 0
+        for color in range(1, self.size + 1):
+            bit = 1 << color
+            group = -1
+            for cell in unit:
+                if candidates[cell] & bit:
+                    if group == -1:
+                        group = cell_groups[cell]
+                    elif group != cell_groups[cell]:
+                        break
+            else:
+                if group == -1:
+                    continue
+                for cell in groups[group]:
+                    if cell not in unit and candidates[cell] & bit:
+                        candidates[cell] &= ~bit
+                        if candidates[cell] == 0:
+                            raise Contradiction
+                        changes += 1
+        return changes
@@ -0,0 +1,107 @@
+"""Lazy puzzle readers and result writers for large puzzle files.
+
+Puzzles are yielded one at a time, so files with millions of boards can be
+solved without holding them in memory. Supported inputs are CSV files (the
+puzzle is the first column, a header row is skipped) and the classic
+one-puzzle-per-line text format, where '.' also marks an empty cell. Lines
+may also hold separator-based boards (see SudokuGraph.load_from_string).
+"""
+import csv
+import mmap
+import sys
+import time
+
+from batch import TIMEOUT_ERROR
+
+
+def normalize(puzzle):
+    return puzzle.strip().replace(".", "0")
+
+
+def _is_puzzle(text):
+    # One symbol per cell, or numbers separated by commas/semicolons/spaces (large boards)
+    return any(char.isalnum() for char in text) and all(char.isalnum() or char in ",; " for char in text)
+
+
+def _read_lines(lines):
+    for line in lines:
+        line = normalize(line)
+        if _is_puzzle(line):
+            yield line
+
+
+def _read_csv(lines):
+    for record in csv.reader(lines):
+        if record:
+            puzzle = normalize(record[0])
+            if _is_puzzle(puzzle) and not puzzle.isalpha():  # skips header rows such as "quizzes"
+                yield puzzle
+
+
+def _read_mmap(path):
+    with open(path, "rb") as file:
+        if file.seek(0, 2) == 0:
+            return  # empty files can't be mapped
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            for line in iter(mapped.readline, b""):
+                line = normalize(line.decode("ascii", "replace"))
+                if _is_puzzle(line):
+                    yield line
+
+
+def read_puzzles(source, fmt="auto", use_mmap=False):
+    """Yields the puzzle strings of source, a path or "-" for stdin.
+
+    fmt is "csv", "lines" or "auto" (CSV when the path ends in .csv).
+    use_mmap memory-maps plain-text files instead of reading them through
+    a buffered file object.
+    """
+    if fmt == "auto":
+        fmt = "csv" if str(source).lower().endswith(".csv") else "lines"
+    if fmt not in ("csv", "lines"):
+        raise ValueError(f"Formato desconhecido '{fmt}'. Use 'csv', 'lines' ou 'auto'.")
+
+    if source == "-":
+        yield from (_read_csv if fmt == "csv" else _read_lines)(sys.stdin)
+        return
+    if use_mmap and fmt == "lines":
+        yield from _read_mmap(source)
+        return
+    with open(source, newline="") as file:
+        yield from (_read_csv if fmt == "csv" else _read_lines)(file)
+
+
+class StreamStats:
+    def __init__(self):
+        self.total = 0
+        self.solved = 0
+        self.errors = 0
+        self.timed_out = 0
+        self.solve_time = 0.0  # sum of per-board solver times
+        self.start = time.perf_counter()
+
+    def add(self, result):
+        self.total += 1
+        self.solved += result.solved
+        if result.error == TIMEOUT_ERROR:
+            self.timed_out += 1
+        elif result.error is not None:
+            self.errors += 1
+        self.solve_time += result.elapsed
+
+    def summary(self):
+        wall = time.perf_counter() - self.start
+        rate = self.total / wall if wall > 0 else 0.0
+        return (f"{self.total} puzzles, {self.solved} resolvidos, {self.total - self.solved} falharam "
+                f"({self.errors} inválidos, {self.timed_out} sem tempo) em {wall:.3f}s ({rate:.0f}/s, solver {self.solve_time:.3f}s)")
+
+
+def write_results(results, out, stats=None):
+    """Writes one "puzzle,solution,seconds" CSV line per BatchResult as it arrives."""
+    stats = stats or StreamStats()
+    writer = csv.writer(out, lineterminator="\n")
+    writer.writerow(["puzzle", "solution", "seconds"])
+    for result in results:
+        writer.writerow([result.puzzle, result.solution or "", f"{result.elapsed:.6f}"])
+        stats.add(result)
+    return stats
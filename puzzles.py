@@ -1,5 +1,8 @@
 import random
 
+from canonical import random_transform
+from SudokuGraph import SYMBOLS
+
 PUZZLES = {
     "facil": [
         "080090040009000700106470803000000600803000501002000000601082409005000300090040050",
@@ -42,9 +45,46 @@ PUZZLES = {
     ]
 }
 
-def get_puzzle(difficulty: str):
-    """Retorna uma string de puzzle aleatória para a dificuldade fornecida."""
+# Fração de células preenchidas nos puzzles gerados, por dificuldade
+CLUE_FRACTIONS = {
+    "facil": 0.50,
+    "medio": 0.42,
+    "dificil": 0.36,
+    "muito dificil": 0.32,
+    "expert": 0.28,
+}
+
+
+def generate_givens(dimension: int, clues=None, seed=None):
+    """Gera um puzzle solúvel (não necessariamente com solução única) de qualquer dimensão:
+    uma grade completa embaralhada pelas simetrias do Sudoku, com `clues` células mantidas.
+    Usa um símbolo por célula até 35 cores e números separados por vírgula acima disso."""
+    rng = random.Random(seed)
+    size = dimension * dimension
+    if clues is None:
+        clues = size * size // 3
+
+    # Grade completa válida por construção: cada linha é um deslocamento da anterior
+    grid = [((row % dimension) * dimension + row // dimension + col) % size + 1
+            for row in range(size) for col in range(size)]
+
+    # Embaralha bandas/pilhas, linhas/colunas dentro delas, rótulos e transposição
+    grid = random_transform(dimension, rng).apply(grid)
+
+    kept = set(rng.sample(range(size * size), clues))
+    values = [grid[i] if i in kept else 0 for i in range(size * size)]
+    if size < len(SYMBOLS):
+        return "".join(SYMBOLS[value] for value in values)
+    return ",".join(map(str, values))
+
+
+def get_puzzle(difficulty: str, dimension: int = 3):
+    """Retorna uma string de puzzle aleatória para a dificuldade fornecida.
+    Para dimensões diferentes de 3 o puzzle é gerado por generate_givens."""
     if difficulty not in PUZZLES:
         raise ValueError("Dificuldade inválida. Escolha entre 'facil', 'medio', 'dificil'.")
-    
+
+    if dimension != 3:
+        size = dimension * dimension
+        return generate_givens(dimension, round(CLUE_FRACTIONS[difficulty] * size * size))
     return random.choice(PUZZLES[difficulty])
\ No newline at end of file
@@ -0,0 +1,412 @@
+"""CNF encoding of a Sudoku board and the SAT solvers behind solve_sat.
+
+Variable (cell, color) is numbered cell * size + color (cells 0-based,
+colors 1..size), so it can be read straight back from a model. The clauses
+are the constraints of the ILP and exact cover models: each cell takes
+exactly one color and each color appears exactly once per row, column and
+block. Only candidates left by the givens get clauses, the givens
+themselves become unit clauses, and at-most-one groups larger than
+PAIRWISE_LIMIT use the sequential counter encoding (3n clauses and n
+auxiliary variables instead of n(n-1)/2 clauses).
+
+solve_cnf uses pysat when it is installed and CDCLSolver otherwise, so no
+external process is involved either way.
+"""
+import heapq
+import threading
+
+from budget import TIMED_OUT, BudgetExceeded
+
+try:
+    from pysat.solvers import Solver as PySatSolver
+except ImportError:  # optional: the bundled CDCL solver is used instead
+    PySatSolver = None
+
+PYSAT_SOLVER = "cadical153"
+PAIRWISE_LIMIT = 6  # larger at-most-one groups use the sequential counter
+RESTART_BASE = 100  # conflicts per unit of the Luby restart sequence
+ACTIVITY_DECAY = 0.95
+
+
+class CNF:
+    """Clauses over variables 1..n_vars, as lists of signed ints (DIMACS style)."""
+
+    def __init__(self, n_vars=0):
+        self.n_vars = n_vars
+        self.clauses = []
+
+    def new_var(self):
+        self.n_vars += 1
+        return self.n_vars
+
+    def add(self, clause):
+        self.clauses.append(clause)
+
+    def exactly_one(self, literals):
+        self.add(list(literals))
+        self.at_most_one(literals)
+
+    def at_most_one(self, literals):
+        n = len(literals)
+        if n <= PAIRWISE_LIMIT:
+            for i in range(n):
+                for j in range(i + 1, n):
+                    self.add([-literals[i], -literals[j]])
+            return
+        # Sequential counter (Sinz 2005): s_i is true once one of x_1..x_i is
+        previous = self.new_var()
+        self.add([-literals[0], previous])
+        for x in literals[1:-1]:
+            current = self.new_var()
+            self.add([-x, current])
+            self.add([-previous, current])
+            self.add([-x, -previous])
+            previous = current
+        self.add([-literals[-1], -previous])
+
+
+def encode(graph, candidates=None):
+    """CNF of the board of graph. candidates (a bitmask per cell id, e.g. from
+    graph.propagate()) defaults to the masks left by the locked cells; a cell
+    with a single candidate counts as a given. Returns None when some cell or
+    unit is left without a place for a color."""
+    size = graph.size
+    if candidates is None:
+        candidates = graph._locked_candidates()
+
+    cnf = CNF(size ** 3)
+    for cell, mask in enumerate(candidates):
+        literals = [cell * size + color for color in range(1, size + 1) if mask >> color & 1]
+        if not literals:
+            return None
+        if len(literals) == 1:
+            cnf.add(literals)  # given
+        else:
+            cnf.exactly_one(literals)
+
+    for unit in graph.row_units + graph.col_units + graph.block_units:
+        for color in range(1, size + 1):
+            bit = 1 << color
+            places = [cell * size + color for cell in unit if candidates[cell] & bit]
+            if not places:
+                return None
+            if len(places) > 1:
+                cnf.exactly_one(places)
+            elif candidates[(places[0] - color) // size] != bit:
+                cnf.add(places)  # the color's only place in the unit
+    return cnf
+
+
+def solve_cnf(cnf, budget=None, stats=None):
+    """Model of cnf as a list of booleans indexed by variable (index 0 unused),
+    or None if it is unsatisfiable."""
+    if PySatSolver is not None:
+        return _solve_pysat(cnf, budget, stats)
+    solver = CDCLSolver(cnf.n_vars)
+    for clause in cnf.clauses:
+        solver.add_clause(clause)
+    try:
+        found = solver.solve(budget, stats)
+    finally:
+        if stats is not None:
+            stats.details["sat_solver"] = "cdcl"
+            stats.details["sat_variables"] = cnf.n_vars
+            stats.details["sat_clauses"] = len(cnf.clauses)
+            stats.details["sat_learnt"] = len(solver.clauses) - solver.n_original
+            stats.details["sat_restarts"] = solver.restarts
+    return solver.model() if found else None
+
+
+def _solve_pysat(cnf, budget, stats):
+    with PySatSolver(name=PYSAT_SOLVER, bootstrap_with=cnf.clauses) as sat_solver:
+        try:
+            found = _run_pysat(sat_solver, budget)
+        finally:
+            if stats is not None:
+                # Search counters are only readable once the solver stopped,
+                # so they are added in one go (no progress callbacks)
+                counters = sat_solver.accum_stats() or {}
+                stats.nodes += counters.get("decisions", 0)
+                stats.backtracks += counters.get("conflicts", 0)
+                stats.details["sat_solver"] = PYSAT_SOLVER
+                stats.details["sat_variables"] = cnf.n_vars
+                stats.details["sat_clauses"] = len(cnf.clauses)
+                stats.details["sat_restarts"] = counters.get("restarts", 0)
+        if not found:
+            return None
+        model = [False] * (cnf.n_vars + 1)
+        for literal in sat_solver.get_model():
+            if 0 < literal <= cnf.n_vars:
+                model[literal] = True
+        return model
+
+
+def _run_pysat(sat_solver, budget):
+    if budget is None:
+        return sat_solver.solve()
+    # The solver runs in C and can't charge the budget: a timer
+    # thread interrupts it at the deadline or on cancellation
+    budget.check()
+    done = threading.Event()
+
+    def watch():
+        while not done.wait(0.05):
+            try:
+                budget.check()
+            except BudgetExceeded:
+                sat_solver.interrupt()
+                return
+
+    watcher = threading.Thread(target=watch, daemon=True)
+    watcher.start()
+    try:
+        found = sat_solver.solve_limited(expect_interrupt=True)
+    finally:
+        done.set()
+        watcher.join()
+    if found is None:
+        budget.check()
+        raise BudgetExceeded(TIMED_OUT)
+    return found
+
+
+def _luby(i):
+    """i-th term (1-based) of the Luby sequence 1, 1, 2, 1, 1, 2, 4, ..."""
+    while True:
+        k = i.bit_length()
+        if i == (1 << k) - 1:
+            return 1 << (k - 1)
+        i -= (1 << (k - 1)) - 1
+
+
+class CDCLSolver:
+    """Conflict-driven clause learning SAT solver in pure Python.
+
+    Two watched literals per clause for unit propagation, first-UIP conflict
+    analysis with non-chronological backjumping, VSIDS-style variable
+    activities (kept in a lazy heap), phase saving and Luby restarts.
+    Learnt clauses are never deleted: Sudoku instances need few of them.
+
+    Literals are signed ints; watch lists are indexed by 2 * var + (literal < 0).
+    The first literal of a reason clause is the one it implied.
+    """
+
+    def __init__(self, n_vars):
+        self.n_vars = n_vars
+        self.clauses = []
+        self.n_original = 0
+        self.watches = [[] for _ in range(2 * n_vars + 2)]
+        self.values = [0] * (n_vars + 1)  # 1 true, -1 false, 0 unassigned
+        self.levels = [0] * (n_vars + 1)
+        self.reasons = [None] * (n_vars + 1)  # clause index, None for decisions
+        self.activity = [0.0] * (n_vars + 1)
+        self.phases = [-1] * (n_vars + 1)
+        self.heap = [(0.0, var) for var in range(1, n_vars + 1)]
+        self.increment = 1.0
+        self.trail = []
+        self.trail_lim = []  # trail position where each decision level starts
+        self.queue_head = 0
+        self.units = []
+        self.ok = True
+        self.decisions = 0
+        self.conflicts = 0
+        self.restarts = 0
+
+    def add_clause(self, literals):
+        literals = list(dict.fromkeys(literals))
+        if any(-literal in literals for literal in literals):
+            return  # tautology
+        if not literals:
+            self.ok = False
+        elif len(literals) == 1:
+            self.units.append(literals[0])
+        else:
+            self._attach(literals)
+            self.n_original += 1
+
+    def _attach(self, literals):
+        index = len(self.clauses)
+        self.clauses.append(literals)
+        self.watches[_watch(literals[0])].append(index)
+        self.watches[_watch(literals[1])].append(index)
+        return index
+
+    def _assign(self, literal, reason):
+        var = abs(literal)
+        self.values[var] = 1 if literal > 0 else -1
+        self.levels[var] = len(self.trail_lim)
+        self.reasons[var] = reason
+        self.trail.append(literal)
+
+    def _propagate(self):
+        """Unit propagation of the trail; returns a conflicting clause index or None."""
+        values, clauses, watches, trail = self.values, self.clauses, self.watches, self.trail
+        while self.queue_head < len(trail):
+            false_literal = -trail[self.queue_head]
+            self.queue_head += 1
+            watch_list = watches[_watch(false_literal)]
+            i = j = 0
+            end = len(watch_list)
+            while i < end:
+                index = watch_list[i]
+                i += 1
+                clause = clauses[index]
+                if clause[0] == false_literal:
+                    clause[0], clause[1] = clause[1], false_literal
+                first = clause[0]
+                value = values[first] if first > 0 else -values[-first]
+                if value == 1:
+                    watch_list[j] = index
+                    j += 1
+                    continue
+                # Look for a literal that isn't false to watch instead
+                for k in range(2, len(clause)):
+                    literal = clause[k]
+                    if (values[literal] if literal > 0 else -values[-literal]) != -1:
+                        clause[1], clause[k] = literal, false_literal
+                        watches[_watch(literal)].append(index)
+                        break
+                else:
+                    watch_list[j] = index
+                    j += 1
+                    if value == -1:
+                        while i < end:
+                            watch_list[j] = watch_list[i]
+                            i += 1
+                            j += 1
+                        del watch_list[j:]
+                        self.queue_head = len(trail)
+                        return index
+                    self._assign(first, index)
+            del watch_list[j:]
+        return None
+
+    def _analyze(self, conflict):
+        """First-UIP learnt clause (asserting literal first, then the literal of
+        the highest remaining level) and the level to backjump to."""
+        levels, reasons, trail = self.levels, self.reasons, self.trail
+        level = len(self.trail_lim)
+        learnt = [None]
+        seen = set()
+        pending = 0  # literals of the current level still to resolve
+        position = len(trail) - 1
+        clause = self.clauses[conflict]
+        literal = None
+        while True:
+            for q in (clause if literal is None else clause[1:]):
+                var = abs(q)
+                if var not in seen and levels[var] > 0:
+                    seen.add(var)
+                    self._bump(var)
+                    if levels[var] == level:
+                        pending += 1
+                    else:
+                        learnt.append(q)
+            while abs(trail[position]) not in seen:
+                position -= 1
+            literal = trail[position]
+            position -= 1
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self.clauses[reasons[abs(literal)]]
+        learnt[0] = -literal
+
+        if len(learnt) == 1:
+            return learnt, 0
+        highest = max(range(1, len(learnt)), key=lambda k: levels[abs(learnt[k])])
+        learnt[1], learnt[highest] = learnt[highest], learnt[1]
+        return learnt, levels[abs(learnt[1])]
+
+    def _bump(self, var):
+        self.activity[var] += self.increment
+        if self.activity[var] > 1e100:
+            self.activity = [a * 1e-100 for a in self.activity]
+            self.increment *= 1e-100
+            self._rebuild_heap()
+
+    def _rebuild_heap(self):
+        self.heap = [(-self.activity[var], var) for var in range(1, self.n_vars + 1) if not self.values[var]]
+        heapq.heapify(self.heap)
+
+    def _backtrack(self, level):
+        if len(self.trail_lim) <= level:
+            return
+        start = self.trail_lim[level]
+        values, activity, heap = self.values, self.activity, self.heap
+        for literal in self.trail[start:]:
+            var = abs(literal)
+            self.phases[var] = values[var]
+            values[var] = 0
+            self.reasons[var] = None
+            heapq.heappush(heap, (-activity[var], var))
+        del self.trail[start:]
+        del self.trail_lim[level:]
+        self.queue_head = start
+        if len(heap) > 4 * self.n_vars:
+            self._rebuild_heap()  # drop the stale entries
+
+    def _pick(self):
+        """Unassigned variable of highest activity, or None when all are assigned.
+        The heap may hold stale entries; any unassigned one is good enough."""
+        heap, values = self.heap, self.values
+        while heap:
+            var = heapq.heappop(heap)[1]
+            if not values[var]:
+                return var
+        return None
+
+    def solve(self, budget=None, stats=None):
+        """True if satisfiable (the assignment is then in model()), False if not.
+        Every decision and conflict charges budget; stats counts decisions as
+        nodes and conflicts as backtracks."""
+        if not self.ok:
+            return False
+        for literal in self.units:
+            value = self.values[abs(literal)] * (1 if literal > 0 else -1)
+            if value == -1:
+                return False
+            if value == 0:
+                self._assign(literal, None)
+
+        restart_limit = RESTART_BASE * _luby(1)
+        since_restart = 0
+        while True:
+            conflict = self._propagate()
+            if conflict is not None:
+                self.conflicts += 1
+                if stats is not None:
+                    stats.backtracks += 1
+                if not self.trail_lim:
+                    return False
+                learnt, level = self._analyze(conflict)
+                self._backtrack(level)
+                self._assign(learnt[0], self._attach(learnt) if len(learnt) > 1 else None)
+                self.increment /= ACTIVITY_DECAY
+                if budget is not None:
+                    budget.charge()
+                since_restart += 1
+                if since_restart >= restart_limit:
+                    self.restarts += 1
+                    since_restart = 0
+                    restart_limit = RESTART_BASE * _luby(self.restarts + 1)
+                    self._backtrack(0)
+                continue
+
+            var = self._pick()
+            if var is None:
+                return True
+            self.decisions += 1
+            self.trail_lim.append(len(self.trail))
+            if stats is not None:
+                stats.node(len(self.trail_lim))
+            if budget is not None:
+                budget.charge()
+            self._assign(var if self.phases[var] > 0 else -var, None)
+
+    def model(self):
+        return [value > 0 for value in self.values]
+
+
+def _watch(literal):
+    return 2 * literal if literal > 0 else -2 * literal + 1
@@ -0,0 +1,252 @@
+"""Asyncio solving service: JSON lines over TCP or stdin/stdout.
+
+Each request is one line, either a bare puzzle string or a JSON object
+{"id": ..., "puzzle": "...", "solver": "solve_sat"} (id and solver are
+optional; solver must be one of SudokuGraph.get_solver_options()). Each
+response is one JSON line {"id", "solution", "solved", "error",
+"solve_time", "latency"}, written as soon as its puzzle is solved, so
+responses may come back in a different order than the requests.
+
+Requests from every connection share one queue. A batcher task coalesces
+them into micro-batches (up to max_batch requests, waiting at most
+max_delay seconds for a batch to fill) and runs each batch in a pool of
+worker processes that each hold a pre-built SudokuGraph (see batch.py).
+Backpressure: at most two batches per worker are in the pool, the queue
+holds at most max_pending requests (further requests are answered at once
+with error OVERLOADED_ERROR), and each connection has at most max_in_flight
+unanswered requests (reading from it pauses until one is answered).
+
+    python service.py --port 8765 --solver solve_dancing_links --workers 8
+    python service.py --stdio < puzzles.txt
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from batch import BatchResult, _init_worker, _solve_chunk
+from puzzle_stream import normalize
+from SudokuGraph import SudokuGraph
+
+OVERLOADED_ERROR = "overloaded"  # error of a request refused because the queue was full
+
+
+class SolverService:
+    def __init__(self, solver_name="solve_dancing_links", dimension=3, workers=None, max_batch=32,
+                 max_delay=0.002, max_pending=1024, max_in_flight=128, time_limit=None):
+        self.solvers = {name for _, name in SudokuGraph(dimension).get_solver_options()}
+        if solver_name not in self.solvers:
+            raise ValueError(f"Solver desconhecido '{solver_name}'. Opções: {', '.join(sorted(self.solvers))}")
+        self.solver_name = solver_name
+        self.dimension = dimension
+        self.workers = workers or os.cpu_count() or 1
+        self.max_batch = max_batch
+        self.max_delay = max_delay  # seconds a batch waits for more requests
+        self.max_pending = max_pending
+        self.max_in_flight = max_in_flight
+        self.time_limit = time_limit  # seconds per puzzle
+        self.requests = 0
+        self.batches = 0
+        self.rejected = 0
+        self._executor = None
+        self._queue = None
+        self._slots = None
+        self._batcher = None
+        self._running = set()
+
+    async def start(self):
+        self._executor = ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=(self.dimension,))
+        self._queue = asyncio.Queue(self.max_pending)
+        self._slots = asyncio.Semaphore(2 * self.workers)  # batches in the pool
+        self._batcher = asyncio.create_task(self._run_batcher())
+
+    async def close(self):
+        self._batcher.cancel()
+        await asyncio.gather(self._batcher, *self._running, return_exceptions=True)
+        await asyncio.to_thread(self._executor.shutdown, wait=True, cancel_futures=True)
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def solve(self, puzzle, solver_name=None):
+        """Response dict (without id) of one puzzle string."""
+        start = time.perf_counter()
+        solver_name = solver_name or self.solver_name
+        if solver_name not in self.solvers:
+            return _response(None, f"Solver desconhecido '{solver_name}'.", 0.0, start)
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((solver_name, normalize(puzzle), future))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            return _response(None, OVERLOADED_ERROR, 0.0, start)
+        self.requests += 1
+        result = await future
+        return _response(result.solution, result.error, result.elapsed, start)
+
+    async def _run_batcher(self):
+        loop = asyncio.get_running_loop()
+        queue = self._queue
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_batch:
+                if not queue.empty():
+                    batch.append(queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            by_solver = {}
+            for solver_name, puzzle, future in batch:
+                by_solver.setdefault(solver_name, []).append((puzzle, future))
+            for solver_name, items in by_solver.items():
+                await self._slots.acquire()  # waits while the pool is busy, so the queue fills up
+                task = asyncio.create_task(self._run_batch(solver_name, items))
+                self._running.add(task)
+                task.add_done_callback(self._running.discard)
+
+    async def _run_batch(self, solver_name, items):
+        loop = asyncio.get_running_loop()
+        chunk = [(index, puzzle) for index, (puzzle, _) in enumerate(items)]
+        self.batches += 1
+        try:
+            results = await loop.run_in_executor(self._executor, _solve_chunk, chunk, solver_name, self.time_limit)
+        except Exception as error:  # a worker process died, or the batch couldn't be sent or run
+            message = f"Falha no pool de workers: {type(error).__name__}: {error}"
+            for index, (puzzle, future) in enumerate(items):
+                if not future.done():
+                    future.set_result(BatchResult(index, puzzle, None, False, 0.0, message))
+        else:
+            for result, (_, future) in zip(results, items):
+                if not future.done():  # the client may have gone away
+                    future.set_result(result)
+        finally:
+            self._slots.release()
+
+    async def handle_lines(self, readline, write):
+        """Answers the JSON-lines requests read with readline() (an awaitable
+        returning '' or b'' at the end) through write(text) (an awaitable)."""
+        in_flight = asyncio.Semaphore(self.max_in_flight)
+        tasks = set()
+        number = 0
+
+        def finished(task):
+            tasks.discard(task)
+            in_flight.release()
+
+        while True:
+            line = await readline()
+            if not line:
+                break
+            text = line.decode() if isinstance(line, bytes) else line
+            text = text.strip()
+            if not text:
+                continue
+            number += 1
+            await in_flight.acquire()
+            task = asyncio.create_task(self._answer(text, number, write))
+            tasks.add(task)
+            task.add_done_callback(finished)
+        await asyncio.gather(*tasks)
+
+    async def _answer(self, text, number, write):
+        request_id = number
+        try:
+            if text.startswith("{"):
+                request = json.loads(text)
+                request_id = request.get("id", number)
+                response = await self.solve(request["puzzle"], request.get("solver"))
+            else:
+                response = await self.solve(text)
+        except (ValueError, KeyError, TypeError, AttributeError) as error:
+            response = _response(None, f"Requisição inválida: {error}", 0.0, time.perf_counter())
+        await write(json.dumps({"id": request_id, **response}) + "\n")
+
+    async def serve_tcp(self, host="127.0.0.1", port=8765):
+        """Starts the TCP server and returns it (an asyncio.Server)."""
+        async def handle(reader, writer):
+            async def write(text):
+                writer.write(text.encode())
+                await writer.drain()
+
+            try:
+                await self.handle_lines(reader.readline, write)
+            except (ConnectionError, asyncio.CancelledError):  # client gone, or the server is shutting down
+                pass
+            finally:
+                writer.close()
+
+        return await asyncio.start_server(handle, host, port, limit=2 ** 20)
+
+    async def serve_stdio(self):
+        """Answers the requests of stdin on stdout until stdin ends."""
+        async def readline():
+            return await asyncio.to_thread(sys.stdin.readline)
+
+        async def write(text):
+            sys.stdout.write(text)
+            sys.stdout.flush()
+
+        await self.handle_lines(readline, write)
+
+    def summary(self):
+        return f"requisições: {self.requests}, lotes: {self.batches}, recusadas: {self.rejected}"
+
+
+def _response(solution, error, solve_time, start):
+    return {"solution": solution, "solved": solution is not None, "error": error,
+            "solve_time": solve_time, "latency": time.perf_counter() - start}
+
+
+async def _serve(args):
+    service = SolverService(args.solver, args.dimension, args.workers, args.max_batch, args.max_delay,
+                            args.max_pending, args.max_in_flight, args.time_limit)
+    async with service:
+        if args.stdio:
+            await service.serve_stdio()
+        else:
+            server = await service.serve_tcp(args.host, args.port)
+            print(f"Servindo em {args.host}:{args.port}", file=sys.stderr)
+            try:
+                async with server:
+                    await server.serve_forever()
+            except asyncio.CancelledError:
+                pass
+    print(service.summary(), file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serviço de resolução de Sudoku (JSON por linha).")
+    parser.add_argument("--stdio", action="store_true", help="lê requisições do stdin e responde no stdout")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--solver", default="solve_dancing_links", help="método solve_ padrão do SudokuGraph")
+    parser.add_argument("--dimension", type=int, default=3)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--max-batch", type=int, default=32, help="requisições por lote")
+    parser.add_argument("--max-delay", type=float, default=0.002, help="espera máxima para completar um lote (s)")
+    parser.add_argument("--max-pending", type=int, default=1024, help="requisições na fila antes de recusar")
+    parser.add_argument("--max-in-flight", type=int, default=128, help="requisições sem resposta por conexão")
+    parser.add_argument("--time-limit", type=float, help="limite de tempo por puzzle, em segundos")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
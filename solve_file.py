@@ -0,0 +1,38 @@
+"""Solves a puzzle file (or stdin) from the command line, without starting the GUI.
+
+    python solve_file.py puzzles.csv -o solutions.csv --solver solve_dancing_links --workers 8
+"""
+import argparse
+import sys
+
+from batch import solve_batch
+from puzzle_stream import read_puzzles, write_results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Resolve puzzles de um arquivo em streaming.")
+    parser.add_argument("input", help="arquivo de puzzles (CSV ou um por linha), ou - para stdin")
+    parser.add_argument("-o", "--output", default="-", help="arquivo de saída (padrão: stdout)")
+    parser.add_argument("--solver", default="solve_dancing_links", help="método solve_ do SudokuGraph")
+    parser.add_argument("--format", default="auto", choices=["auto", "csv", "lines"])
+    parser.add_argument("--mmap", action="store_true", help="lê arquivos de texto via mmap")
+    parser.add_argument("--dimension", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--chunksize", type=int, default=256)
+    parser.add_argument("--time-limit", type=float, help="limite de tempo por puzzle, em segundos")
+    args = parser.parse_args(argv)
+
+    puzzles = read_puzzles(args.input, args.format, args.mmap)
+    results = solve_batch(puzzles, args.solver, args.dimension, args.workers, args.chunksize,
+                          time_limit=args.time_limit)
+    out = sys.stdout if args.output == "-" else open(args.output, "w", newline="")
+    try:
+        stats = write_results(results, out)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(stats.summary(), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
-import math
+import os
+import tempfile
 import time
 
-from scipy.stats import norm
 from SudokuGraph import SudokuGraph  # Assuming this class is in SudokuGraph.py
 
 easy_boards = [
@@ -52,70 +52,844 @@ all_difficulties = {
     "Expert": expert_boards,
 }
 
-def z_test_series(values):
-    if len(values) <= 1:
-        return [(0, 1.0)] * len(values)
-    
-    mean = sum(values) / len(values)
-    std_dev = math.sqrt(sum((x - mean) ** 2 for x in values) / (len(values) - 1))
-    
-    results = []
-    for x in values:
-        if std_dev == 0:
-            z = 0
-            p = 1.0
-        else:
-            z = (x - mean) / std_dev
-            p = 2 * (1 - norm.cdf(abs(z)))
-        results.append((z, p))
+def run_tests(method_names=None, timeout=10.0):
+    """Benchmarks every solver on every board (see benchmark.py) and prints the summary table."""
+    from benchmark import BenchmarkConfig, print_summary, run_suite
+
+    boards = [(f"{difficulty}_{i + 1}", difficulty, board)
+              for difficulty, boards in all_difficulties.items() for i, board in enumerate(boards)]
+
+    def progress(record):
+        median = f"{record['median']:.6f}s" if "median" in record else "-"
+        print(f"{record['solver']}\t{record['board']}\t{record['status']}\t{median}")
+
+    results = run_suite(boards, method_names, BenchmarkConfig(timeout=timeout), progress=progress)
+    print("\n=== Summary Table (median time [95% CI] per algorithm) ===")
+    print_summary(results)
     return results
 
-def run_tests():
+def time_solver_on_boards(graph, method_name, boards):
+    total = 0.0
+    for board in boards:
+        graph.load_from_string(board)
+        start = time.perf_counter()
+        result = getattr(graph, method_name)()
+        total += time.perf_counter() - start
+        if not result or not graph.is_valid_coloring():
+            print(f"[!] {method_name} failed to solve {board}")
+    return total
+
+def run_bitmask_comparison(method_names=("solve_brute_force", "solve_dsatur_backtracking")):
+    """Compares the neighbor-scan validity checks with the unit bitmasks, per difficulty."""
+    scan_graph = SudokuGraph(use_bitmasks=False)
+    mask_graph = SudokuGraph(use_bitmasks=True)
+
+    for method_name in method_names:
+        print(f"\n=== Bitmask speedup: {method_name} ===")
+        print("\t".join(["Difficulty", "Neighbor scan", "Bitmasks", "Speedup"]))
+        for difficulty, boards in all_difficulties.items():
+            scan_time = time_solver_on_boards(scan_graph, method_name, boards)
+            mask_time = time_solver_on_boards(mask_graph, method_name, boards)
+            speedup = scan_time / mask_time if mask_time > 0 else float("inf")
+            print(f"{difficulty}\t{scan_time:.6f}\t{mask_time:.6f}\t{speedup:.2f}x")
+
+def run_construction_benchmark(dimensions=range(2, 9)):
+    """Construction time and retained memory of SudokuGraph, per dimension and storage mode."""
+    import tracemalloc
+
+    print("\n=== Graph construction (time / retained memory) ===")
+    print("\t".join(["Dimension", "Cells", "Default time", "Default MB", "Compact time", "Compact MB"]))
+    for dimension in dimensions:
+        row = [str(dimension), str(dimension ** 4)]
+        for compact in (False, True):
+            start = time.perf_counter()
+            SudokuGraph(dimension, compact=compact)
+            elapsed = time.perf_counter() - start
+
+            tracemalloc.start()
+            graph = SudokuGraph(dimension, compact=compact)
+            retained, _ = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            del graph
+            row += [f"{elapsed:.6f}", f"{retained / 2 ** 20:.2f}"]
+        print("\t".join(row))
+
+def run_dsatur_comparison():
+    """Node counts and time of the recursive and the incremental DSATUR on every board."""
+    graph = SudokuGraph()
+    methods = ("solve_dsatur_backtracking", "solve_dsatur_incremental")
+
+    print("\n=== DSATUR: recursive vs incremental ===")
+    print("\t".join(["Board", "Recursive nodes", "Recursive time", "Incremental nodes", "Incremental time"]))
+    for difficulty, boards in all_difficulties.items():
+        for i, board in enumerate(boards):
+            row = [f"{difficulty}_{i + 1}"]
+            for method_name in methods:
+                graph.load_from_string(board)
+                start = time.perf_counter()
+                result = getattr(graph, method_name)()
+                elapsed = time.perf_counter() - start
+                if not result:
+                    print(f"[!] {method_name} failed to solve {board}")
+                row += [str(graph.nodes_visited), f"{elapsed:.6f}"]
+            print("\t".join(row))
+
+def run_propagation_report():
+    """Cells resolved by propagation per board and its effect on the ILP model size."""
     graph = SudokuGraph()
-    solver_options = graph.get_solver_options()
 
-    summary = {}
+    print("\n=== Constraint propagation pre-pass ===")
+    print("\t".join(["Board", "Empty Cells", "Resolved", "Needs search", "ILP vars", "ILP vars (propagated)"]))
+    for difficulty, boards in all_difficulties.items():
+        for i, board in enumerate(boards):
+            graph.load_from_string(board)
+            solved = graph.solve_propagation_only()
+            resolved = graph.propagation_resolved
 
-    for display_name, method_name in solver_options:
-        print(f"\n=== Testing Solver: {display_name} ===")
+            model_sizes = []
+            for propagate in (False, True):
+                graph.load_from_string(board)
+                if not graph.solve_integer_programming(propagate=propagate):
+                    print(f"[!] solve_integer_programming failed to solve {board}")
+                model_sizes.append(str(graph.ilp_model_size[0]))
+            print("\t".join([f"{difficulty}_{i + 1}", str(board.count("0")), str(resolved),
+                             "no" if solved else "yes"] + model_sizes))
+
+def run_ilp_timings():
+    """Splits the ILP time into model build, bounds update, CBC invocation and extraction."""
+    graph = SudokuGraph()
+    stages = ("build", "bounds", "solve", "extract")
+
+    print("\n=== ILP stage timings (seconds) ===")
+    print("\t".join(["Board"] + list(stages)))
+    for difficulty, boards in all_difficulties.items():
+        for i, board in enumerate(boards):
+            graph.load_from_string(board)
+            if not graph.solve_integer_programming():
+                print(f"[!] solve_integer_programming failed to solve {board}")
+            timings = graph.ilp_timings
+            print("\t".join([f"{difficulty}_{i + 1}"] + [f"{timings.get(stage, 0.0):.6f}" for stage in stages]))
+
+def run_batch_scaling(method_name="solve_dancing_links", copies=40):
+    """Throughput of batch.solve_batch as the number of worker processes grows."""
+    import os
+    from batch import solve_batch
+
+    puzzles = [board for boards in all_difficulties.values() for board in boards] * copies
+    counts = sorted({1, 2, 4, 8, 16, 32, os.cpu_count() or 1})
+
+    print(f"\n=== Batch scaling: {method_name}, {len(puzzles)} boards ===")
+    print("\t".join(["Workers", "Time", "Boards/s", "Speedup"]))
+    base = None
+    for workers in counts:
+        start = time.perf_counter()
+        results = list(solve_batch(puzzles, method_name, workers=workers, chunksize=32))
+        elapsed = time.perf_counter() - start
+        failed = sum(1 for result in results if not result.solved)
+        if failed:
+            print(f"[!] {failed} boards failed with {workers} workers")
+        base = base or elapsed
+        print(f"{workers}\t{elapsed:.3f}\t{len(puzzles) / elapsed:.0f}\t{base / elapsed:.2f}x")
+
+# A cache miss (lookup, solve, store) may cost at most this multiple of the uncached solve
+MAX_MISS_OVERHEAD = 2.0
+
+def run_cache_benchmark(method_name="solve_dsatur_incremental", variants=3):
+    """Time of a miss, an exact repeat and a symmetric variant through the solution cache."""
+    import random
+    from canonical import SolutionCache, random_transform
+
+    rng = random.Random(0)
+    cache = SolutionCache()
+    graph = SudokuGraph(solution_cache=cache)
+    uncached = SudokuGraph()
+    totals = {"uncached": [], "miss": [], "repeat": [], "variant": []}
+
+    def timed(kind, puzzle, target=graph):
+        target.load_from_string(puzzle)
+        start = time.perf_counter()
+        result = getattr(target, method_name)()
+        totals[kind].append(time.perf_counter() - start)
+        if not result or not target.is_valid_coloring():
+            print(f"[!] {method_name} failed on {puzzle} ({kind})")
+
+    for boards in all_difficulties.values():
+        for board in boards:
+            grid = [int(char) for char in board]
+            timed("uncached", board, uncached)
+            timed("miss", board)
+            timed("repeat", board)
+            for _ in range(variants):
+                variant = random_transform(graph.dimension, rng).apply(grid)
+                timed("variant", "".join(map(str, variant)))
+
+    print(f"\n=== Solution cache: {method_name} ===")
+    print("\t".join(["Lookup", "Count", "Average time"]))
+    for kind, times in totals.items():
+        if times:
+            print(f"{kind}\t{len(times)}\t{sum(times) / len(times) * 1e6:.1f}us")
+    print(cache.stats())
+    if sum(totals["miss"]) > MAX_MISS_OVERHEAD * sum(totals["uncached"]):
+        print(f"[!] a cache miss costs more than {MAX_MISS_OVERHEAD}x the uncached solve")
+
+# Time limit (seconds) of each solver in the scaling benchmark
+SCALING_TIME_LIMITS = {
+    "solve_brute_force": 5.0,
+    "solve_dsatur_backtracking": 10.0,
+    "solve_integer_programming": 30.0,
+}
+DEFAULT_TIME_LIMIT = 20.0
+
+def run_scaling_benchmark(dimensions=range(2, 7), boards_per_dimension=3):
+    """Every solver on generated givens of each dimension, with per-solver time limits."""
+    from benchmark import solve_with_time_limit
+    from puzzles import generate_givens
+
+    method_names = [name for _, name in SudokuGraph().get_solver_options()]
+    print("\n=== Scaling benchmark (median seconds, solved/boards) ===")
+    print("\t".join(["Dimension", "Size"] + method_names))
+    for dimension in dimensions:
+        size = dimension * dimension
+        puzzles = [generate_givens(dimension, round(0.4 * size * size), seed=seed)
+                   for seed in range(boards_per_dimension)]
+        row = [str(dimension), f"{size}x{size}"]
+        for method_name in method_names:
+            limit = SCALING_TIME_LIMITS.get(method_name, DEFAULT_TIME_LIMIT)
+            outcomes = [solve_with_time_limit(dimension, puzzle, method_name, limit) for puzzle in puzzles]
+            median = sorted(elapsed for _, elapsed in outcomes)[len(outcomes) // 2]
+            solved = sum(1 for status, _ in outcomes if status == "ok")
+            median_text = f">{limit:.0f}s" if median >= limit else f"{median:.4f}"
+            row.append(f"{median_text} ({solved}/{len(puzzles)})")
+        print("\t".join(row))
+
+def run_instrumentation_report(method_names=None):
+    """Search counters (see instrumentation.SolverStats) of every solver on every board."""
+    from instrumentation import SolverStats
+
+    graph = SudokuGraph()
+    method_names = method_names or [name for _, name in graph.get_solver_options()]
+    columns = ["nodes", "backtracks", "max_depth", "validity_checks", "select_time", "validate_time", "elapsed"]
+
+    print("\n=== Search instrumentation ===")
+    print("\t".join(["Solver", "Board"] + columns))
+    for method_name in method_names:
         for difficulty, boards in all_difficulties.items():
             for i, board in enumerate(boards):
-                board_name = f"{difficulty}_{i + 1}"
-                times = []
-                for attempt in range(10):
+                graph.load_from_string(board)
+                stats = SolverStats()
+                if not getattr(graph, method_name)(stats=stats):
+                    print(f"[!] {method_name} failed to solve {board}")
+                values = [value if isinstance(value, int) else f"{value:.6f}"
+                          for value in (getattr(stats, column) for column in columns)]
+                print("\t".join([method_name, f"{difficulty}_{i + 1}"] + [str(value) for value in values]))
+
+def run_profile(method_name="solve_dsatur_incremental", difficulty="Expert", limit=20):
+    """cProfile capture of one solver over the boards of one difficulty."""
+    from instrumentation import SolverStats
+
+    graph = SudokuGraph()
+    print(f"\n=== Profile: {method_name} on {difficulty} boards ===")
+    for board in all_difficulties[difficulty]:
+        graph.load_from_string(board)
+        stats = SolverStats(profile=True)
+        getattr(graph, method_name)(stats=stats)
+        print(stats.summary())
+        print(stats.profile_report(limit))
+
+def run_uniqueness_benchmark(methods=("dancing_links", "integer_programming"), removed=10):
+    """count_solutions on every board and on copies with removed clues (usually several solutions)."""
+    graph = SudokuGraph()
+
+    print("\n=== Uniqueness check: count_solutions(limit=2) ===")
+    print("\t".join(["Method", "Boards", "Unique", "Multiple", "Average time"]))
+    for method in methods:
+        counts = []
+        start = time.perf_counter()
+        for boards in all_difficulties.values():
+            for board in boards:
+                for puzzle in (board, _remove_clues(board, removed)):
+                    graph.load_from_string(puzzle)
+                    counts.append(graph.count_solutions(limit=2, method=method))
+        elapsed = time.perf_counter() - start
+        print("\t".join([method, str(len(counts)), str(counts.count(1)), str(counts.count(2)),
+                         f"{elapsed / len(counts) * 1000:.3f}ms"]))
+
+def _remove_clues(board, count):
+    cells = list(board)
+    for i in [i for i, char in enumerate(cells) if char != "0"][:count]:
+        cells[i] = "0"
+    return "".join(cells)
+
+def run_generator_benchmark(count=5):
+    """Generation time of each difficulty tier, checking grade and uniqueness of the output."""
+    import random
+    from generator import DIFFICULTIES, generate_puzzle, grade
+
+    graph = SudokuGraph()
+    rng = random.Random(0)
+    print("\n=== Puzzle generator ===")
+    print("\t".join(["Difficulty", "Puzzles", "Average time", "Average clues"]))
+    for difficulty in DIFFICULTIES:
+        start = time.perf_counter()
+        puzzles = [generate_puzzle(difficulty, graph, rng) for _ in range(count)]
+        elapsed = time.perf_counter() - start
+        puzzles = [puzzle for puzzle in puzzles if puzzle is not None]
+        for puzzle in puzzles:
+            graph.load_from_string(puzzle)
+            if grade(graph) != difficulty:
+                print(f"[!] {puzzle} graded {grade(graph)}, expected {difficulty}")
+        clues = sum(81 - puzzle.count("0") for puzzle in puzzles) / max(len(puzzles), 1)
+        print(f"{difficulty}\t{len(puzzles)}\t{elapsed / count:.3f}s\t{clues:.1f}")
+
+def run_vectorized_benchmark(copies=4000):
+    """Boards per minute of the NumPy validator and singles propagation against the scalar paths."""
+    from propagation import SINGLES
+    from vectorized import SOLVED, boards_to_array, propagate_singles, validate
+
+    puzzles = [board for boards in all_difficulties.values() for board in boards]
+    graph = SudokuGraph()
+    solutions = []
+    for puzzle in puzzles:
+        graph.load_from_string(puzzle)
+        graph.solve_dancing_links()
+        solutions.append(graph.to_string())
+    boards = solutions * copies
+
+    def rate(count, elapsed):
+        return f"{count / elapsed * 60:,.0f}"
+
+    print(f"\n=== Vectorized kernels ({len(boards)} boards, boards/min) ===")
+    print("\t".join(["Kernel", "Vectorized", "Scalar"]))
+    start = time.perf_counter()
+    valid = validate(boards_to_array(boards), complete=True)
+    vectorized = time.perf_counter() - start
+    sample = boards[:len(boards) // 100]
+    start = time.perf_counter()
+    for board in sample:
+        graph.load_from_string(board)
+        graph.is_valid_coloring()
+    scalar = time.perf_counter() - start
+    if not valid.all():
+        print("[!] validate rejected a solved board")
+    print("\t".join(["validate", rate(len(boards), vectorized), rate(len(sample), scalar)]))
+
+    boards = puzzles * copies
+    start = time.perf_counter()
+    _, status = propagate_singles(boards_to_array(boards))
+    vectorized = time.perf_counter() - start
+    sample = boards[:len(boards) // 100]
+    start = time.perf_counter()
+    for board in sample:
+        graph.load_from_string(board)
+        graph.propagate(SINGLES)
+    scalar = time.perf_counter() - start
+    print("\t".join(["singles", rate(len(boards), vectorized), rate(len(sample), scalar)]))
+    print(f"solved by singles: {(status == SOLVED).sum()} of {len(boards)}")
+
+def run_sat_benchmark(dimensions=(3, 4, 5), boards_per_dimension=3,
+                      method_names=("solve_sat", "solve_dancing_links", "solve_integer_programming")):
+    """solve_sat against the exact cover and ILP solvers on generated givens, with the CNF size."""
+    from instrumentation import SolverStats
+    from puzzles import generate_givens
+    from sat import PySatSolver
+
+    print(f"\n=== SAT solver ({'pysat' if PySatSolver else 'bundled CDCL'}, median seconds) ===")
+    print("\t".join(["Size", "Variables", "Clauses", "Learnt"] + list(method_names)))
+    for dimension in dimensions:
+        size = dimension * dimension
+        graph = SudokuGraph(dimension)
+        puzzles = [generate_givens(dimension, round(0.4 * size * size), seed=seed)
+                   for seed in range(boards_per_dimension)]
+        times = {method_name: [] for method_name in method_names}
+        details = {}
+        for puzzle in puzzles:
+            for method_name in method_names:
+                graph.load_from_string(puzzle)
+                stats = SolverStats()
+                limit = SCALING_TIME_LIMITS.get(method_name, DEFAULT_TIME_LIMIT)
+                result = getattr(graph, method_name)(stats=stats, time_limit=limit)
+                if result is True and not graph.is_valid_coloring():
+                    print(f"[!] {method_name} returned an invalid board for {puzzle}")
+                times[method_name].append(stats.elapsed if result is True else float("inf"))
+                if method_name == "solve_sat":
+                    details = stats.details
+        row = [f"{size}x{size}"] + [str(details.get(key, "-")) for key in ("sat_variables", "sat_clauses", "sat_learnt")]
+        for method_name in method_names:
+            median = sorted(times[method_name])[len(puzzles) // 2]
+            row.append(f"{median:.4f}" if median != float("inf") else "timeout")
+        print("\t".join(row))
+
+def run_startup_benchmark(modules=("SudokuGraph", "batch", "generator", "instrumentation", "Window", "tests"),
+                          repeats=5):
+    """Import time of the entry-point modules (python -X importtime, fresh interpreter
+    each run) and the cost of the first and later SudokuGraph instances per dimension."""
+    import re
+    import subprocess
+    import sys
+
+    print(f"\n=== Startup: import time (median of {repeats} fresh interpreters, ms) ===")
+    print("\t".join(["Module", "Self", "Cumulative", "Heavy optional imports"]))
+    for module in modules:
+        samples = []
+        loaded = set()
+        for _ in range(repeats):
+            process = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                                     capture_output=True, text=True)
+            if process.returncode != 0:
+                break
+            lines = [re.match(r"import time:\s*(\d+) \|\s*(\d+) \| (\s*)(\S+)", line)
+                     for line in process.stderr.splitlines()]
+            lines = [match for match in lines if match]
+            own = lines[-1]
+            samples.append((int(own.group(1)), int(own.group(2))))
+            loaded = {match.group(4).split(".")[0] for match in lines}
+        if not samples:
+            print(f"{module}\t-\t-\t(import failed)")
+            continue
+        samples.sort(key=lambda sample: sample[1])
+        own_time, cumulative = samples[len(samples) // 2]
+        heavy = sorted(loaded & {"pulp", "numpy", "pysat", "pstats", "cProfile", "scipy"})
+        print(f"{module}\t{own_time / 1000:.1f}\t{cumulative / 1000:.1f}\t{', '.join(heavy) or '-'}")
+
+    print("\n=== Startup: SudokuGraph construction (ms) ===")
+    print("\t".join(["Dimension", "First", "Later (mean of 20)"]))
+    for dimension in range(2, 7):
+        code = (f"import time; from SudokuGraph import SudokuGraph; s = time.perf_counter(); "
+                f"SudokuGraph({dimension}); f = time.perf_counter(); "
+                f"[SudokuGraph({dimension}) for _ in range(20)]; print(f - s, (time.perf_counter() - f) / 20)")
+        first, later = map(float, subprocess.run([sys.executable, "-c", code], capture_output=True,
+                                                 text=True, check=True).stdout.split())
+        print(f"{dimension}\t{first * 1000:.2f}\t{later * 1000:.2f}")
+
+_TOPOLOGY_CHILD = """
+import resource, sys, time
+import topology
+from SudokuGraph import SudokuGraph
+
+def rss():
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * resource.getpagesize()
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+dimension, count, compact, shared = int(sys.argv[1]), int(sys.argv[2]), sys.argv[3] == "1", sys.argv[4] == "1"
+SudokuGraph(dimension, compact=compact)
+before = rss()
+start = time.perf_counter()
+graphs = []
+for _ in range(count):
+    if not shared:
+        topology._REGISTRY.clear()  # what every instance paid before the registry
+    graphs.append(SudokuGraph(dimension, compact=compact))
+print(time.perf_counter() - start, rss() - before)
+"""
+
+def run_topology_benchmark(count=1000, dimensions=(3, 4)):
+    """Creation time and RSS growth of count live SudokuGraph instances (each in a fresh
+    interpreter), with the shared topology registry and with the topology rebuilt per instance."""
+    import subprocess
+    import sys
+
+    print(f"\n=== Topology sharing: {count} live graphs ===")
+    print("\t".join(["Size", "Storage", "Topology", "Per graph (ms)", "RSS (MB)", "Per graph (KB)"]))
+    for dimension in dimensions:
+        size = dimension * dimension
+        for compact in (False, True):
+            for shared in (True, False):
+                args = [str(dimension), str(count), str(int(compact)), str(int(shared))]
+                output = subprocess.run([sys.executable, "-c", _TOPOLOGY_CHILD] + args,
+                                        capture_output=True, text=True, check=True).stdout
+                elapsed, grown = output.split()
+                elapsed, grown = float(elapsed), int(grown)
+                print("\t".join([f"{size}x{size}", "compact" if compact else "vertices",
+                                  "shared" if shared else "per instance", f"{elapsed / count * 1000:.3f}",
+                                  f"{grown / 2 ** 20:.1f}", f"{grown / count / 1024:.1f}"]))
+
+def run_local_search_benchmark(dimensions=(5, 6, 7), boards_per_dimension=2, clue_fraction=0.3,
+                               time_limit=60.0, checkpoints=(1, 5, 10, 30, 60)):
+    """solve_local_search against solve_dsatur_incremental on large generated boards:
+    result and time of each, and the local search's conflicts at each checkpoint (seconds)."""
+    from instrumentation import SolverStats
+    from puzzles import generate_givens
+
+    print(f"\n=== Local search vs DSATUR ({time_limit:.0f}s limit, {clue_fraction:.0%} givens) ===")
+    print("\t".join(["Board", "DSATUR", "Local search", "Restarts"] + [f"conflicts@{t}s" for t in checkpoints]))
+    for dimension in dimensions:
+        size = dimension * dimension
+        graph = SudokuGraph(dimension)
+        for seed in range(boards_per_dimension):
+            puzzle = generate_givens(dimension, round(clue_fraction * size * size), seed=seed)
+            cells = []
+            for method_name in ("solve_dsatur_incremental", "solve_local_search"):
+                graph.load_from_string(puzzle)
+                stats = SolverStats()
+                result = getattr(graph, method_name)(stats=stats, time_limit=time_limit)
+                if result is True and not graph.is_valid_coloring():
+                    print(f"[!] {method_name} returned an invalid board")
+                cells.append(f"{stats.elapsed:.2f}s" if result is True else repr(result))
+
+            # Conflicts of the best state reached by each checkpoint
+            history = graph.local_search_history
+            conflicts = []
+            for checkpoint in checkpoints:
+                reached = [count for elapsed, count in history if elapsed <= checkpoint]
+                conflicts.append(str(min(reached)) if reached else "-")
+            print("\t".join([f"{size}x{size}#{seed}"] + cells + [str(stats.details.get("restarts", 0))] + conflicts))
+
+def run_portfolio_benchmark(timeout=5.0):
+    """solve_portfolio on every board: the race against each solver alone, and the
+    selector trained on the other boards' benchmark results (leave-one-out)."""
+    from benchmark import BenchmarkConfig, run_suite
+    from instrumentation import SolverStats
+    from portfolio import SolverSelector, portfolio_solvers
+
+    graph = SudokuGraph()
+    method_names = portfolio_solvers(graph)
+    boards = [(f"{difficulty}_{i + 1}", difficulty, board)
+              for difficulty, boards in all_difficulties.items() for i, board in enumerate(boards)]
+    results = run_suite(boards, method_names, BenchmarkConfig(warmup=1, target_time=0.1, timeout=timeout))
+    selector = SolverSelector.train(results)
+    times = {(r["board"], r["solver"]): r["median"] if r["status"] == "ok" else timeout for r in results}
+
+    print("\n=== Portfolio (seconds; selector trained without the board) ===")
+    print("\t".join(["Board", "Best solver", "Best", "Selected", "Selector", "Race"]))
+    totals = {"oracle": [], "selector": [], "race": []}
+    for index, (board_name, _, board) in enumerate(boards):
+        best = min(method_names, key=lambda name: times[(board_name, name)])
+        others = SolverSelector(selector.examples[:index] + selector.examples[index + 1:], selector.scales)
+        row = [board_name, best, f"{times[(board_name, best)]:.4f}"]
+        for kind, options in (("selector", {"selector": others}), ("race", {})):
+            graph.load_from_string(board)
+            stats = SolverStats()
+            result = graph.solve_portfolio(stats=stats, time_limit=timeout, **options)
+            if result is not True or not graph.is_valid_coloring():
+                print(f"[!] solve_portfolio ({kind}) failed on {board_name}")
+            if kind == "selector":
+                row.append(stats.details["selected"])
+            row.append(f"{stats.elapsed:.4f}")
+            totals[kind].append(stats.elapsed)
+        totals["oracle"].append(times[(board_name, best)])
+        print("\t".join(row))
+
+    print("\t".join(["Solver", "Total", "Max"]))
+    for method_name in method_names:
+        column = [times[(board_name, method_name)] for board_name, _, _ in boards]
+        print(f"{method_name}\t{sum(column):.4f}\t{max(column):.4f}")
+    for kind, column in totals.items():
+        print(f"{kind}\t{sum(column):.4f}\t{max(column):.4f}")
+
+def _raise_in_solver(self, *args, **kwargs):
+    raise RuntimeError("falha simulada")
+
+def _raise_in_chunk(chunk, solver_name, time_limit):
+    raise RuntimeError("falha simulada")
+
+def check_service_errors():
+    """A solver that raises, or a batch that fails as a whole, still gets a response."""
+    import asyncio
+
+    import service
+
+    async def ask(solver_name):
+        async with service.SolverService(workers=1) as solver_service:
+            return await asyncio.wait_for(solver_service.solve(easy_boards[0], solver_name), 10)
+
+    ok = True
+    # Patched before the pool starts, so the forked workers inherit it
+    original_solver, original_chunk = SudokuGraph.solve_sat, service._solve_chunk
+    try:
+        SudokuGraph.solve_sat = _raise_in_solver
+        response = asyncio.run(ask("solve_sat"))
+        if response["solved"] or "falha simulada" not in (response["error"] or ""):
+            print(f"[!] solver exception not reported: {response}")
+            ok = False
+        SudokuGraph.solve_sat = original_solver
+        service._solve_chunk = _raise_in_chunk
+        response = asyncio.run(ask("solve_dancing_links"))
+        if response["solved"] or "falha simulada" not in (response["error"] or ""):
+            print(f"[!] batch exception not reported: {response}")
+            ok = False
+    except asyncio.TimeoutError:
+        print("[!] no response after a solver exception")
+        ok = False
+    finally:
+        SudokuGraph.solve_sat, service._solve_chunk = original_solver, original_chunk
+    return ok
+
+def _raise_in_generator(difficulty, seed):
+    import random
+
+    import generator
+
+    if seed % 2:
+        raise RuntimeError("falha simulada")
+    return generator.generate_puzzle(difficulty, SudokuGraph(), random.Random(seed))
+
+# Created by the first _exit_in_generator job, so only that job kills its worker
+_CRASH_MARKER = os.path.join(tempfile.gettempdir(), f"puzzle-pool-crash-{os.getpid()}")
+
+def _exit_in_generator(difficulty, seed):
+    import random
+
+    import generator
+
+    if not os.path.exists(_CRASH_MARKER):
+        open(_CRASH_MARKER, "w").close()
+        os._exit(1)  # a worker that dies breaks its pool
+    return generator.generate_puzzle(difficulty, SudokuGraph(), random.Random(seed))
+
+def check_puzzle_pool_errors(timeout=60.0):
+    """A PuzzlePool keeps refilling after a job raises and after a worker dies."""
+    import generator
+
+    ok = True
+    original_job = generator._generate_job
+    for failing_job, counter in ((_raise_in_generator, "errors"), (_exit_in_generator, "restarts")):
+        # Patched before the pool starts, so the forked workers inherit it
+        generator._generate_job = failing_job
+        pool = generator.PuzzlePool(capacity=1, workers=1, seed=0)
+        try:
+            deadline = time.perf_counter() + timeout
+            while not (getattr(pool, counter) and pool.generated) and time.perf_counter() < deadline:
+                time.sleep(0.05)
+            if not getattr(pool, counter) or not pool.generated or not pool._thread.is_alive():
+                print(f"[!] PuzzlePool with {failing_job.__name__}: {counter}={getattr(pool, counter)}, "
+                      f"generated={pool.generated}, fill thread alive={pool._thread.is_alive()}")
+                ok = False
+        finally:
+            generator._generate_job = original_job
+            pool.close()
+    if os.path.exists(_CRASH_MARKER):
+        os.remove(_CRASH_MARKER)
+    return ok
+
+def check_cache_miss_overhead(method_name="solve_dsatur_incremental"):
+    """A solve through a cache that misses stays within MAX_MISS_OVERHEAD of the
+    uncached solve, on the reference boards and on sparse and 16x16 boards."""
+    from canonical import SolutionCache
+    from puzzles import generate_givens
+
+    cases = [(3, board) for boards in all_difficulties.values() for board in boards]
+    cases += [(3, "0" * 81), (3, generate_givens(3, 10, seed=0)), (4, generate_givens(4, 60, seed=1))]
+    ok = True
+    for dimension, puzzle in cases:
+        times = []
+        for cache in (None, SolutionCache(dimension)):
+            graph = SudokuGraph(dimension, solution_cache=cache)
+            samples = []
+            for _ in range(6):  # the first run warms up; the fastest of the rest filters out noise
+                if cache is not None:
+                    cache.clear()
+                graph.load_from_string(puzzle)
+                start = time.perf_counter()
+                getattr(graph, method_name)()
+                samples.append(time.perf_counter() - start)
+            times.append(min(samples[1:]))
+        if times[1] > MAX_MISS_OVERHEAD * times[0] + 1e-4:
+            print(f"[!] cache miss {times[1] * 1e3:.2f}ms vs uncached {times[0] * 1e3:.2f}ms on {puzzle}")
+            ok = False
+    return ok
+
+def check_symmetric_hit_cost(method_name="solve_dancing_links", variants=3):
+    """Answering a symmetric variant from the cache costs less than solving it."""
+    import random
+    from canonical import SolutionCache, random_transform
+
+    rng = random.Random(0)
+    cache = SolutionCache()
+    graph = SudokuGraph(solution_cache=cache)
+    uncached = SudokuGraph()
+    solve_time = hit_time = 0.0
+    for boards in all_difficulties.values():
+        for board in boards:
+            grid = [int(char) for char in board]
+            samples = []
+            for _ in range(3):
+                uncached.load_from_string(board)
+                start = time.perf_counter()
+                getattr(uncached, method_name)()
+                samples.append(time.perf_counter() - start)
+            solve_time += variants * min(samples)
+            graph.load_from_string(board)
+            getattr(graph, method_name)()
+            for _ in range(variants):
+                graph.load_from_string("".join(map(str, random_transform(graph.dimension, rng).apply(grid))))
+                start = time.perf_counter()
+                getattr(graph, method_name)()
+                hit_time += time.perf_counter() - start
+    if not cache.symmetry_hits or hit_time >= solve_time:
+        print(f"[!] {cache.symmetry_hits} symmetric hits took {hit_time * 1e3:.1f}ms, "
+              f"solving them {solve_time * 1e3:.1f}ms")
+        return False
+    return True
+
+def check_ilp_filled_conflicts():
+    """A fully filled board with repeated colors is no ILP solution, with or without propagation."""
+    graph = SudokuGraph()
+    ok = True
+    for propagate in (False, True):
+        graph.load_from_string("1" * 81)
+        if graph.solve_integer_programming(propagate=propagate) is not False:
+            print(f"[!] solve_integer_programming accepted a conflicting board (propagate={propagate})")
+            ok = False
+    return ok
+
+def check_conflicting_givens():
+    """Every solver answers False at once, not TIMED_OUT, when the givens conflict."""
+    graph = SudokuGraph()
+    ok = True
+    for _, method_name in graph.get_solver_options():
+        graph.load_from_string("55" + "0" * 79)
+        result = getattr(graph, method_name)(time_limit=5.0)
+        if result is not False:
+            print(f"[!] {method_name} returned {result} on conflicting givens")
+            ok = False
+    return ok
+
+def check_graph_pickle():
+    """Graphs survive pickle and deepcopy (with their lazily built solver state),
+    sharing the registry topology and solving the same as the original."""
+    import copy
+    import pickle
+
+    ok = True
+    for compact in (False, True):
+        graph = SudokuGraph(compact=compact)
+        graph.load_from_string(hard_boards[0])
+        graph.propagate()
+        graph.solve_dancing_links()
+        graph.load_from_string(hard_boards[0])
+        for name, clone in (("pickle", lambda g: pickle.loads(pickle.dumps(g))), ("deepcopy", copy.deepcopy)):
+            try:
+                other = clone(graph)
+            except Exception as error:
+                print(f"[!] {name} of a graph (compact={compact}) failed: {error}")
+                ok = False
+                continue
+            if other.topology is not graph.topology or other.get_colors() != graph.get_colors() \
+                    or other.solve_dancing_links() is not True or not other.is_valid_coloring():
+                print(f"[!] {name} of a graph (compact={compact}) doesn't match the original")
+                ok = False
+    return ok
+
+def check_benchmark_child_errors():
+    """A benchmark child that raises is reported as "error" at once, not as a timeout."""
+    from benchmark import solve_with_time_limit
+
+    ok = True
+    for puzzle, method_name in (("x", "solve_dancing_links"), (easy_boards[0], "solve_missing")):
+        start = time.perf_counter()
+        status, _ = solve_with_time_limit(3, puzzle, method_name, 5.0)
+        elapsed = time.perf_counter() - start
+        if status != "error" or elapsed > 2.0:
+            print(f"[!] failing child of {method_name} reported as {status} after {elapsed:.1f}s")
+            ok = False
+    return ok
+
+def check_solver_capabilities():
+    """The cancellable / reports_progress flags Window relies on hold: solvers
+    that report progress call the stats callback, cancellable ones honour a
+    cancelled token, and CBC (which can't be interrupted) isn't offered as either."""
+    from budget import CANCELLED, CancelToken
+    from instrumentation import SolverStats
+
+    ok = True
+    graph = SudokuGraph()
+    for _, method_name in graph.get_solver_options():
+        method = getattr(graph, method_name)
+        if method_name == "solve_integer_programming" and (method.cancellable or method.reports_progress):
+            print("[!] solve_integer_programming is marked cancellable or reporting progress")
+            ok = False
+        if method.reports_progress:
+            calls = []
+            graph.load_from_string("0" * 81)
+            method(stats=SolverStats(callback=calls.append, callback_interval=1))
+            if not calls:
+                print(f"[!] {method_name} is marked as reporting progress but never calls the callback")
+                ok = False
+        if method.cancellable:
+            token = CancelToken()
+            token.cancel()
+            graph.load_from_string(hard_boards[0])
+            if method(cancel=token) is not CANCELLED:
+                print(f"[!] {method_name} is marked cancellable but ignores a cancelled token")
+                ok = False
+    return ok
+
+# A compact graph may be at most this many times slower than a default one
+MAX_COMPACT_SLOWDOWN = 2.0
+
+def check_compact_views(method_name="solve_dsatur_backtracking"):
+    """Compact graphs solve within MAX_COMPACT_SLOWDOWN of default graphs, and
+    their vertex views can't change a color behind set_color's back."""
+    ok = True
+    graph = SudokuGraph(compact=True)
+    try:
+        graph.vertices[(0, 0)].color = 1
+        print("[!] VertexView.color can be assigned directly")
+        ok = False
+    except AttributeError:
+        pass
+
+    times = []
+    for compact in (False, True):
+        graph = SudokuGraph(compact=compact)
+        total = 0.0
+        for boards in all_difficulties.values():
+            for board in boards:
+                samples = []
+                for _ in range(3):
                     graph.load_from_string(board)
                     start = time.perf_counter()
-                    result = getattr(graph, method_name)()
-                    end = time.perf_counter()
-                    elapsed = end - start
-                    if not result:
-                        print(f"[!] Attempt {attempt + 1}: Failed to solve")
-                    times.append(elapsed)
-
-                z_p_results = z_test_series(times)
-                for attempt_idx, (elapsed, (z, p)) in enumerate(zip(times, z_p_results), start=1):
-                    print(f"{difficulty}_{i + 1}\t{elapsed:.6f}s\t{z:+.2f}")
-                
-                if times:
-                    avg = sum(times) / len(times)
-
-                    if board_name not in summary:
-                        summary[board_name] = {"ec": board.count("0")}
-                    summary[board_name][display_name] = avg
-    # Print summary table
-    print("\n=== Summary Table (Average Time per Algorithm) ===")
-    # Header
-    header = ["Board"] + ["Empty Cells"] + [name for name, _ in solver_options]
-    print("\t".join(header))
-    for board_name in sorted(summary.keys()):
-        row = [board_name, str(summary[board_name]["ec"])]
-        for name, _ in solver_options:
-            time_val = summary[board_name].get(name, "-")
-            if isinstance(time_val, float):
-                row.append(f"{time_val:.6f}")
-            else:
-                row.append(time_val)
-        print("\t".join(row))
+                    getattr(graph, method_name)()
+                    samples.append(time.perf_counter() - start)
+                total += min(samples)
+        times.append(total)
+    if times[1] > MAX_COMPACT_SLOWDOWN * times[0]:
+        print(f"[!] compact {method_name} took {times[1] * 1e3:.1f}ms vs {times[0] * 1e3:.1f}ms")
+        ok = False
+    return ok
+
+# Checks of fixed bugs; each returns True when it passes
+REGRESSION_CHECKS = [check_service_errors, check_puzzle_pool_errors, check_cache_miss_overhead,
+                     check_symmetric_hit_cost, check_ilp_filled_conflicts, check_conflicting_givens,
+                     check_graph_pickle, check_benchmark_child_errors, check_solver_capabilities,
+                     check_compact_views]
+
+def run_regression_checks():
+    """Runs every check of REGRESSION_CHECKS."""
+    failed = [check.__name__ for check in REGRESSION_CHECKS if not check()]
+    print(f"{len(REGRESSION_CHECKS) - len(failed)}/{len(REGRESSION_CHECKS)} checks passed")
+    if failed:
+        raise SystemExit(f"Failed: {', '.join(failed)}")
+
+BENCHMARKS = {
+    "solvers": run_tests,
+    "bitmasks": run_bitmask_comparison,
+    "construction": run_construction_benchmark,
+    "dsatur": run_dsatur_comparison,
+    "propagation": run_propagation_report,
+    "ilp": run_ilp_timings,
+    "batch": run_batch_scaling,
+    "cache": run_cache_benchmark,
+    "scaling": run_scaling_benchmark,
+    "stats": run_instrumentation_report,
+    "profile": run_profile,
+    "unique": run_uniqueness_benchmark,
+    "generator": run_generator_benchmark,
+    "vectorized": run_vectorized_benchmark,
+    "sat": run_sat_benchmark,
+    "startup": run_startup_benchmark,
+    "topology": run_topology_benchmark,
+    "local_search": run_local_search_benchmark,
+    "portfolio": run_portfolio_benchmark,
+    "checks": run_regression_checks,
+}
 
 if __name__ == "__main__":
-    run_tests()
+    import sys
+    name = sys.argv[1] if len(sys.argv) > 1 else "solvers"
+    if name not in BENCHMARKS:
+        raise SystemExit(f"Unknown benchmark '{name}'. Choose from: {', '.join(BENCHMARKS)}")
+    BENCHMARKS[name]()
@@ -0,0 +1,96 @@
+"""Board topology (which cells constrain which) shared by every SudokuGraph.
+
+The topology only depends on the block dimension, so it is built once per
+dimension by get_topology and kept in a module-level registry. It is
+immutable: tuples, frozensets and read-only memoryviews, and attributes
+can't be reassigned. That makes it safe to share between threads without
+locking and between processes: workers forked after the parent built a
+dimension inherit it without copying (the pages are never written).
+A SudokuGraph only adds the mutable colors, locks and unit masks.
+"""
+import threading
+from array import array
+
+_REGISTRY = {}
+_REGISTRY_LOCK = threading.Lock()
+
+
+def get_topology(dimension):
+    """The shared Topology of a dimension, built on first use."""
+    topology = _REGISTRY.get(dimension)
+    if topology is None:
+        with _REGISTRY_LOCK:  # two threads asking at once build it only once
+            topology = _REGISTRY.get(dimension)
+            if topology is None:
+                topology = _REGISTRY[dimension] = Topology(dimension)
+    return topology
+
+
+class Topology:
+    """Cell ids are row * size + col.
+
+    cell_blocks: block id of each cell.
+    adjacency / adjacency_offsets: CSR neighbor ids, neighbors of cell i are
+        adjacency[adjacency_offsets[i]:adjacency_offsets[i + 1]] (read-only memoryviews).
+    neighbors: tuple of neighbor ids per cell (same content, faster to iterate).
+    neighbor_sets: frozenset of (row, col) neighbors per cell, for Vertex.neighbors.
+    row_units / col_units / block_units: cell ids of each unit.
+    """
+    __slots__ = ("dimension", "size", "cells", "cell_blocks", "adjacency_offsets", "adjacency",
+                 "neighbors", "neighbor_sets", "row_units", "col_units", "block_units")
+
+    def __init__(self, dimension):
+        size = dimension * dimension
+        cells = size * size
+        cell_blocks = tuple((i // size // dimension) * dimension + (i % size) // dimension for i in range(cells))
+
+        # Built from row/col/block arithmetic instead of comparing every pair of cells
+        offsets = array("I", [0])
+        adjacency = array("I")
+        neighbors = []
+        for row in range(size):
+            block_row = row - row % dimension
+            for col in range(size):
+                block_col = col - col % dimension
+                ids = [row * size + c for c in range(size) if c != col]
+                ids += [r * size + col for r in range(size) if r != row]
+                ids += [r * size + c
+                        for r in range(block_row, block_row + dimension) if r != row
+                        for c in range(block_col, block_col + dimension) if c != col]
+                ids.sort()
+                adjacency.extend(ids)
+                offsets.append(len(adjacency))
+                neighbors.append(tuple(ids))
+
+        block_units = [[] for _ in range(size)]
+        for index in range(cells):
+            block_units[cell_blocks[index]].append(index)
+
+        values = {
+            "dimension": dimension,
+            "size": size,
+            "cells": cells,
+            "cell_blocks": cell_blocks,
+            "adjacency_offsets": memoryview(offsets).toreadonly(),
+            "adjacency": memoryview(adjacency).toreadonly(),
+            "neighbors": tuple(neighbors),
+            "neighbor_sets": tuple(frozenset(divmod(n, size) for n in ids) for ids in neighbors),
+            "row_units": tuple(tuple(row * size + col for col in range(size)) for row in range(size)),
+            "col_units": tuple(tuple(row * size + col for row in range(size)) for col in range(size)),
+            "block_units": tuple(map(tuple, block_units)),
+        }
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Topology is shared between graphs and can't be modified.")
+
+    def __reduce__(self):
+        # Pickled (and deep-copied) as a reference to the registry entry of its dimension
+        return get_topology, (self.dimension,)
+
+    def neighbor_ids(self, index):
+        return self.adjacency[self.adjacency_offsets[index]:self.adjacency_offsets[index + 1]]
+
+    def __repr__(self):
+        return f"Topology({self.dimension})"
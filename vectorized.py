@@ -0,0 +1,210 @@
+"""NumPy kernels for validating and propagating many boards at once.
+
+Boards are held as an (N, size, size) uint8 array (0 = empty). Validation
+sums one-hot (N, size, size, size) arrays along rows, columns and blocks;
+singles propagation works on one candidate bitmask per cell, with every
+step an array operation over the whole batch. Boards that propagation
+can't finish are handed to a scalar SudokuGraph solver.
+
+Work is split into chunks of CHUNK boards to bound the memory of the
+one-hot arrays (about size**3 bytes per board).
+"""
+import numpy as np
+
+from SudokuGraph import SEPARATORS, SYMBOLS, SudokuGraph
+
+CHUNK = 16384
+INVALID = 255  # parsed value of an unknown symbol
+
+# Byte -> color for the one-symbol-per-cell format
+_SYMBOL_TABLE = np.full(256, INVALID, dtype=np.uint8)
+for _color, _symbol in enumerate(SYMBOLS):
+    _SYMBOL_TABLE[ord(_symbol)] = _color
+    _SYMBOL_TABLE[ord(_symbol.lower())] = _color
+_SYMBOL_TABLE[ord(".")] = 0
+
+
+def boards_to_array(puzzles, dimension=3):
+    """(N, size, size) uint8 array of a list of puzzle strings (either format of
+    SudokuGraph.load_from_string). Unknown symbols become INVALID."""
+    size = dimension * dimension
+    cells = size * size
+    puzzles = [puzzle.strip() for puzzle in puzzles]
+    if all(len(puzzle) == cells for puzzle in puzzles):
+        data = np.frombuffer("".join(puzzles).encode("ascii", "replace"), dtype=np.uint8)
+        return _SYMBOL_TABLE[data].reshape(len(puzzles), size, size)
+
+    boards = np.zeros((len(puzzles), cells), dtype=np.uint8)
+    for i, puzzle in enumerate(puzzles):
+        if SEPARATORS.search(puzzle):
+            values = [int(token) if token.isdigit() else 0 for token in SEPARATORS.split(puzzle)]
+        else:
+            values = _SYMBOL_TABLE[np.frombuffer(puzzle.encode("ascii", "replace"), dtype=np.uint8)]
+        if len(values) != cells:
+            raise ValueError(f"O puzzle {i} deve ter {cells} células.")
+        boards[i] = np.minimum(values, INVALID)
+    return boards.reshape(len(puzzles), size, size)
+
+
+def array_to_strings(boards):
+    size = boards.shape[-1]
+    flat = boards.reshape(len(boards), size * size)
+    if size < len(SYMBOLS):
+        symbols = np.frombuffer(SYMBOLS.encode("ascii"), dtype=np.uint8)
+        return [row.tobytes().decode("ascii") for row in symbols[flat]]
+    return [",".join(map(str, row)) for row in flat.tolist()]
+
+
+def _unit_counts(onehot, dimension):
+    """Per-unit color counts of an (N, size, size, colors) array: rows, columns
+    and blocks, each as (N, size, colors)."""
+    n, size = onehot.shape[0], onehot.shape[1]
+    if onehot.dtype == bool:
+        onehot = onehot.view(np.uint8)  # summing bytes avoids a cast per element
+    rows = onehot.sum(axis=2, dtype=np.uint8)
+    cols = onehot.sum(axis=1, dtype=np.uint8)
+    blocks = onehot.reshape(n, dimension, dimension, dimension, dimension, -1).sum(axis=(2, 4), dtype=np.uint8)
+    return rows, cols, blocks.reshape(n, size, -1)
+
+
+def _chunked(function, boards, dimension, **kwargs):
+    return np.concatenate([function(boards[start:start + CHUNK], dimension, **kwargs)
+                           for start in range(0, len(boards), CHUNK)] or [np.zeros(0, dtype=bool)])
+
+
+def validate(boards, dimension=3, complete=False):
+    """Bool array: True for the boards where no row, column or block holds a
+    color twice (and, with complete=True, no cell is empty)."""
+    return _chunked(_validate_chunk, boards, dimension, complete=complete)
+
+
+def _validate_chunk(boards, dimension, complete):
+    size = dimension * dimension
+    onehot = boards[..., None] == np.arange(1, size + 1, dtype=np.uint8)
+    rows, cols, blocks = _unit_counts(onehot, dimension)
+    valid = ((rows <= 1).all(axis=(1, 2)) & (cols <= 1).all(axis=(1, 2)) & (blocks <= 1).all(axis=(1, 2))
+             & (boards <= size).all(axis=(1, 2)))
+    if complete:
+        valid &= (boards != 0).all(axis=(1, 2))
+    return valid
+
+
+SOLVED, STUCK, CONTRADICTION = 0, 1, 2
+
+
+def propagate_singles(boards, dimension=3, max_rounds=100):
+    """Naked and hidden singles on every board at once. Returns (filled, status):
+    filled is a copy of boards with every forced cell set, status holds SOLVED,
+    STUCK (search still needed) or CONTRADICTION per board.
+
+    Candidates are kept as one bitmask per cell (bit c = color c possible, as
+    in SudokuGraph) rather than one-hot, which makes every step an elementwise
+    operation over (N, size, size) instead of a reduction over a 4-D array."""
+    filled = np.empty_like(boards)
+    status = np.empty(len(boards), dtype=np.uint8)
+    for start in range(0, len(boards), CHUNK):
+        chunk = slice(start, start + CHUNK)
+        filled[chunk], status[chunk] = _propagate_chunk(boards[chunk], dimension, max_rounds)
+    return filled, status
+
+
+def _as_units(masks, dimension):
+    """(rows, cols, blocks) views of (N, size, size) masks, each as (N, unit, position)."""
+    n, size = masks.shape[0], masks.shape[1]
+    blocks = masks.reshape(n, dimension, dimension, dimension, dimension).transpose(0, 1, 3, 2, 4)
+    return masks, masks.transpose(0, 2, 1), blocks.reshape(n, size, size)
+
+
+def _once_twice(units):
+    """Bits present in exactly one / in more than one cell of each unit, (N, unit) each."""
+    once = np.zeros(units.shape[:2], dtype=units.dtype)
+    twice = np.zeros_like(once)
+    for position in range(units.shape[2]):
+        bits = units[:, :, position]
+        twice |= once & bits
+        once |= bits
+    return once & ~twice, twice, once
+
+
+def _to_cells(rows, cols, blocks, dimension):
+    """OR of the per-unit values of each cell's row, column and block, as (N, size, size)."""
+    n, size = rows.shape[0], rows.shape[1]
+    cells = rows[:, :, None] | cols[:, None, :]
+    cells = cells.reshape(n, dimension, dimension, dimension, dimension)
+    cells |= blocks.reshape(n, dimension, 1, dimension, 1)
+    return cells.reshape(n, size, size)
+
+
+def _mask_dtype(size):
+    return np.uint16 if size < 16 else np.uint32 if size < 32 else np.uint64
+
+
+def _propagate_chunk(boards, dimension, max_rounds):
+    size = dimension * dimension
+    dtype = _mask_dtype(size)
+    one = dtype(1)
+    full = dtype(((1 << size) - 1) << 1)
+    bad = (boards > size).any(axis=(1, 2))
+    values = np.where(bad[:, None, None], 0, boards).astype(dtype)
+    masks = np.where(values == 0, full, one << values).astype(dtype)
+
+    # Each round only works on the boards that changed in the previous one
+    active = np.flatnonzero(~bad)
+    for _ in range(max_rounds):
+        if not active.size:
+            break
+        current = masks[active]
+        before = current.copy()
+
+        # Naked singles: a color fixed in a unit leaves the other cells of the unit
+        single = (current & (current - one)) == 0
+        fixed = np.where(single, current, dtype(0))
+        placed = [_once_twice(units) for units in _as_units(fixed, dimension)]
+        stop = np.zeros(len(active), dtype=bool)
+        for _, twice, _ in placed:
+            stop |= (twice != 0).any(axis=1)  # two cells fixed to the same color
+        taken = _to_cells(*(present for _, _, present in placed), dimension)
+        current = np.where(single, current, current & ~taken)
+
+        # Hidden singles: a color with a single place left in a unit goes there
+        spots = [_once_twice(units) for units in _as_units(current, dimension)]
+        for _, _, present in spots:
+            stop |= (present != full).any(axis=1)  # some color has no place left
+        only = current & _to_cells(*(exactly_one for exactly_one, _, _ in spots), dimension)
+        stop |= ((only & (only - one)) != 0).any(axis=(1, 2))  # one cell forced to two colors
+        current = np.where(only != 0, only, current)
+        stop |= (current == 0).any(axis=(1, 2))
+
+        masks[active] = current
+        bad[active] |= stop
+        changed = (current != before).any(axis=(1, 2))
+        active = active[changed & ~stop]
+
+    solved = (masks & (masks - one)) == 0
+    colors = np.zeros(masks.shape, dtype=np.uint8)
+    for color in range(1, size + 1):
+        colors[masks == (one << dtype(color))] = color
+    status = np.where(bad, CONTRADICTION, np.where(solved.all(axis=(1, 2)), SOLVED, STUCK)).astype(np.uint8)
+    return colors, status
+
+
+def solve_many(puzzles, dimension=3, solver_name="solve_dsatur_incremental"):
+    """Solutions (strings, None when unsolvable) of a list of puzzle strings:
+    vectorized singles propagation first, then the scalar solver for the
+    boards still needing search."""
+    boards = boards_to_array(puzzles, dimension)
+    filled, status = propagate_singles(boards, dimension)
+    solutions = [None] * len(puzzles)
+    for i, text in zip(np.flatnonzero(status == SOLVED).tolist(),
+                       array_to_strings(filled[status == SOLVED])):
+        solutions[i] = text
+
+    stuck = np.flatnonzero(status == STUCK).tolist()
+    if stuck:
+        graph = SudokuGraph(dimension)
+        solve = getattr(graph, solver_name)
+        for i, text in zip(stuck, array_to_strings(filled[stuck])):
+            graph.load_from_string(text)
+            if solve() is True:
+                solutions[i] = graph.to_string()
+    return solutions